@@ -0,0 +1,244 @@
+# assign.py
+"""
+Team-level gold assignment.
+
+With the "team" pairing policy (SimConfig.pairing) idle robots no longer
+search for gold themselves. Once per decision phase each team's
+TeamAssigner pairs up idle robots and gives every pair a gold target:
+- small teams (at most HUNGARIAN_LIMIT idle robots and candidate gold cells):
+  the Hungarian method picks the leaders that minimise the total distance to
+  their gold, then a second assignment picks the cheapest partner per gold
+- larger teams: greedy on a global priority queue of (distance, robot, gold)
+  edges, with nearest-gold and nearest-partner queries on CellBuckets
+
+The assigner is a subscriber on the team channel like a robot: it keeps its
+own known_gold / group_status replicas from the bus and publishes the new
+pairings as one status message, which the robots apply at the start of their
+decision phase.
+"""
+import heapq
+
+import numpy as np
+
+from fields import UNREACHABLE
+from population import STATE_INDEX
+from spatial import CellBuckets
+from trace import INFO
+
+# Team channel subscriber id used by the assigners (robot ids are >= 0)
+ASSIGNER_ID = -1
+
+# Largest idle-robot / candidate-gold count solved with the Hungarian method
+HUNGARIAN_LIMIT = 32
+
+
+class TeamAssigner:
+    def __init__(self, group, world, index, bus, group_status, tracer, fields=None):
+        """
+        - group: team name
+        - world: Map (gold cells are re-checked before they are handed out)
+        - index: OccupancyIndex of the simulation (idle members and their positions)
+        - bus: MessageBus the assignments are published on
+        - group_status: initial team status.StatusTable, copied into the replica
+        - fields: FieldService of the simulation; gold the team's deposit field cannot
+          reach is dropped instead of handed out (no check when None)
+        """
+        self.id = ASSIGNER_ID
+        self.group = group
+        self.world = world
+        self.index = index
+        self.bus = bus
+        self.tracer = tracer
+        self.fields = fields
+        self.deposit = world.config.team(group).deposit
+        self.group_status = group_status.copy()
+        self.known_gold = {}
+        self.gold = CellBuckets(world.width, world.height)
+        bus.subscribe(self)
+
+    def process_inbox(self):
+        inbox = self.bus.receive(self)
+        statuses = [msg.status for msg in inbox if msg.status is not None]
+        if statuses:
+            self.group_status.apply(statuses)
+        for msg in inbox:
+            for cell, amt in msg.gold.items():
+                if amt > 0:
+                    self.known_gold[cell] = amt
+                    self.gold.add(cell)
+                else:
+                    self.known_gold.pop(cell, None)
+                    self.gold.discard(cell)
+
+    def assign(self):
+        """Pair idle robots with unclaimed gold and publish the pairings. Returns [(leader, partner, cell)]."""
+        self.process_inbox()
+        gone = {}
+        targeted = self.group_status.targets()
+        candidates = []
+        deposit = self._deposit_field()
+        for cell in list(self.gold):
+            if self._lost(cell, deposit):
+                # stale report or walled-off gold: tell the team instead of pairing robots for it
+                gone[cell] = 0
+                self.known_gold.pop(cell, None)
+                self.gold.discard(cell)
+            elif cell not in targeted:
+                candidates.append(cell)
+
+        idle = sorted(self.index.in_state(self.group, "idle"), key=lambda r: r.id)
+        pairs = min(len(idle) // 2, len(candidates))
+        if pairs == 0:
+            assignments = []
+        elif len(idle) <= HUNGARIAN_LIMIT and len(candidates) <= HUNGARIAN_LIMIT:
+            assignments = _assign_optimal(idle, sorted(candidates), pairs)
+        else:
+            assignments = _assign_greedy(idle, self.gold, targeted, pairs)
+
+        paired = STATE_INDEX["paired_for_gold"]
+        for leader, partner, cell in assignments:
+            for r, mate in ((leader, partner), (partner, leader)):
+                self.group_status.set(r.id, r.x, r.y, r.population.facing.item(r.slot), paired, mate.id, cell,
+                                      r.carrying)
+            if self.tracer.info:
+                self.tracer.emit(INFO, "pair_formed", robot=leader.id, partner=partner.id, target=cell)
+        status = self.group_status.take_dirty()
+        if status is not None or gone:
+            self.bus.publish(self, gone, status, np.zeros(0, dtype=np.intp))
+        return assignments
+
+    def would_assign(self):
+        """True when the next assign() would pair robots up or drop a gold cell (see Simulation.skip)."""
+        deposit = self._deposit_field()
+        targeted = self.group_status.targets()
+        candidates = False
+        for cell in self.gold:
+            if self._lost(cell, deposit):
+                return True
+            candidates = candidates or cell not in targeted
+        return candidates and len(self.index.in_state(self.group, "idle")) >= 2
+
+    def _deposit_field(self):
+        return self.fields.deposit(self.deposit) if self.fields is not None else None
+
+    def _lost(self, cell, deposit):
+        return self.world.grid.gold_at(*cell) <= 0 or (deposit is not None and deposit.at(*cell) == UNREACHABLE)
+
+
+# -------------------
+# Assignment strategies
+# -------------------
+def _assign_optimal(idle, cells, pairs):
+    """Leaders by a size-`pairs` min-cost matching, then one partner per chosen gold."""
+    # Stage 1: robots x (gold + zero-cost "no gold" columns); exactly len(idle) - pairs
+    # robots take a dummy column, so `pairs` robots end up leading a gold cell
+    dummies = len(idle) - pairs
+    cost = [[r.distance(*c) for c in cells] + [0] * dummies for r in idle]
+    leaders = sorted(((cost[i][j], i, j) for i, j in enumerate(hungarian(cost)) if j < len(cells)))[:pairs]
+    chosen = [j for _, _, j in leaders]
+    lead_rows = {i for _, i, _ in leaders}
+
+    # Stage 2: chosen gold x remaining robots, one partner each
+    rest = [i for i in range(len(idle)) if i not in lead_rows]
+    cost = [[idle[i].distance(*cells[j]) for i in rest] for j in chosen]
+    partners = hungarian(cost)
+    return [(idle[i], idle[rest[partners[k]]], cells[j]) for k, (_, i, j) in enumerate(leaders)]
+
+
+def _assign_greedy(idle, gold, targeted, pairs):
+    """Cheapest (distance, robot, gold) edges first; each robot's nearest free gold is re-queried when taken."""
+    taken = set(targeted)
+
+    def free(cell):
+        return cell not in taken
+
+    def nearest_gold(r):
+        return gold.nearest(r.x, r.y, cost=lambda c: r.distance(*c), accept=free)
+
+    heap = []
+    for r in idle:
+        cell = nearest_gold(r)
+        if cell is not None:
+            heapq.heappush(heap, (r.distance(*cell), r.id, cell, r))
+
+    leaders = []
+    while heap and len(leaders) < pairs:
+        _, _, cell, r = heapq.heappop(heap)
+        if cell in taken:
+            cell = nearest_gold(r)
+            if cell is not None:
+                heapq.heappush(heap, (r.distance(*cell), r.id, cell, r))
+            continue
+        taken.add(cell)
+        leaders.append((r, cell))
+
+    # Partners: nearest remaining idle robot to each gold, cheapest leaders first
+    used = {r.id for r, _ in leaders}
+    by_cell = {}
+    robots = CellBuckets(gold.width, gold.height)
+    for r in idle:
+        if r.id not in used:
+            by_cell.setdefault((r.x, r.y), []).append(r)
+            robots.add((r.x, r.y))
+
+    assignments = []
+    for leader, (gx, gy) in leaders:
+        cell = robots.nearest(gx, gy, cost=lambda c: min(m.distance(gx, gy) for m in by_cell[c]))
+        if cell is None:
+            break
+        here = by_cell[cell]
+        partner = min(here, key=lambda m: (m.distance(gx, gy), m.id))
+        here.remove(partner)
+        if not here:
+            robots.discard(cell)
+        assignments.append((leader, partner, (gx, gy)))
+    return assignments
+
+
+def hungarian(cost):
+    """
+    Minimum-cost assignment for an n x m cost matrix (list of rows, n <= m).
+    Returns, for each row, the column assigned to it.
+    """
+    n, m = len(cost), len(cost[0]) if cost else 0
+    inf = float("inf")
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    match = [0] * (m + 1)   # column -> row (1-based, 0 = free)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = match[j0], inf, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    rows = [0] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            rows[match[j] - 1] = j - 1
+    return rows
@@ -0,0 +1,98 @@
+# batch.py
+"""
+Parallel multi-episode batch runner.
+
+Runs many independent, seeded, headless episodes across a process pool and
+collects one result dict per episode. Every episode draws from its own
+random streams (streams.py) built from its seed, so results depend only on
+the seed and the parameters, not on which worker ran them or in what order.
+
+CLI:
+    python batch.py --episodes 100 --seed 0 --workers 8 --out results.jsonl
+    python batch.py --episodes 100 --until-done --fast-forward
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import SimConfig, make_config
+from simulation import Simulation
+from stop import AllGoldDeposited
+
+
+def run_episode(seed, config=None, stop=(), fast_forward=False):
+    """
+    Run one headless episode and return its results dict.
+    - stop: stop conditions ending it before config.max_steps (see stop.py)
+    - fast_forward: see Simulation.run
+    """
+    start = time.perf_counter()
+    sim = Simulation(config, seed=seed)
+    reason = sim.run(stop=stop, fast_forward=fast_forward)
+    result = {"seed": seed}
+    result.update(sim.results())
+    result["stop_reason"] = reason
+    result["wall_time"] = time.perf_counter() - start
+    return result
+
+
+def _run_episode_args(args):
+    seed, config, stop, fast_forward = args
+    return run_episode(seed, SimConfig.from_dict(config), stop, fast_forward)
+
+
+def run_batch(seeds, config=None, workers=None, stop=(), fast_forward=False):
+    """
+    Run one episode per seed with the same SimConfig across `workers`
+    processes (default: all cores). Results come back in seed order.
+    - stop: stop conditions (see stop.py); every episode gets its own copy
+    - fast_forward: see Simulation.run
+    """
+    seeds = list(seeds)
+    config = config if config is not None else SimConfig()
+    stop = list(stop)
+    if workers == 1:
+        return [run_episode(seed, config, copy.deepcopy(stop), fast_forward) for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_episode_args,
+                             [(seed, config.to_dict(), stop, fast_forward) for seed in seeds]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many seeded headless episodes in parallel.")
+    parser.add_argument("--episodes", type=int, default=10, help="number of episodes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode (then seed+1, ...)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--steps", type=int, default=1000, help="steps per episode")
+    parser.add_argument("--size", type=int, default=20, help="grid width and height")
+    parser.add_argument("--robots", type=int, default=10, help="robots per team")
+    parser.add_argument("--gold", type=int, default=30, help="gold bars per map")
+    parser.add_argument("--until-done", action="store_true", help="stop episodes once all gold is deposited")
+    parser.add_argument("--fast-forward", action="store_true", help="skip deterministic stretches (see Simulation.skip)")
+    parser.add_argument("--out", default=None, help="write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    seeds = range(args.seed, args.seed + args.episodes)
+    start = time.perf_counter()
+    config = make_config(args.size, gold=args.gold, robots_per_team=args.robots, max_steps=args.steps)
+    stop = [AllGoldDeposited()] if args.until_done else []
+    results = run_batch(seeds, config, args.workers, stop, args.fast_forward)
+    elapsed = time.perf_counter() - start
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.out:
+            out.close()
+    print(f"{len(results)} episodes in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.2f} episodes/s)", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# benchmark.py
+"""
+Simulation throughput benchmarks.
+
+Runs the start/decision/action loop headless over a matrix of robot counts,
+gold counts and grid sizes, and reports steps/sec plus the time spent in each
+phase. Results are written as JSON and can be compared against a stored
+baseline; any case slower than the baseline by more than --threshold is a
+regression (exit code 1).
+
+    python benchmark.py --out bench.json
+    python benchmark.py --robots 20,200 --grid 20 --baseline bench_baseline.json --threshold 0.2
+    python benchmark.py --save-baseline bench_baseline.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+from config import make_config
+from metrics import Metrics
+from simulation import Simulation
+
+DEFAULT_ROBOTS = (20, 200, 2000, 10000)
+DEFAULT_GOLD = (30, 300)
+DEFAULT_GRID = (20, 100)
+PHASES = ("start", "decision", "action")
+
+
+def case_key(robots, gold, grid):
+    return f"robots={robots},gold={gold},grid={grid}"
+
+
+def run_case(robots, gold, grid, steps=50, max_seconds=30.0, seed=0):
+    """
+    Benchmark one configuration. Runs `steps` steps or until `max_seconds`
+    have been spent (at least one step), and returns the timings. `robots` is
+    the total over both teams and must be even.
+    """
+    if robots % 2:
+        raise ValueError(f"robots must be even (two equal teams), got {robots}")
+    config = make_config(grid, gold=gold, robots_per_team=robots // 2)
+    metrics = Metrics(history=0)
+    sim = Simulation(config, seed=seed, metrics=metrics)
+    start = time.perf_counter()
+    done = 0
+    while done < steps:
+        sim.step()
+        done += 1
+        if time.perf_counter() - start > max_seconds:
+            break
+    elapsed = time.perf_counter() - start
+    return {
+        "case": case_key(robots, gold, grid),
+        "robots": robots,
+        "gold": gold,
+        "grid": grid,
+        "steps": done,
+        "seconds": elapsed,
+        "steps_per_sec": done / elapsed if elapsed > 0 else float("inf"),
+        "phase_seconds": {p: metrics.timers[p] for p in PHASES},
+        "counters": dict(metrics.counters),
+    }
+
+
+def run_matrix(robots=DEFAULT_ROBOTS, gold=DEFAULT_GOLD, grid=DEFAULT_GRID, **kwargs):
+    """Run every (robots, gold, grid) combination; kwargs go to run_case."""
+    results = []
+    for r, g, size in itertools.product(robots, gold, grid):
+        result = run_case(r, g, size, **kwargs)
+        print(f"{result['case']:<36} {result['steps_per_sec']:>10.2f} steps/s  "
+              + "  ".join(f"{p}={result['phase_seconds'][p] / max(result['steps'], 1) * 1e3:.2f}ms"
+                          for p in PHASES),
+              file=sys.stderr)
+        results.append(result)
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Compare results against a baseline report. Returns a list of
+    (case, baseline steps/s, current steps/s, ratio) for every case slower
+    than baseline * (1 - threshold).
+    """
+    base = {r["case"]: r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        b = base.get(r["case"])
+        if b is None or not b["steps_per_sec"]:
+            continue
+        ratio = r["steps_per_sec"] / b["steps_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append((r["case"], b["steps_per_sec"], r["steps_per_sec"], ratio))
+    return regressions
+
+
+def report(results):
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def _int_list(text):
+    return tuple(int(v) for v in text.split(","))
+
+
+def _robot_counts(text):
+    counts = _int_list(text)
+    odd = [n for n in counts if n % 2]
+    if odd:
+        raise argparse.ArgumentTypeError(f"robot counts are split over two teams and must be even, got {odd}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation throughput.")
+    parser.add_argument("--robots", type=_robot_counts, default=DEFAULT_ROBOTS, help="total robot counts, comma separated")
+    parser.add_argument("--gold", type=_int_list, default=DEFAULT_GOLD, help="gold counts, comma separated")
+    parser.add_argument("--grid", type=_int_list, default=DEFAULT_GRID, help="grid sizes, comma separated")
+    parser.add_argument("--steps", type=int, default=50, help="steps per case")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="time budget per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown vs. baseline as a fraction (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", default=None, help="also write the report here as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_matrix(args.robots, args.gold, args.grid,
+                         steps=args.steps, max_seconds=args.max_seconds, seed=args.seed)
+    data = report(results)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for case, before, after, ratio in regressions:
+            print(f"REGRESSION {case}: {before:.2f} -> {after:.2f} steps/s ({ratio:.0%} of baseline)",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,148 +1,246 @@
 # bot.py
-import random
+import time
+import numpy as np
 from collections import defaultdict
-from map import GRID_SIZE
+from config import SimConfig
+from fields import UNREACHABLE
+from known import KnownCells
+from population import STATES, STATE_INDEX, STEP_X, STEP_Y, Population
+from status import CARRYING, FACING, STATE, VERSION, X, Y
+from vision import FACINGS, FACING_INDEX, visibility_table
+from trace import DEBUG, INFO, NULL_TRACER
+from metrics import NULL_METRICS
 
 DIRECTIONS = ["N", "E", "S", "W"]
 
 class Robot:
 
 
-    def __init__(self, robot_id, group, x, y,facing):
+    def __init__(self, robot_id, group, x, y,facing, config=None):
+        config = config if config is not None else SimConfig()
         self.id = robot_id
         self.group = group
-        self.x = x
-        self.y = y
-        self.facing = facing
-        self.state = "idle"
+        self.width = config.width
+        self.height = config.height
+        self.index = None  # OccupancyIndex, set by Simulation.add_robot
+        # x, y, facing, state and carrying live in a Population slot; a robot
+        # starts with a private one until Simulation.add_robot adopts it
+        self.population = Population(self.width, self.height, capacity=1)
+        self.slot = self.population.add(robot_id, group, x, y, FACING_INDEX[facing], STATE_INDEX["idle"])
 
         self.partner_id = None
         self.gold_target = None
-        self.carrying = False
-        self.deposit = (0, 0) if self.group == "group1" else (GRID_SIZE - 1, GRID_SIZE - 1)
+        self.deposit = config.team(group).deposit
+        self.pairing = config.pairing
 
-        self.group_status = {} # {0:{x:0,y:0,facing:N,state:idle, partner_id:None,gold_target:None,carrying:False},... }
+        self.group_status = None  # this robot's status.StatusTable replica of the team, set by Simulation
+        self._status_seen = -1    # version of our own row when we last wrote or checked it
         self.known_gold = {} 
-        self.known_cells = set() # to impliment
-        
-        self.inbox = []
-        
-        
+        self.known_cells = KnownCells(self.width, self.height)  # replaced by the team bitmap in Simulation.add_robot
+
+        # Team message bus (set by Simulation.add_robot) and the deltas not yet broadcast
+        self.bus = None
+        self.tracer = NULL_TRACER
+        self.metrics = NULL_METRICS
+        self.fields = None  # fields.FieldService, set by Simulation.add_robot
+        self.router = None  # route.Router, set by Simulation.add_robot
+        self._dirty_gold = {}
+        self._new_cells = []
+
+        # Visibility lookup table for this map size and the last sense_flat()/sense() results
+        self.vision = visibility_table(self.width, self.height)
+        self._sense_key = None
+        self._sense_flat = None
+        self._sense_cells = None
 
+    # -------------------
+    # Population fields (x/y/state also keep the occupancy index in sync)
+    # -------------------
+    @property
+    def x(self):
+        return self.population.x.item(self.slot)
+
+    @x.setter
+    def x(self, value):
+        old = self.x
+        if self.index is not None and value != old:
+            self.index.moved(self, (old, self.y), (value, self.y))
+        self.population.x[self.slot] = value
+
+    @property
+    def y(self):
+        return self.population.y.item(self.slot)
+
+    @y.setter
+    def y(self, value):
+        old = self.y
+        if self.index is not None and value != old:
+            self.index.moved(self, (self.x, old), (self.x, value))
+        self.population.y[self.slot] = value
+
+    @property
+    def facing(self):
+        return FACINGS[self.population.facing.item(self.slot)]
+
+    @facing.setter
+    def facing(self, value):
+        self.population.facing[self.slot] = FACING_INDEX[value]
+
+    @property
+    def state(self):
+        return STATES[self.population.state.item(self.slot)]
+
+    @state.setter
+    def state(self, value):
+        old = self.state
+        if self.index is not None and value != old:
+            self.index.state_changed(self, old, value)
+        self.population.state[self.slot] = STATE_INDEX[value]
+
+    @property
+    def carrying(self):
+        return self.population.carrying.item(self.slot)
+
+    @carrying.setter
+    def carrying(self, value):
+        self.population.carrying[self.slot] = value
 
     # -------------------
     # Messaging helpers
     # -------------------
-    def broadcast_to_team(self, msg, robots):
-        for r in robots:
-            if r.group == self.group and r.id != self.id:
-                r.inbox.append(msg)
-
-    def process_latest_inbox(self):
+    def broadcast_to_team(self):
         """
-        Read the latest inbox entry (if any).
-        Expected message format: [known_gold, group_status]
-        - known_gold: dict {(x,y): amt}
-        - group_status: either a single status dict with 'id' or a mapping id->status
-        Update self.known_gold and self.group_status (merge, taking min for duplicate gold amounts).
-        Does not remove messages from inbox.
+        Publish everything that changed since our last broadcast as one delta message:
+        - gold: {(x,y): amt} for changed known_gold cells (0 = gone)
+        - status: copy of the dirty group_status rows (StatusTable.take_dirty)
+        - cells: flat indices of newly seen cells
+        Nothing is sent when nothing changed.
         """
-        if not self.inbox:
+        if not (self._dirty_gold or self.group_status.dirty or self._new_cells):
             return
-
-        msg = self.inbox[-1]
-        if not isinstance(msg, (list, tuple, set)) or len(msg) < 3:
+        status = self.group_status.take_dirty()
+        if self.bus is not None:
+            t0 = time.perf_counter() if self.metrics.enabled else None
+            cells = np.concatenate(self._new_cells) if self._new_cells else np.zeros(0, dtype=np.intp)
+            self.bus.publish(self, self._dirty_gold, status, cells)
+            if t0 is not None:
+                self.metrics.add_time("broadcast", time.perf_counter() - t0)
+        self._dirty_gold = {}
+        self._new_cells = []
+
+    def process_inbox(self):
+        """Apply every pending teammate delta, oldest first."""
+        if self.bus is None:
             return
-        
-        incoming_known, incoming_group_status, incoming_known_cells = msg[0], msg[1], msg[2]
+        inbox = self.bus.receive(self)
+        if self.metrics.enabled:
+            self.metrics.observe("inbox_size", len(inbox))
+        statuses = [msg.status for msg in inbox if msg.status is not None]
+        if statuses:
+            self.group_status.apply(statuses)
+        for msg in inbox:
+            for cell, amt in msg.gold.items():
+                if amt > 0:
+                    self.known_gold[cell] = amt
+                else:
+                    self.known_gold.pop(cell, None)
+            if len(msg.cells):
+                self.known_cells.mark_flat(msg.cells)
+
+    def set_known_gold(self, cell, amt):
+        """Record a gold estimate for cell (0 removes it) and mark it for the next broadcast."""
+        if amt > 0:
+            self.known_gold[cell] = amt
+        else:
+            self.known_gold.pop(cell, None)
+        self._dirty_gold[cell] = amt
 
-        # Merge known_gold (use min when we have existing estimate)
-        if isinstance(incoming_known, dict):
-            self.known_gold = incoming_known
+    def update_partner_status(self, pid, **fields):
+        """Change fields (state, partner_id, gold_target, carrying) of a teammate's row for the next broadcast."""
+        self.group_status.update(pid, **fields)
 
-        # Merge group_status
-        if isinstance(incoming_group_status, dict):
-            self.group_status = incoming_group_status
-            
-            
-        if isinstance(incoming_known_cells, set):
-            self.known_cells = incoming_known_cells
+    def status_changed(self):
+        """
+        True when a teammate's message changed our own group_status row to a
+        different state than ours, i.e. we must sync to it. Rows carry version
+        stamps, so the usual case (nobody touched our row) is one comparison.
+        """
+        gs = self.group_status
+        row = gs.rows[self.id]
+        version = gs.data.item(row, VERSION)
+        if version == self._status_seen:
+            return False
+        self._status_seen = version
+        return gs.data.item(row, STATE) != self.population.state.item(self.slot)
 
     # -------------------
     # Phase: Start
     # -------------------
     def start_phase(self, world, robots):
-        # read latest message (if any) and merge into local maps
-        self.process_latest_inbox()
-        self.inbox.clear()  # clear inbox after processing
-        if self.state != self.group_status[self.id]["state"]:
+        # apply pending team messages to local maps
+        self.process_inbox()
+        if self.status_changed():
             self.sync_with_group_status()
             
             
-        print(f"Start known_gold {self.id}: {self.known_gold}")
-        # print(f"Start group_status {self.id}: {self.group_status}")
+        if self.tracer.debug:
+            self.tracer.emit(DEBUG, "known_gold", robot=self.id, phase="start", cells=len(self.known_gold))
         # sense environment and update local known_gold
-        for (vx, vy) in self.sense():
-            # add known cell
-            self.known_cells.add((vx, vy))
-            
-            amt = world.grid[vy][vx]["gold"]
-            if amt > 0:
-                self.known_gold[(vx, vy)] = amt
+        visible_flat = self.sense_flat()
+        # add known cells
+        new_cells = self.known_cells.mark_flat(visible_flat)
+        if len(new_cells):
+            self._new_cells.append(new_cells)
+        amounts = world.grid.gold_in_flat(visible_flat)
+        for i in np.flatnonzero(amounts > 0).tolist():
+            # only cells holding gold are turned into (x, y)
+            y, x = divmod(visible_flat.item(i), self.width)
+            cell, amt = (x, y), amounts.item(i)
+            if self.known_gold.get(cell) != amt and self.gold_reachable(cell):
+                self.set_known_gold(cell, amt)
                 
 
-        # build message [known_gold, group_status] and broadcast to team
-        msg = [self.known_gold, self.group_status, self.known_cells]
-        self.broadcast_to_team(msg,robots)
+        # broadcast what we learned to the team
+        self.broadcast_to_team()
 
 
     # -------------------
     # Phase: Decision
     # -------------------
     def decision_phase(self, world, robots):
-        # print(f'{self.id} inbox = {self.inbox[-1]}')
-        self.process_latest_inbox()
-        self.inbox.clear()
-        if self.state != self.group_status[self.id]["state"]:
-            print('syncing')
+        self.process_inbox()
+        if self.status_changed():
             self.sync_with_group_status()
             
-        print(f"Decision known_gold {self.id}: {self.known_gold}")
-        # print(f"Decision group_status {self.id}: {self.group_status}")
+        if self.tracer.debug:
+            self.tracer.emit(DEBUG, "known_gold", robot=self.id, phase="decision", cells=len(self.known_gold))
 
         if self.state == "idle":
-            nearest_gold = self.find_nearest_unclaimed_gold()
+            # with "team" pairing the TeamAssigner hands out targets instead (see assign.py)
+            nearest_gold = self.find_nearest_unclaimed_gold() if self.pairing == "robot" else None
             if nearest_gold:
                 self.gold_target = nearest_gold
                 self.state = "paired_for_gold"
                 
                 # Find nearest idle partner
-                idle_partners = [
-                    r for r in robots 
-                    if r.group == self.group and r.id != self.id and r.state == "idle"
-                ]
-                if idle_partners:
-                    partner = min(idle_partners, key=lambda r: self.distance(r.x, r.y))
+                partner = self.find_nearest_idle_partner(robots)
+                if partner is not None:
                     self.partner_id = partner.id
                     # Send message to partner to pair up
-                    self.group_status[self.partner_id] = {
-                        "x": partner.x,
-                        "y": partner.y,
-                        "facing": partner.facing,
-                        "state": "paired_for_gold",
-                        "partner_id": self.id,
-                        "gold_target": self.gold_target,
-                        "carrying": partner.carrying
-                        }
-                    print(f'partner {self.partner_id} = {self.group_status[self.partner_id]}')
+                    self.group_status.set(self.partner_id, partner.x, partner.y,
+                                          partner.population.facing.item(partner.slot),
+                                          STATE_INDEX["paired_for_gold"], self.id, self.gold_target,
+                                          partner.carrying)
+                    if self.tracer.info:
+                        self.tracer.emit(INFO, "pair_formed", robot=self.id, partner=self.partner_id,
+                                         target=self.gold_target)
                 else:
                     # No available partners; revert to idle
                     self.state = "idle"
                     self.gold_target = None
                     self.partner_id = None
             self.update_to_group_status()
-            msg = [self.known_gold, self.group_status, self.known_cells]
-            self.broadcast_to_team(msg, robots)
+            self.broadcast_to_team()
             
         elif self.state == "paired_for_gold":
             # Verify the gold at our target still exists. If it doesn't, abort pairing.
@@ -153,13 +251,21 @@ class Robot:
             else:
                 tx, ty = self.gold_target
                 # If the gold is no longer at the location, revert both robots to idle
-                if self.id != self.group_status[self.partner_id]["partner_id"]:
+                if self.id != self.group_status.partner_of(self.partner_id):
                     # Partner no longer recognizes us as partner; revert to idle
+                    if self.tracer.info:
+                        self.tracer.emit(INFO, "pair_broken", robot=self.id, partner=self.partner_id,
+                                         reason="partner_left")
                     self.state = "idle"
                     self.gold_target = None
                     self.partner_id = None
                     
-                elif world.grid[ty][tx]["gold"] <= 0:
+                elif world.grid.gold_at(tx, ty) <= 0:
+                    if self.tracer.info:
+                        self.tracer.emit(INFO, "pair_broken", robot=self.id, partner=self.partner_id,
+                                         reason="gold_gone", target=self.gold_target)
+                    # Forget the cell (and tell the team) so nobody pairs for it again
+                    self.set_known_gold((tx, ty), 0)
                     # Revert self
                     self.state = "idle"
                     self.gold_target = None
@@ -167,24 +273,21 @@ class Robot:
                     if self.partner_id is not None:
                         pid = self.partner_id
                         # Update partner's entry in our group_status map if it exists
-                        if pid in self.group_status:
-                            self.group_status[pid]["state"] = "idle"
-                            self.group_status[pid]["partner_id"] = None
-                            self.group_status[pid]["gold_target"] = None
+                        self.update_partner_status(pid, state="idle", partner_id=None, gold_target=None)
                         # Also clear our partner link
                         self.partner_id = None
                         
             # Broadcast changes
             self.update_to_group_status()
-            msg = [self.known_gold, self.group_status,self.known_cells]
-            self.broadcast_to_team(msg, robots)
+            self.broadcast_to_team()
             
             
         elif self.state == "carrying":
             self.update_to_group_status()
-            msg = [self.known_gold, self.group_status,self.known_cells]
-            self.broadcast_to_team(msg, robots)
-        print(f"{self.id} decision: state={self.state}, partner_id={self.partner_id}, gold_target={self.gold_target}")
+            self.broadcast_to_team()
+        if self.tracer.debug:
+            self.tracer.emit(DEBUG, "decision", robot=self.id, state=self.state,
+                             partner=self.partner_id, target=self.gold_target)
             
 
         
@@ -195,15 +298,17 @@ class Robot:
     # -------------------
     def action_phase(self, world, robots):
         
-        self.process_latest_inbox()
-        self.inbox.clear()
-        if self.state != self.group_status[self.id]["state"]:
-            print('syncing')
+        self.process_inbox()
+        if self.status_changed():
             self.sync_with_group_status()
             
             
         if self.state == "idle":
-            self.random_move()
+            if self.population.deferred is not None:
+                # the simulation moves all idle robots in one batch after the phase
+                self.population.deferred.append(self.slot)
+            else:
+                self.random_move()
         
         elif self.state == "paired_for_gold":
             if not self.gold_target:
@@ -211,90 +316,106 @@ class Robot:
                 self.state = "idle"
                 self.partner_id = None
                 self.update_to_group_status()
-                msg = [self.known_gold, self.group_status,self.known_cells]
-                self.broadcast_to_team(msg, robots)
+                self.broadcast_to_team()
                 
             
             tx, ty = self.gold_target
             if (self.x, self.y) == (tx, ty):
                 # At gold location; pick up gold
-                if world.grid[ty][tx]["gold"] > 0 and not self.carrying:
-                    if self.group_status[self.partner_id]['x'] == tx and self.group_status[self.partner_id]['y'] == ty and not self.group_status[self.partner_id]['carrying']:
-                        world.grid[ty][tx]["gold"] -= 1
+                if world.grid.gold_at(tx, ty) > 0 and not self.carrying:
+                    gs = self.group_status
+                    if (gs.get(self.partner_id, X) == tx and gs.get(self.partner_id, Y) == ty
+                            and not gs.get(self.partner_id, CARRYING)):
+                        world.take_gold(self, tx, ty)
                         self.carrying = True
                         self.state = "carrying"
                         self.gold_target = None
                         
                         # Update known_gold
                         if (tx, ty) in self.known_gold:
-                            self.known_gold[(tx, ty)] -= 1
-                            if self.known_gold[(tx, ty)] <= 0:
-                                del self.known_gold[(tx, ty)]
+                            self.set_known_gold((tx, ty), self.known_gold[(tx, ty)] - 1)
                         # Update partner state to carrying as well
-                        if self.partner_id is not None and self.partner_id in self.group_status:
-                            pid = self.partner_id
-                            self.group_status[pid]["state"] = "carrying"
-                            self.group_status[pid]["carrying"] = True
-                            self.group_status[pid]["gold_target"] = None
-                        print(f"{self.id} picked up gold at ({tx}, {ty})")
+                        if self.partner_id is not None:
+                            self.update_partner_status(self.partner_id, state="carrying", carrying=True, gold_target=None)
+                        if self.metrics.enabled:
+                            self.metrics.count("pickups")
+                        if self.tracer.info:
+                            self.tracer.emit(INFO, "pickup", robot=self.id, partner=self.partner_id, cell=(tx, ty))
                         
                         self.update_to_group_status()
-                        msg = [self.known_gold, self.group_status,self.known_cells]
-                        self.broadcast_to_team(msg, robots)
+                        self.broadcast_to_team()
                     else:
                         self.move_towards(tx, ty)
                     
                 else:
                     # Gold no longer present or already carrying; revert to idle
+                    if self.tracer.info:
+                        self.tracer.emit(INFO, "pair_broken", robot=self.id, partner=self.partner_id,
+                                         reason="gold_gone", target=self.gold_target)
                     self.state = "idle"
                     self.gold_target = None
-                    if self.partner_id is not None and self.partner_id in self.group_status:
-                        pid = self.partner_id
-                        self.group_status[pid]["state"] = "idle"
-                        self.group_status[pid]["partner_id"] = None
-                        self.group_status[pid]["gold_target"] = None
+                    if self.partner_id is not None:
+                        self.update_partner_status(self.partner_id, state="idle", partner_id=None, gold_target=None)
                     self.partner_id = None
                     
                     self.update_to_group_status()
-                    msg = [self.known_gold, self.group_status,self.known_cells]
-                    self.broadcast_to_team(msg, robots)
+                    self.broadcast_to_team()
                 
+            elif self.move_towards(tx, ty):
+                self.update_to_group_status()
+                self.broadcast_to_team()
             else:
-                # Move towards gold target
-                self.move_towards(tx, ty)
+                # No route to the gold (walled off): forget it and break the pair
+                if self.tracer.info:
+                    self.tracer.emit(INFO, "pair_broken", robot=self.id, partner=self.partner_id,
+                                     reason="no_route", target=self.gold_target)
+                self.set_known_gold((tx, ty), 0)
+                self.state = "idle"
+                self.gold_target = None
+                if self.partner_id is not None:
+                    self.update_partner_status(self.partner_id, state="idle", partner_id=None, gold_target=None)
+                self.partner_id = None
                 self.update_to_group_status()
-                msg = [self.known_gold, self.group_status,self.known_cells]
-                self.broadcast_to_team(msg, robots)
+                self.broadcast_to_team()
                 
         elif self.state == "carrying":
             
             dx, dy = self.deposit
-            if self.facing != self.group_status[self.partner_id]["facing"] and self.id > self.partner_id and (self.x, self.y) == (self.group_status[self.partner_id]['x'], self.group_status[self.partner_id]['y']):
-                self.turn(self.group_status[self.partner_id]["facing"])
-            elif self.facing != self.group_status[self.partner_id]["facing"] and self.id < self.partner_id and (self.x, self.y) == (self.group_status[self.partner_id]['x'], self.group_status[self.partner_id]['y']):
+            gs = self.group_status
+            partner_facing = gs.get(self.partner_id, FACING)
+            partner_cell = (gs.get(self.partner_id, X), gs.get(self.partner_id, Y))
+            facing = self.population.facing.item(self.slot)
+            if facing != partner_facing and self.id > self.partner_id and (self.x, self.y) == partner_cell:
+                self.turn(FACINGS[partner_facing])
+            elif facing != partner_facing and self.id < self.partner_id and (self.x, self.y) == partner_cell:
                 pass
                    
                     
-            elif (self.x, self.y) == (dx, dy) and (self.group_status[self.partner_id]['x'], self.group_status[self.partner_id]['y']) == (dx, dy):
+            elif (self.x, self.y) == (dx, dy) and partner_cell == (dx, dy):
                 # At deposit; drop gold
                 if self.carrying:
                     world.scores[self.group] += 1
                     self.carrying = False
                     self.state = "idle"
-                    print(f"{self.id} deposited gold at ({dx}, {dy})")
-                    self.group_status[self.partner_id]["state"] = "idle"
-                    self.group_status[self.partner_id]["carrying"] = False
+                    if self.metrics.enabled:
+                        self.metrics.count("deposits")
+                    if self.tracer.info:
+                        self.tracer.emit(INFO, "deposit", robot=self.id, partner=self.partner_id,
+                                         cell=(dx, dy), score=world.scores[self.group])
+                    self.update_partner_status(self.partner_id, state="idle", carrying=False)
                     
                     
                     
                     
             else:
-                # Move towards deposit
-                self.move_towards(dx, dy)
+                # Move towards deposit (downhill on the team's deposit field when there is one)
+                if self.fields is not None:
+                    self.step_downhill(self.fields.deposit(self.deposit))
+                else:
+                    self.move_towards(dx, dy)
                 
             self.update_to_group_status()
-            msg = [self.known_gold, self.group_status,self.known_cells]
-            self.broadcast_to_team(msg, robots)
+            self.broadcast_to_team()
                 
 
     # -------------------
@@ -330,7 +451,20 @@ class Robot:
         return steps + turns
 
     def move_towards(self, tx, ty):
-        """Move one step towards target (tx, ty)."""
+        """
+        Move one step towards target (tx, ty): greedy y-then-x on an open grid,
+        the first move of a cached shortest route when the map has walls.
+        Returns False when walls leave no route to the target.
+        """
+        if self.router is not None and self.router.grid.wall_count:
+            nxt = self.router.next_state(self.x, self.y, self.population.facing.item(self.slot), (tx, ty))
+            if nxt is None:
+                return (self.x, self.y) == (tx, ty)
+            if nxt[2] != self.population.facing.item(self.slot):
+                self.turn(FACINGS[nxt[2]])
+            else:
+                self.move_forward()
+            return True
 
         if self.y < ty:
             if self.facing != "N":
@@ -352,6 +486,7 @@ class Robot:
                 self.turn("W")
             else:
                 self.move_forward()
+        return True
    
     def find_nearest_unclaimed_gold(self):
         """
@@ -362,10 +497,10 @@ class Robot:
         min_distance = float('inf')
 
         # Collect all gold positions currently targeted by other robots in the group
-        targeted_gold_positions = {
-            status["gold_target"] for status in self.group_status.values()
-            if status["gold_target"] is not None
-        }
+        targeted_gold_positions = self.group_status.targets()
+
+        for cell in [c for c in self.known_gold if not self.gold_reachable(c)]:
+            self.set_known_gold(cell, 0)   # walled off: tell the team too
 
         for (gold_x, gold_y), amount in self.known_gold.items():
             if amount > 0 and (gold_x, gold_y) not in targeted_gold_positions: # Check if the gold is still available
@@ -376,16 +511,36 @@ class Robot:
 
         return nearest_gold
     
+    def gold_reachable(self, cell):
+        """False when no path leads from `cell` to our deposit (always True without distance fields)."""
+        return self.fields is None or self.fields.deposit(self.deposit).at(*cell) != UNREACHABLE
+
+    def find_nearest_idle_partner(self, robots):
+        """Nearest idle teammate (lowest id on ties), or None."""
+        # Self is already marked paired_for_gold here, so it is never its own candidate
+        if self.index is not None:
+            return self.index.nearest_idle_teammate(self)
+        idle_partners = [
+            r for r in robots
+            if r.group == self.group and r.id != self.id and r.state == "idle"
+        ]
+        if not idle_partners:
+            return None
+        return min(idle_partners, key=lambda r: (self.distance(r.x, r.y), r.id))
+
     def move_forward(self):
         """Move one step forward in facing direction."""
-        if self.facing == "S" and self.y > 0:
-            self.y -= 1
-        elif self.facing == "N" and self.y < GRID_SIZE - 1:
-            self.y += 1
-        elif self.facing == "E" and self.x < GRID_SIZE - 1:
-            self.x += 1
-        elif self.facing == "W" and self.x > 0:
-            self.x -= 1
+        f = self.population.facing.item(self.slot)
+        x, y = self.x + STEP_X.item(f), self.y + STEP_Y.item(f)
+        if 0 <= x < self.width and 0 <= y < self.height and not self._blocked(x, y):
+            if x != self.x:
+                self.x = x
+            else:
+                self.y = y
+
+    def _blocked(self, x, y):
+        grid = self.population.grid
+        return grid is not None and grid.wall_count > 0 and grid.is_blocked(x, y)
 
     def turn(self, new_facing):
         """Turn to new facing direction."""
@@ -404,50 +559,20 @@ class Robot:
             self.turn("W")
 
     def random_move(self):
-        # 90% forward, 10% turn
-        action = random.choices(["forward", "turn"], weights=[0.8, 0.2])[0]
-        if action == "forward":
-            # Try to move forward; if blocked by edge, force a turn
-            if (self.facing == "S" and self.y > 0):
-                self.move_forward()
-            elif (self.facing == "N" and self.y < GRID_SIZE - 1):
-                self.move_forward()
-            elif (self.facing == "E" and self.x < GRID_SIZE - 1):
-                self.move_forward()
-            elif (self.facing == "W" and self.x > 0):
-                self.move_forward()
-            else:
-                # If at edge, force a safe turn
-                safe_dirs = self.get_safe_directions()
-                if safe_dirs:
-                    self.turn(random.choice(safe_dirs))
-        else:
-            # Turn to a safe direction
-            safe_dirs = self.get_safe_directions()
-            if safe_dirs:
-                self.turn(random.choice(safe_dirs))
+        """80% step forward (safe turn when at the edge), 20% turn to a safe direction."""
+        self.population.random_move([self.slot])
     
     def move_explore(self):
         """
         Move toward the nearest unknown cell (exploration).
-        Uses BFS to find the closest cell not in known_cells.
+        Steps down the team's frontier field when the simulation provides one;
+        otherwise the bitmap answers the nearest cell by Manhattan distance.
         """
-        from collections import deque
-
-        target = None
-        visited = set()
-        q = deque([(self.x, self.y, [])])  # (x, y, path)
-
-        while q:
-            x, y, path = q.popleft()
-            if (x, y) not in self.known_cells:
-                target = (x, y)
-                break
-            for dx, dy, d in [(0,1,"N"), (0,-1,"S"), (1,0,"E"), (-1,0,"W")]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    q.append((nx, ny, path + [(nx, ny)]))
+        if self.fields is not None:
+            if not self.step_downhill(self.fields.frontier(self.group)):
+                self.random_move()
+            return
+        target = self.known_cells.nearest_unknown(self.x, self.y)
 
         # If no unknown cell found, fallback to random_move
         if not target:
@@ -458,61 +583,79 @@ class Robot:
         tx, ty = target
         self.move_towards(tx, ty)
 
+    def step_downhill(self, field):
+        """
+        One move down a fields.DistanceField: step forward if the cell ahead is
+        closer to a source, else turn to a closer neighbour (N, S, E, W order).
+        Returns False when already on a source or no source is reachable.
+        """
+        d = field.at(self.x, self.y)
+        if d == 0 or d == UNREACHABLE:
+            return False
+        f = self.population.facing.item(self.slot)
+        x, y = self.x + STEP_X.item(f), self.y + STEP_Y.item(f)
+        if 0 <= x < self.width and 0 <= y < self.height and field.at(x, y) < d:
+            self.move_forward()
+            return True
+        for facing in ("N", "S", "E", "W"):
+            f = FACING_INDEX[facing]
+            x, y = self.x + STEP_X.item(f), self.y + STEP_Y.item(f)
+            if 0 <= x < self.width and 0 <= y < self.height and field.at(x, y) < d:
+                self.turn(facing)
+                return True
+        return False
+
     def sense(self):
-        """Return list of cells visible in front (3 at 1+, 5 at 2+)."""
-        visible = []
-        if self.facing == "N":
-            # One step north
-            visible += [(self.x + dx, self.y + 1) for dx in (-1, 0, 1)]
-            # Two steps north
-            visible += [(self.x + dx, self.y + 2) for dx in (-2, -1, 0, 1, 2)]
-        elif self.facing == "S":
-            visible += [(self.x + dx, self.y - 1) for dx in (-1, 0, 1)]
-            visible += [(self.x + dx, self.y - 2) for dx in (-2, -1, 0, 1, 2)]
-        elif self.facing == "E":
-            visible += [(self.x + 1, self.y + dy) for dy in (-1, 0, 1)]
-            visible += [(self.x + 2, self.y + dy) for dy in (-2, -1, 0, 1, 2)]
-        elif self.facing == "W":
-            visible += [(self.x - 1, self.y + dy) for dy in (-1, 0, 1)]
-            visible += [(self.x - 2, self.y + dy) for dy in (-2, -1, 0, 1, 2)]
-
-        # Keep only valid grid positions
-        return [(x, y) for x, y in visible if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE]
+        """Return cells visible in front (3 at 1+, 5 at 2+) as (x, y), from the same cache as sense_flat()."""
+        flat = self.sense_flat()
+        if self._sense_cells is None:
+            ys, xs = np.divmod(flat, self.width)
+            self._sense_cells = tuple(zip(xs.tolist(), ys.tolist()))
+        return self._sense_cells
+
+    def sense_flat(self):
+        """Flat indices (y * width + x) of the visible cells, cached until the robot moves or turns."""
+        key = (self.x, self.y, self.facing)
+        if key != self._sense_key:
+            self._sense_key = key
+            self._sense_flat = self.vision.flat(*key)
+            self._sense_cells = None
+        return self._sense_flat
 
     def get_safe_directions(self):
-        """Return list of directions that won't point outside the grid from current position."""
+        """Return list of directions that won't point outside the grid (or into a wall) from current position."""
         safe = []
-        if self.y < GRID_SIZE - 1:  # can go North
+        if self.y < self.height - 1 and not self._blocked(self.x, self.y + 1):  # can go North
             safe.append("N")
-        if self.y > 0:              # can go South
+        if self.y > 0 and not self._blocked(self.x, self.y - 1):              # can go South
             safe.append("S")
-        if self.x < GRID_SIZE - 1:  # can go East
+        if self.x < self.width - 1 and not self._blocked(self.x + 1, self.y):  # can go East
             safe.append("E")
-        if self.x > 0:              # can go West
+        if self.x > 0 and not self._blocked(self.x - 1, self.y):              # can go West
             safe.append("W")
         return safe #list of safe directions
     
     def update_to_group_status(self):
-        self.group_status[self.id] = {
-            "x": self.x,
-            "y": self.y,
-            "facing": self.facing,
-            "state": self.state,
-            "partner_id": self.partner_id,
-            "gold_target": self.gold_target,
-            "carrying": self.carrying
-        }
+        """Write our own row (in place) and mark it for the next broadcast."""
+        pop, slot = self.population, self.slot
+        gs = self.group_status
+        gs.set(self.id, pop.x.item(slot), pop.y.item(slot), pop.facing.item(slot), pop.state.item(slot),
+               self.partner_id, self.gold_target, pop.carrying.item(slot))
+        self._status_seen = gs.version_of(self.id)
         
     def sync_with_group_status(self):
-        status = self.group_status[self.id]
-        print(self.group_status[self.id])
-        self.x = status["x"]
-        self.y = status["y"]
-        self.facing = status['facing']
-        self.state = status['state']
-        self.partner_id = status['partner_id']
-        self.gold_target = status['gold_target']
-        self.carrying = status['carrying']
+        gs = self.group_status
+        if self.metrics.enabled:
+            self.metrics.count("sync_calls")
+        if self.tracer.debug:
+            self.tracer.emit(DEBUG, "state_sync", robot=self.id, old=self.state, new=gs.state_of(self.id))
+        self.x = gs.get(self.id, X)
+        self.y = gs.get(self.id, Y)
+        self.population.facing[self.slot] = gs.get(self.id, FACING)
+        self.state = gs.state_of(self.id)
+        self.partner_id = gs.partner_of(self.id)
+        self.gold_target = gs.target_of(self.id)
+        self.carrying = bool(gs.get(self.id, CARRYING))
 
     def set_idle(self, robots=None, broadcast=True):
         """Set this robot to idle and clear pairing/targets.
@@ -521,8 +664,8 @@ class Robot:
         - Updates entries in self.group_status for self and for partner (if known).
         - If `robots` (list) is provided, it will also update the partner Robot object directly
           so in-memory Robot objects stay consistent.
-        - If broadcast is True and `robots` is provided, it will broadcast the updated
-          group_status to teammates so they learn about the change.
+        - If broadcast is True, it will broadcast the updated group_status entries
+          to teammates so they learn about the change.
         """
         # Revert self
         self.state = "idle"
@@ -535,28 +678,45 @@ class Robot:
         # If we had a partner, update their entry in our local group_status
         if self.partner_id is not None:
             pid = self.partner_id
-            if pid in self.group_status:
-                self.group_status[pid]["state"] = "idle"
-                self.group_status[pid]["partner_id"] = None
-                self.group_status[pid]["gold_target"] = None
-                self.group_status[pid]["carrying"] = False
+            self.update_partner_status(pid, state="idle", partner_id=None, gold_target=None, carrying=False)
 
             # Also update the partner Robot object if we have the robots list
-            if robots is not None:
-                for r in robots:
-                    if r.id == pid:
-                        r.state = "idle"
-                        r.partner_id = None
-                        r.gold_target = None
-                        r.carrying = False
-                        # ensure partner's group_status reflects the change
-                        r.update_to_group_status()
-                        break
+            if self.index is not None:
+                partner = self.index.robot(pid)
+            elif robots is not None:
+                partner = next((r for r in robots if r.id == pid), None)
+            else:
+                partner = None
+            if partner is not None:
+                partner.state = "idle"
+                partner.partner_id = None
+                partner.gold_target = None
+                partner.carrying = False
+                # ensure partner's group_status reflects the change
+                partner.update_to_group_status()
 
         # clear our partner link locally
         self.partner_id = None
 
         # Broadcast updated group_status to teammates if requested
-        if broadcast and robots is not None:
-            msg = [self.known_gold, self.group_status,self.known_cells]
-            self.broadcast_to_team(msg, robots)
\ No newline at end of file
+        if broadcast:
+            self.broadcast_to_team()
+
+    def lose_pickup(self, cell):
+        """
+        Undo a pickup claim on `cell` that another robot won (see parallel.py):
+        same outcome as finding the gold gone - both robots go back to idle.
+        """
+        if self.tracer.info:
+            self.tracer.emit(INFO, "pair_broken", robot=self.id, partner=self.partner_id,
+                             reason="pickup_conflict", target=cell)
+        self.carrying = False
+        self.state = "idle"
+        self.gold_target = None
+        self.set_known_gold(cell, 0)
+        if self.partner_id is not None:
+            self.update_partner_status(self.partner_id, state="idle", partner_id=None,
+                                       gold_target=None, carrying=False)
+        self.partner_id = None
+        self.update_to_group_status()
+        self.broadcast_to_team()
@@ -0,0 +1,138 @@
+# bus.py
+"""
+Team message bus.
+
+Each team has one channel: an append-only log of sequence-numbered delta
+messages. A robot publishes only what changed since its last broadcast
+(gold cells, group_status rows, newly seen cells) and, at the start of each
+phase, applies every message published since its own cursor, in order.
+Message payloads are copies, so receivers never alias the sender's state.
+
+The bus also counts messages and bytes delivered per step so communication
+cost can be measured (see MessageBus.stats / MessageBus.history).
+"""
+from collections import deque
+
+# Wire-size model used for the byte counters (fixed-width encoding):
+# header = seq + sender + 3 section lengths, gold entry = x, y, amount,
+# status entry = id + x, y, facing, state, partner, target x/y, carrying,
+# cell = x, y. All fields counted as 4-byte ints.
+HEADER_BYTES = 20
+GOLD_ENTRY_BYTES = 12
+STATUS_ENTRY_BYTES = 36
+CELL_BYTES = 8
+
+
+class Message:
+    __slots__ = ("seq", "sender", "gold", "status", "cells", "size")
+
+    def __init__(self, seq, sender, gold, status, cells):
+        self.seq = seq
+        self.sender = sender
+        self.gold = gold        # {(x, y): amount}, amount 0 means "no gold left"
+        self.status = status    # copies of changed status.StatusTable rows, or None
+        self.cells = cells      # flat indices (y * width + x) of newly seen cells
+        self.size = None
+
+    def nbytes(self):
+        if self.size is None:
+            self.size = self._size()
+        return self.size
+
+    def _size(self):
+        return (HEADER_BYTES
+                + GOLD_ENTRY_BYTES * len(self.gold)
+                + STATUS_ENTRY_BYTES * (len(self.status) if self.status is not None else 0)
+                + CELL_BYTES * len(self.cells))
+
+
+class TeamChannel:
+    """Sequence-numbered message log for one team."""
+
+    def __init__(self, group):
+        self.group = group
+        self.log = []
+        self.base_seq = 0      # seq of log[0]
+        self.cursors = {}      # robot_id -> next seq to read
+
+    @property
+    def next_seq(self):
+        return self.base_seq + len(self.log)
+
+    def append(self, sender, gold, status, cells):
+        msg = Message(self.next_seq, sender, gold, status, cells)
+        self.log.append(msg)
+        return msg
+
+    def read(self, robot_id):
+        """Messages published since robot_id's cursor (its own included); advances the cursor."""
+        start = self.cursors[robot_id] - self.base_seq
+        self.cursors[robot_id] = self.next_seq
+        return self.log[start:]
+
+    def trim(self):
+        """Drop messages every subscriber has already read."""
+        if not self.cursors:
+            return
+        low = min(self.cursors.values())
+        if low > self.base_seq:
+            del self.log[:low - self.base_seq]
+            self.base_seq = low
+
+
+class MessageBus:
+    def __init__(self, history=1000):
+        """
+        - history: number of per-step stats dicts kept (oldest dropped first)
+        """
+        self.channels = {}
+        self.history = deque(maxlen=history)  # one stats dict per finished step
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.messages_sent = 0
+        self.messages_delivered = 0
+        self.bytes_delivered = 0
+
+    def channel(self, group):
+        if group not in self.channels:
+            self.channels[group] = TeamChannel(group)
+        return self.channels[group]
+
+    def subscribe(self, robot):
+        """Register robot on its team channel; it will only see messages published from now on."""
+        ch = self.channel(robot.group)
+        ch.cursors[robot.id] = ch.next_seq
+
+    def unsubscribe(self, robot):
+        """Stop delivering to robot; its unread messages no longer hold back trimming."""
+        self.channel(robot.group).cursors.pop(robot.id, None)
+
+    def publish(self, robot, gold, status, cells):
+        """Append a delta message from robot to its team channel."""
+        self.messages_sent += 1
+        return self.channel(robot.group).append(robot.id, gold, status, cells)
+
+    def receive(self, robot):
+        """Pending messages from teammates, oldest first."""
+        pending = [m for m in self.channel(robot.group).read(robot.id) if m.sender != robot.id]
+        for m in pending:
+            self.messages_delivered += 1
+            self.bytes_delivered += m.nbytes()
+        return pending
+
+    def stats(self):
+        """Counters for the current (unfinished) step."""
+        return {
+            "messages_sent": self.messages_sent,
+            "messages_delivered": self.messages_delivered,
+            "bytes_delivered": self.bytes_delivered,
+            "backlog": sum(len(ch.log) for ch in self.channels.values()),
+        }
+
+    def end_step(self):
+        """Close the step: record its counters, reset them and trim read messages."""
+        for ch in self.channels.values():
+            ch.trim()
+        self.history.append(self.stats())
+        self._reset_counters()
@@ -0,0 +1,350 @@
+# checkpoint.py
+"""
+Checkpoint, restore and fork of a running Simulation.
+
+A checkpoint is one compressed .npz file:
+- state.json (stored as bytes): config, seed, step counters, scores, every
+  robot's pairing fields, known_gold and unsent deltas, the message bus
+  (pending messages, cursors, counters), the assigners' known gold, the
+  status version clocks and every random stream's bit-generator state
+- arrays: gold cells, walls, the Population columns (draw buffers
+  included), the teams' KnownCells bitmaps, every group_status replica's
+  rows (robots', then assigners'), the status rows and cells carried by
+  pending messages and the router's cached routes
+
+restore() rebuilds the Simulation from its config and seed, then overwrites
+all of that state. Stepping the restored run gives exactly the same steps as
+the original would have. Distance fields, the occupancy index and the
+vision caches are derived data and are rebuilt, not stored.
+
+fork() runs N what-if continuations from a simulation's current state
+("seed": reseed the robots' random walks, "pairing": switch policy). On
+POSIX each branch is an os.fork child that shares the parent's memory
+copy-on-write, so the common prefix is never simulated or copied again.
+Elsewhere each branch restores an in-memory checkpoint in a spawned process.
+
+    save(sim, "run.ckpt.npz")
+    sim = restore("run.ckpt.npz")
+    results = fork(sim, [{"seed": s} for s in range(8)], steps=500)
+"""
+import io
+import json
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bus import Message
+from config import SimConfig
+from metrics import NULL_METRICS
+from population import Population
+from render import NullRenderer
+from route import NO_ROUTE
+from simulation import Simulation
+from status import COLUMN_NAMES
+from trace import NULL_TRACER
+
+FORMAT_VERSION = 2
+
+# Population columns stored per slot
+POPULATION_FIELDS = Population._FIELDS
+
+# Keys a fork variant may set
+VARIANT_KEYS = ("seed", "pairing", "label")
+
+
+# -------------------
+# JSON helpers (cells are tuples in memory, lists in JSON)
+# -------------------
+def _cell(value):
+    return tuple(value) if value is not None else None
+
+
+def _gold_out(gold):
+    return [[x, y, amt] for (x, y), amt in gold.items()]
+
+
+def _gold_in(items):
+    return {(x, y): amt for x, y, amt in items}
+
+
+# -------------------
+# Save
+# -------------------
+def save(sim, path):
+    """Write a checkpoint of `sim` between steps to `path` (a file name or a binary file object)."""
+    world = sim.world
+    pop = sim.population
+    groups = world.config.groups
+    arrays = {}
+
+    flat, amounts = world.grid.gold_flat()
+    arrays["gold_flat"] = np.asarray(flat, dtype=np.int64)
+    arrays["gold_amount"] = np.asarray(amounts, dtype=np.int32)
+    arrays["walls"] = np.array(world.grid.wall_cells(), dtype=np.int32).reshape(-1, 2)
+    for name in POPULATION_FIELDS:
+        arrays["pop_" + name] = getattr(pop, name)[:pop.size]
+    arrays["known"] = np.stack([sim.known_cells[g].bits for g in groups if g in sim.known_cells]
+                               or [np.zeros((world.height, world.width), dtype=bool)])
+
+    tables = [r.group_status for r in sim.robots] + [a.group_status for a in sim.assigners.values()]
+    arrays["status"] = (np.concatenate([t.data for t in tables]) if tables
+                        else np.zeros((0, len(COLUMN_NAMES)), dtype=np.int64))
+
+    channels, cells, statuses = [], [], []
+    for ch in sim.bus.channels.values():
+        log = []
+        for m in ch.log:
+            # status rows: -1 for a message without any
+            log.append([m.seq, m.sender, _gold_out(m.gold), -1 if m.status is None else len(m.status), len(m.cells)])
+            cells.append(np.asarray(m.cells, dtype=np.int64))
+            if m.status is not None:
+                statuses.append(m.status)
+        channels.append({"group": ch.group, "base_seq": ch.base_seq,
+                         "cursors": [[rid, seq] for rid, seq in ch.cursors.items()], "log": log})
+    arrays["bus_cells"] = np.concatenate(cells) if cells else np.zeros(0, dtype=np.int64)
+    arrays["bus_status"] = (np.concatenate(statuses) if statuses
+                            else np.zeros((0, len(COLUMN_NAMES)), dtype=np.int64))
+
+    keys = list(sim.router.cache)
+    arrays["route_keys"] = np.array(keys, dtype=np.int32).reshape(-1, 5)
+    arrays["route_next"] = np.array([v if v != NO_ROUTE else (-1, -1, -1) for v in sim.router.cache.values()],
+                                    dtype=np.int32).reshape(-1, 3)
+
+    state = {
+        "version": FORMAT_VERSION,
+        "config": sim.config.to_dict(),
+        "seed": sim.seed,
+        "step_count": sim.step_count,
+        "last_pickup_step": sim.last_pickup_step,
+        "scores": [world.scores[g] for g in groups],
+        "known_groups": [g for g in groups if g in sim.known_cells],
+        "known_counts": [sim.known_cells[g].count for g in groups if g in sim.known_cells],
+        "map_rng": world.rng.bit_generator.state,
+        "robot_rngs": [rng.bit_generator.state for rng in pop.rngs],
+        "status_clocks": {r.group: r.group_status.clock[0] for r in sim.robots},
+        "robots": [{
+            "id": r.id,
+            "partner_id": r.partner_id,
+            "gold_target": r.gold_target,
+            "known_gold": _gold_out(r.known_gold),
+            "dirty_gold": _gold_out(r._dirty_gold),
+            "dirty_status": sorted(r.group_status.dirty),
+            "status_seen": r._status_seen,
+            "new_cells": np.concatenate(r._new_cells).tolist() if r._new_cells else [],
+        } for r in sim.robots],
+        "assigners": [{
+            "group": a.group,
+            "known_gold": _gold_out(a.known_gold),
+        } for a in sim.assigners.values()],
+        "bus": {
+            "channels": channels,
+            "counters": [sim.bus.messages_sent, sim.bus.messages_delivered, sim.bus.bytes_delivered],
+            "history": list(sim.bus.history),
+        },
+        "router": {"hits": sim.router.hits, "misses": sim.router.misses},
+    }
+    arrays["state"] = np.frombuffer(json.dumps(state).encode(), dtype=np.uint8)
+    np.savez_compressed(path, **arrays)
+
+
+def to_bytes(sim):
+    """Checkpoint of `sim` as bytes (for sending to another process)."""
+    buf = io.BytesIO()
+    save(sim, buf)
+    return buf.getvalue()
+
+
+# -------------------
+# Restore
+# -------------------
+def restore(path, renderer=None, tracer=None, metrics=None):
+    """
+    Simulation continuing from the checkpoint at `path` (file name, binary file
+    object or bytes from to_bytes). renderer / tracer / metrics as for Simulation.
+    """
+    if isinstance(path, bytes):
+        path = io.BytesIO(path)
+    with np.load(path) as data:
+        arrays = {k: data[k] for k in data.files}
+    state = json.loads(arrays.pop("state").tobytes())
+    if state["version"] != FORMAT_VERSION:
+        raise ValueError(f"unsupported checkpoint version {state['version']}")
+
+    sim = Simulation(SimConfig.from_dict(state["config"]), renderer, seed=state["seed"],
+                     tracer=tracer, metrics=metrics)
+    world = sim.world
+    sim.step_count = state["step_count"]
+    sim.last_pickup_step = state["last_pickup_step"]
+
+    # World
+    grid = world.grid
+    walls = {tuple(c) for c in arrays["walls"].tolist()}
+    for cell in set(grid.wall_cells()) ^ walls:
+        grid.set_blocked(*cell, cell in walls)
+    grid.set_gold_flat(arrays["gold_flat"], arrays["gold_amount"])
+    for group, score in zip(world.config.groups, state["scores"]):
+        world.scores[group] = score
+    world.rng.bit_generator.state = state["map_rng"]
+
+    # Robots: kinematic columns and random streams, then the per-robot fields
+    pop = sim.population
+    if not np.array_equal(pop.id[:pop.size], arrays["pop_id"]):
+        raise ValueError("checkpoint robots do not match the ones its config creates")
+    for name in POPULATION_FIELDS:
+        getattr(pop, name)[:pop.size] = arrays["pop_" + name]
+    for rng, rng_state in zip(pop.rngs, state["robot_rngs"]):
+        rng.bit_generator.state = rng_state
+    sim.index.rebuild()
+    by_id = {r.id: r for r in sim.robots}
+    for saved in state["robots"]:
+        r = by_id[saved["id"]]
+        r.partner_id = saved["partner_id"]
+        r.gold_target = _cell(saved["gold_target"])
+        r.known_gold = _gold_in(saved["known_gold"])
+        r._dirty_gold = _gold_in(saved["dirty_gold"])
+        r.group_status.dirty = set(saved["dirty_status"])
+        r._status_seen = saved["status_seen"]
+        r._new_cells = [np.array(saved["new_cells"], dtype=np.intp)] if saved["new_cells"] else []
+
+    for i, (group, count) in enumerate(zip(state["known_groups"], state["known_counts"])):
+        known = sim.known_cells[group]
+        known.bits[:] = arrays["known"][i]
+        known.count = count
+
+    # group_status replicas, in the order they were saved
+    offset = 0
+    for table in [r.group_status for r in sim.robots] + [a.group_status for a in sim.assigners.values()]:
+        table.data[:] = arrays["status"][offset:offset + len(table)]
+        offset += len(table)
+    for r in sim.robots:
+        r.group_status.clock[0] = state["status_clocks"][r.group]   # shared by the team's replicas
+
+    for saved in state["assigners"]:
+        a = sim.assigners[saved["group"]]
+        a.known_gold = _gold_in(saved["known_gold"])
+        for cell in a.known_gold:
+            a.gold.add(cell)
+
+    # Message bus: pending messages, cursors and counters
+    bus = sim.bus
+    cells, offset = arrays["bus_cells"], 0
+    statuses, status_offset = arrays["bus_status"], 0
+    for saved in state["bus"]["channels"]:
+        ch = bus.channel(saved["group"])
+        ch.base_seq = saved["base_seq"]
+        ch.cursors = {rid: seq for rid, seq in saved["cursors"]}
+        ch.log = []
+        for seq, sender, gold, rows, n in saved["log"]:
+            status = None
+            if rows >= 0:
+                status = statuses[status_offset:status_offset + rows]
+                status_offset += rows
+            ch.log.append(Message(seq, sender, _gold_in(gold), status, cells[offset:offset + n]))
+            offset += n
+    bus.messages_sent, bus.messages_delivered, bus.bytes_delivered = state["bus"]["counters"]
+    bus.history.clear()
+    bus.history.extend(state["bus"]["history"])
+
+    # Router cache, in LRU order
+    router = sim.router
+    router.cache.clear()
+    for key, nxt in zip(arrays["route_keys"].tolist(), arrays["route_next"].tolist()):
+        router.cache[tuple(key)] = NO_ROUTE if nxt[0] < 0 else tuple(nxt)
+    router.hits = state["router"]["hits"]
+    router.misses = state["router"]["misses"]
+    return sim
+
+
+# -------------------
+# Fork
+# -------------------
+def _check_variant(variant):
+    unknown = set(variant) - set(VARIANT_KEYS)
+    if unknown:
+        raise ValueError(f"unknown variant keys {sorted(unknown)}, expected some of {VARIANT_KEYS}")
+
+
+def apply_variant(sim, variant):
+    """Apply a fork variant: "seed" reseeds the robots' walks, "pairing" switches policy."""
+    _check_variant(variant)
+    if "seed" in variant:
+        sim.reseed(variant["seed"])
+    if "pairing" in variant:
+        sim.set_pairing(variant["pairing"])
+
+
+def _run_branch(sim, variant, steps):
+    # a branch runs headless and reports nothing but its results
+    sim.world.renderer = NullRenderer()
+    sim.recorder = None
+    sim.tracer = NULL_TRACER
+    sim.metrics = NULL_METRICS
+    for r in sim.robots:
+        r.tracer = NULL_TRACER
+        r.metrics = NULL_METRICS
+    for a in sim.assigners.values():
+        a.tracer = NULL_TRACER
+    apply_variant(sim, variant)
+    sim.run(steps)
+    result = {"variant": variant}
+    result.update(sim.results())
+    return result
+
+
+def _fork_child(sim, variant, steps, conn):
+    try:
+        conn.send(_run_branch(sim, variant, steps))
+    except BaseException as exc:
+        conn.send(exc)
+        raise
+    finally:
+        conn.close()
+
+
+def _branch_from_bytes(data, variant, steps):
+    return _run_branch(restore(data), variant, steps)
+
+
+def fork(sim, variants, steps=None, workers=None):
+    """
+    Run one continuation of `sim` per variant from its current step and return
+    their results (sim.results() plus "variant"), in variant order. `sim` itself
+    is left untouched.
+    - variants: dicts with optional "seed", "pairing" and a free-form "label"
+    - steps: steps per branch (default: what is left of config.max_steps)
+    - workers: branches run at the same time (default: all cores)
+    """
+    variants = list(variants)
+    for variant in variants:
+        _check_variant(variant)
+    if steps is None:
+        steps = max(0, sim.config.max_steps - sim.step_count)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    if "fork" not in mp.get_all_start_methods():
+        data = to_bytes(sim)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            return list(pool.map(_branch_from_bytes, [data] * len(variants), variants, [steps] * len(variants)))
+
+    ctx = mp.get_context("fork")
+    results = []
+    for start in range(0, len(variants), workers):
+        running = []
+        for variant in variants[start:start + workers]:
+            recv, send = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_fork_child, args=(sim, variant, steps, send), daemon=True)
+            proc.start()
+            send.close()
+            running.append((proc, recv))
+        for proc, recv in running:
+            try:
+                result = recv.recv()
+            except EOFError:
+                result = RuntimeError(f"fork branch exited with code {proc.exitcode} before reporting")
+            proc.join()
+            if isinstance(result, BaseException):
+                raise result
+            results.append(result)
+    return results
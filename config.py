@@ -0,0 +1,108 @@
+# config.py
+"""
+Simulation configuration.
+
+SimConfig carries everything that used to be a module constant or hard-coded
+in main.py: grid size, gold count and distribution, teams (size, deposit,
+start cell, initial facing), walls, the step budget and the pairing policy. Map, Robot and Simulation
+all take one, so different world sizes can run in the same process.
+"""
+from dataclasses import asdict, dataclass, field
+
+# Grids with more cells than this use the sparse (dict-backed) grid by default
+SPARSE_AREA = 1 << 20
+
+GOLD_DISTRIBUTIONS = ("uniform", "clustered")
+
+# "team": one TeamAssigner per team pairs idle robots each decision phase (assign.py)
+# "robot": every idle robot searches for gold and a partner itself (original behaviour)
+PAIRING_POLICIES = ("team", "robot")
+
+
+@dataclass
+class TeamConfig:
+    name: str
+    size: int = 10
+    deposit: tuple = (0, 0)
+    start: tuple = None     # start cell, defaults to the deposit
+    facing: str = "N"
+
+    def __post_init__(self):
+        self.deposit = tuple(self.deposit)
+        self.start = tuple(self.start) if self.start is not None else self.deposit
+
+
+@dataclass
+class SimConfig:
+    width: int = 20
+    height: int = 20
+    gold: int = 30
+    gold_distribution: str = "uniform"   # "uniform" or "clustered"
+    gold_clusters: int = 5               # cluster count for "clustered"
+    gold_spread: float = 2.0             # cluster standard deviation in cells
+    teams: list = field(default_factory=list)
+    walls: list = field(default_factory=list)   # (x, y) wall cells
+    wall_density: float = 0.0            # share of the remaining cells turned into random walls
+    max_steps: int = 1000
+    pairing: str = "team"                # "team" or "robot", see PAIRING_POLICIES
+    sparse: bool = None                  # None: sparse when width * height > SPARSE_AREA
+
+    def __post_init__(self):
+        if not self.teams:
+            self.teams = default_teams(self.width, self.height)
+        self.teams = [t if isinstance(t, TeamConfig) else TeamConfig(**t) for t in self.teams]
+        if self.gold_distribution not in GOLD_DISTRIBUTIONS:
+            raise ValueError(f"unknown gold_distribution {self.gold_distribution!r}, "
+                             f"expected one of {GOLD_DISTRIBUTIONS}")
+        if self.pairing not in PAIRING_POLICIES:
+            raise ValueError(f"unknown pairing {self.pairing!r}, expected one of {PAIRING_POLICIES}")
+        for t in self.teams:
+            for x, y in (t.deposit, t.start):
+                if not (0 <= x < self.width and 0 <= y < self.height):
+                    raise ValueError(f"team {t.name}: cell {(x, y)} is outside the {self.width}x{self.height} grid")
+        self.walls = [tuple(w) for w in self.walls]
+        reserved = {c for t in self.teams for c in (t.deposit, t.start)}
+        for x, y in self.walls:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise ValueError(f"wall {(x, y)} is outside the {self.width}x{self.height} grid")
+            if (x, y) in reserved:
+                raise ValueError(f"wall {(x, y)} covers a team deposit or start cell")
+        if not 0.0 <= self.wall_density < 1.0:
+            raise ValueError(f"wall_density must be in [0, 1), got {self.wall_density}")
+
+    @property
+    def groups(self):
+        return [t.name for t in self.teams]
+
+    def team(self, name):
+        for t in self.teams:
+            if t.name == name:
+                return t
+        raise KeyError(name)
+
+    def use_sparse(self):
+        if self.sparse is not None:
+            return self.sparse
+        return self.width * self.height > SPARSE_AREA
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def default_teams(width, height, size=10):
+    """The original two-team layout: group1 in the SW corner facing N, group2 in the NE corner facing S."""
+    return [
+        TeamConfig("group1", size, (0, 0), facing="N"),
+        TeamConfig("group2", size, (width - 1, height - 1), facing="S"),
+    ]
+
+
+def make_config(width=20, height=None, gold=30, robots_per_team=10, **kwargs):
+    """SimConfig with the default two-team layout scaled to the given size."""
+    height = width if height is None else height
+    return SimConfig(width=width, height=height, gold=gold,
+                     teams=default_teams(width, height, robots_per_team), **kwargs)
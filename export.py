@@ -0,0 +1,156 @@
+# export.py
+"""
+Background frame / video export.
+
+FrameExporter takes a compact snapshot of the simulation from the step loop
+(robot records, gold cells, scores) and hands it to worker processes through
+a bounded queue. The workers draw frames with the Agg backend and write PNG
+files or one MP4. The simulation never waits on rendering: when the queue is
+full, the frame is dropped and counted in `dropped`. A worker that fails
+(say the output path cannot be created) makes the next submit() or close()
+raise RuntimeError instead of silently dropping the remaining frames.
+
+PNG export can use several workers (frames are independent). MP4 export
+uses a single worker so frames reach the encoder in order, and it needs
+ffmpeg on the PATH.
+
+    with FrameExporter(sim, "frames/", every=5, workers=3) as exporter:
+        for _ in range(1000):
+            sim.step()
+            exporter.submit()
+"""
+import multiprocessing as mp
+import os
+import queue
+
+from replay import frame_views, replay_meta, robot_records
+
+FORMATS = ("png", "mp4")
+
+
+class FrameExporter:
+    def __init__(self, sim, out, fmt="png", every=1, queue_size=64, workers=1,
+                 fps=20, dpi=100, renderer="matplotlib"):
+        """
+        - out: output directory (png) or file path (mp4)
+        - every: export every Nth submitted step
+        - queue_size: snapshots that may wait for a worker before frames are dropped
+        - workers: rendering processes for png (mp4 always uses one)
+        - renderer: "matplotlib" (original drawing code) or "blit"
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+        self.sim = sim
+        self.every = max(1, every)
+        self.submitted = 0
+        self.dropped = 0
+
+        if fmt == "mp4":
+            from matplotlib.animation import writers
+            if not writers.is_available("ffmpeg"):
+                raise RuntimeError("mp4 export needs ffmpeg on the PATH; use fmt='png' instead")
+        workers = 1 if fmt == "mp4" else max(1, workers)
+        ctx = mp.get_context("spawn")  # never fork a process that may own a GUI window
+        self.queue = ctx.Queue(maxsize=queue_size)
+        meta = replay_meta(sim)
+        self.workers = [
+            ctx.Process(target=_export_worker, args=(meta, self.queue, out, fmt, fps, dpi, renderer), daemon=True)
+            for _ in range(workers)
+        ]
+        for w in self.workers:
+            w.start()
+
+    def submit(self):
+        """
+        Snapshot the current step and queue it for rendering. Returns False if
+        skipped or dropped; raises RuntimeError once a worker has failed.
+        """
+        step = self.sim.step_count - 1  # the step just run, labelled as the live display and replays do
+        if step % self.every:
+            return False
+        self._check_workers()
+        world = self.sim.world
+        flat, amounts = world.grid.gold_flat()
+        snapshot = (step, robot_records(self.sim.robots), flat, amounts,
+                    [world.scores[g] for g in world.config.groups])
+        try:
+            self.queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def close(self):
+        """
+        Wait for queued frames to be written and stop the workers. Raises
+        RuntimeError if a worker failed (its traceback is on stderr).
+        """
+        workers, self.workers = self.workers, []
+        for _ in workers:
+            if not self._put_stop(workers):
+                break
+        for w in workers:
+            w.join()
+        if any(w.exitcode for w in workers):
+            self.queue.cancel_join_thread()   # nobody will read what is left
+            self._check_workers(workers)
+
+    def _put_stop(self, workers):
+        """Queue one stop sentinel; False when no worker is left to take it (never blocks on a full queue)."""
+        while any(w.is_alive() for w in workers):
+            try:
+                self.queue.put(None, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _check_workers(self, workers=None):
+        for w in self.workers if workers is None else workers:
+            if w.exitcode:
+                raise RuntimeError(f"a frame export worker failed with exit code {w.exitcode} "
+                                   "(see its traceback above)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _export_worker(meta, frames, out, fmt, fps, dpi, renderer_name):
+    import matplotlib
+    matplotlib.use("Agg")
+    from render import BlitRenderer, MatplotlibRenderer
+    from vision import visibility_table
+
+    renderer_cls = BlitRenderer if renderer_name == "blit" else MatplotlibRenderer
+    renderer = renderer_cls(pause=0, interactive=False)
+    vision = visibility_table(meta["width"], meta["height"])
+
+    writer = None
+    if fmt == "mp4":
+        from matplotlib.animation import FFMpegWriter
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        writer = FFMpegWriter(fps=fps)
+        writer.setup(renderer.fig, out, dpi=dpi)
+    else:
+        os.makedirs(out, exist_ok=True)
+
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            step, records, flat, amounts, scores = item
+            world, robots = frame_views(meta, records, flat, amounts, scores, vision)
+            renderer.draw(world, robots, step)
+            if writer is not None:
+                writer.grab_frame()
+            else:
+                renderer.fig.savefig(os.path.join(out, f"frame_{step:07d}.png"), dpi=dpi)
+    finally:
+        if writer is not None:
+            writer.finish()
+        renderer.close()
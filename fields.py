@@ -0,0 +1,184 @@
+# fields.py
+"""
+Shared distance fields.
+
+A DistanceField holds, for every cell, the 4-neighbour step distance to the
+nearest of a set of source cells and which source that is (its label).
+Robots step downhill with O(1) lookups instead of searching on their own
+(see Robot.step_downhill):
+- deposit fields: one per team, sources = the deposit cell, built once
+- frontier fields: one per team, sources = the cells the team has not seen
+  yet. They are refreshed at most once per step and only when the team's
+  KnownCells grew. Newly seen cells stop being sources. Only the cells
+  labelled with one of them are recomputed, outward from the still-valid
+  cells around them.
+
+Walls (Grid.blocked) are never entered, so distances are path lengths
+around them. FieldService owns both kinds for a simulation, builds deposit
+fields up front and frontier fields on first use, and rebuilds them all when
+the grid's wall version changes.
+"""
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+class DistanceField:
+    def __init__(self, width, height, sources, blocked=None):
+        """
+        - sources: flat indices (y * width + x) of the source cells
+        - blocked: optional bool array over flat indices, True on walls
+        """
+        self.width = width
+        self.height = height
+        self.blocked = blocked
+        n = width * height
+        self.dist = np.full(n, UNREACHABLE, dtype=np.int32)
+        self.label = np.full(n, -1, dtype=np.int32)
+        sources = np.unique(np.asarray(sources, dtype=np.int64))
+        if blocked is not None:
+            sources = sources[~blocked[sources]]
+        self.dist[sources] = 0
+        self.label[sources] = sources
+        self._expand({0: sources})
+
+    def at(self, x, y):
+        """Distance from (x, y) to the nearest source (UNREACHABLE if there is none)."""
+        return self.dist.item(y * self.width + x)
+
+    def source(self, x, y):
+        """(x, y) of the nearest source, or None."""
+        s = self.label.item(y * self.width + x)
+        return None if s < 0 else (s % self.width, s // self.width)
+
+    def remove_sources(self, flat):
+        """
+        Stop treating `flat` as sources and repair the field: cells whose nearest
+        source was removed are cleared and refilled outward from their valid
+        neighbours, in increasing distance order.
+        """
+        flat = np.asarray(flat, dtype=np.int64)
+        flat = flat[self.label[flat] == flat]  # only actual sources
+        if not len(flat):
+            return
+        stale = np.zeros(len(self.dist), dtype=bool)
+        stale[flat] = True
+        cleared = np.flatnonzero((self.label >= 0) & stale[np.maximum(self.label, 0)])
+        self.dist[cleared] = UNREACHABLE
+        self.label[cleared] = -1
+
+        # Seeds: still-valid cells next to a cleared cell, bucketed by their distance
+        nbrs = self._neighbours(cleared)
+        seeds = np.unique(nbrs[nbrs >= 0])
+        seeds = seeds[self.dist[seeds] < UNREACHABLE]
+        buckets = {}
+        for d in np.unique(self.dist[seeds]).tolist():
+            buckets[d] = seeds[self.dist[seeds] == d]
+        self._expand(buckets)
+
+    def _neighbours(self, flat):
+        """(n, 4) flat indices of the N, E, S, W neighbours of `flat`, -1 off the grid."""
+        w, h = self.width, self.height
+        x, y = flat % w, flat // w
+        out = np.stack([flat + w, flat + 1, flat - w, flat - 1], axis=1)
+        out[y >= h - 1, 0] = -1
+        out[x >= w - 1, 1] = -1
+        out[y <= 0, 2] = -1
+        out[x <= 0, 3] = -1
+        return out
+
+    def _expand(self, buckets):
+        """Breadth-first wave from {distance: cells}; each wave sets neighbours to distance + 1."""
+        if not buckets:
+            return
+        d = min(buckets)
+        frontier = buckets.pop(d)
+        while len(frontier) or buckets:
+            if len(frontier):
+                nbrs = self._neighbours(frontier)
+                labels = np.repeat(self.label[frontier], 4)
+                nbrs = nbrs.reshape(-1)
+                ok = nbrs >= 0
+                nbrs, labels = nbrs[ok], labels[ok]
+                if self.blocked is not None:
+                    ok = ~self.blocked[nbrs]
+                    nbrs, labels = nbrs[ok], labels[ok]
+                ok = self.dist[nbrs] > d + 1
+                nbrs, labels = nbrs[ok], labels[ok]
+                nbrs, first = np.unique(nbrs, return_index=True)
+                self.dist[nbrs] = d + 1
+                self.label[nbrs] = labels[first]
+            else:
+                nbrs = frontier
+            d += 1
+            waiting = buckets.pop(d, None)
+            frontier = nbrs if waiting is None else np.union1d(nbrs, waiting)
+            if not len(frontier) and buckets:
+                d = min(buckets)
+                frontier = buckets.pop(d)
+
+
+class FrontierField(DistanceField):
+    """Distance to the nearest cell a team has not seen, kept in step with its KnownCells."""
+
+    def __init__(self, known, blocked=None):
+        self.known = known
+        self._count = known.count
+        super().__init__(known.width, known.height, np.flatnonzero(~known.bits.reshape(-1)), blocked)
+
+    def refresh(self):
+        """Drop the cells seen since the last refresh from the sources."""
+        if self.known.count != self._count:
+            self._count = self.known.count
+            self.remove_sources(np.flatnonzero((self.dist == 0) & self.known.bits.reshape(-1)))
+
+
+class FieldService:
+    """Per-simulation owner of the deposit and frontier fields."""
+
+    def __init__(self, grid, known_cells, deposits=()):
+        """
+        - grid: the map's Grid (size and walls)
+        - known_cells: group -> KnownCells (the simulation's shared dict)
+        - deposits: (x, y) cells whose fields are built right away
+        """
+        self.grid = grid
+        self.width = grid.width
+        self.height = grid.height
+        self.known_cells = known_cells
+        self.version = grid.version
+        self._deposits = {}
+        self._frontiers = {}
+        self._frontier_step = {}
+        self.step = 0
+        for cell in deposits:
+            self.deposit(cell)
+
+    def _check_version(self):
+        # Walls changed: every field is stale; deposit fields are rebuilt as they are asked for
+        if self.grid.version != self.version:
+            self.version = self.grid.version
+            self._deposits.clear()
+            self._frontiers.clear()
+
+    def _blocked(self):
+        return self.grid.blocked_flat() if self.grid.wall_count else None
+
+    def deposit(self, cell):
+        """Static field towards `cell` (x, y)."""
+        self._check_version()
+        if cell not in self._deposits:
+            x, y = cell
+            self._deposits[cell] = DistanceField(self.width, self.height, [y * self.width + x], self._blocked())
+        return self._deposits[cell]
+
+    def frontier(self, group):
+        """Field towards `group`'s unseen cells, refreshed at most once per step."""
+        self._check_version()
+        field = self._frontiers.get(group)
+        if field is None:
+            field = self._frontiers[group] = FrontierField(self.known_cells[group], self._blocked())
+        elif self._frontier_step.get(group) != self.step:
+            field.refresh()
+        self._frontier_step[group] = self.step
+        return field
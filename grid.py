@@ -0,0 +1,246 @@
+# grid.py
+"""
+Cell storage for Map.
+
+Grid: gold counts live in one int32 array, deposit owners in one int8 array
+(0 = no deposit, k = groups[k - 1]) and walls in one bool array, all indexed
+[y, x]. Bulk queries such as "gold in these cells" or "total remaining gold"
+are vectorized reads. `version` increases whenever the walls change, so
+routes and distance fields built on the terrain know when to rebuild.
+
+SparseGrid: same API over dicts, for huge maps with little content.
+
+Both keep a spatial.GoldIndex (`gold_index`) in step with every gold change,
+so the remaining total and the list of gold cells cost time proportional to
+the gold, not to the map area, and nearest / radius / rectangle queries are
+available.
+"""
+import numpy as np
+
+from spatial import GoldIndex
+
+
+class Grid:
+    def __init__(self, width, height, groups):
+        self.width = width
+        self.height = height
+        self.groups = list(groups)
+        self.gold = np.zeros((height, width), dtype=np.int32)
+        self.deposit = np.zeros((height, width), dtype=np.int8)
+        self.blocked = np.zeros((height, width), dtype=bool)
+        self.gold_index = GoldIndex(width, height)
+        self.wall_count = 0
+        self.version = 0
+        # (flat, delta) log of gold changes, only kept while a list is set (see replay.Recorder)
+        self.changes = None
+
+    # -------------------
+    # Single-cell access
+    # -------------------
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def gold_at(self, x, y):
+        """Number of gold bars on cell (x, y)."""
+        return int(self.gold[y, x])
+
+    def add_gold(self, x, y, amount=1):
+        self.gold[y, x] += amount
+        self.gold_index.change(x, y, amount)
+        if self.changes is not None:
+            self.changes.append((y * self.width + x, amount))
+
+    def take_gold(self, x, y, amount=1):
+        """Remove `amount` gold from (x, y). Returns False (and changes nothing) if there is not enough."""
+        if self.gold[y, x] < amount:
+            return False
+        self.gold[y, x] -= amount
+        self.gold_index.change(x, y, -amount)
+        if self.changes is not None:
+            self.changes.append((y * self.width + x, -amount))
+        return True
+
+    def set_gold_flat(self, flat, amounts):
+        """Replace all gold: `amounts` on the flat cells `flat`, nothing elsewhere (not logged)."""
+        flat = np.asarray(flat, dtype=np.intp)
+        self.gold[:] = 0
+        self.gold.reshape(-1)[flat] = amounts
+        self.gold_index.reset((f % self.width, f // self.width, a)
+                              for f, a in zip(flat.tolist(), np.asarray(amounts).tolist()))
+
+    def deposit_at(self, x, y):
+        """Group owning the deposit on (x, y), or None."""
+        owner = self.deposit[y, x]
+        return self.groups[owner - 1] if owner else None
+
+    def set_deposit(self, x, y, group):
+        self.deposit[y, x] = self.groups.index(group) + 1
+
+    def is_blocked(self, x, y):
+        """True if (x, y) is a wall."""
+        return bool(self.blocked[y, x])
+
+    def set_blocked(self, x, y, blocked=True):
+        if self.blocked[y, x] != blocked:
+            self.blocked[y, x] = blocked
+            self.wall_count += 1 if blocked else -1
+            self.version += 1
+
+    # -------------------
+    # Bulk queries
+    # -------------------
+    def blocked_in_flat(self, flat):
+        """Wall flags for an array of flat cell indices."""
+        return self.blocked.reshape(-1)[flat]
+
+    def blocked_flat(self):
+        """Bool array over flat indices, True on walls (a view: it follows later changes)."""
+        return self.blocked.reshape(-1)
+
+    def wall_cells(self):
+        """List of (x, y) for every wall."""
+        ys, xs = np.nonzero(self.blocked)
+        return [(int(x), int(y)) for x, y in zip(xs, ys)]
+
+    def gold_in(self, cells):
+        """Gold amounts for a sequence of (x, y) cells, as an int array in the same order."""
+        if len(cells) == 0:
+            return np.zeros(0, dtype=np.int32)
+        xy = np.asarray(cells, dtype=np.intp)
+        return self.gold[xy[:, 1], xy[:, 0]]
+
+    def gold_in_flat(self, flat):
+        """Gold amounts for an array of flat cell indices (y * width + x)."""
+        return self.gold.reshape(-1)[flat]
+
+    def gold_flat(self):
+        """(flat indices, amounts) of every cell holding gold."""
+        cells = self.gold_index.cells()
+        flat = np.array([y * self.width + x for x, y, _ in cells], dtype=np.int64)
+        return flat, np.array([a for _, _, a in cells], dtype=np.int32)
+
+    def total_gold(self):
+        """Total gold still lying on the grid."""
+        return self.gold_index.total
+
+    def gold_cells(self):
+        """List of (x, y, amount) for every cell holding gold."""
+        return self.gold_index.cells()
+
+    def deposit_cells(self):
+        """List of (x, y, group) for every deposit."""
+        ys, xs = np.nonzero(self.deposit)
+        return [(int(x), int(y), self.groups[self.deposit[y, x] - 1]) for x, y in zip(xs, ys)]
+
+
+class SparseGrid:
+    """
+    Dict-backed grid for very large, sparsely filled maps. Same accessor API
+    as Grid, but memory grows with the number of gold / deposit cells instead
+    of with the map area. Cells are keyed by flat index (y * width + x).
+    """
+
+    def __init__(self, width, height, groups):
+        self.width = width
+        self.height = height
+        self.groups = list(groups)
+        self.gold = {}         # flat -> count (> 0)
+        self.deposit = {}      # flat -> owner index (1-based, as in Grid)
+        self.blocked = set()   # flat indices of walls
+        self.gold_index = GoldIndex(width, height)
+        self.wall_count = 0
+        self.version = 0
+        self.changes = None
+
+    # -------------------
+    # Single-cell access
+    # -------------------
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def gold_at(self, x, y):
+        return self.gold.get(y * self.width + x, 0)
+
+    def add_gold(self, x, y, amount=1):
+        flat = y * self.width + x
+        self.gold[flat] = self.gold.get(flat, 0) + amount
+        self.gold_index.change(x, y, amount)
+        if self.changes is not None:
+            self.changes.append((flat, amount))
+
+    def take_gold(self, x, y, amount=1):
+        flat = y * self.width + x
+        have = self.gold.get(flat, 0)
+        if have < amount:
+            return False
+        if have == amount:
+            del self.gold[flat]
+        else:
+            self.gold[flat] = have - amount
+        self.gold_index.change(x, y, -amount)
+        if self.changes is not None:
+            self.changes.append((flat, -amount))
+        return True
+
+    def set_gold_flat(self, flat, amounts):
+        self.gold = {f: a for f, a in zip(np.asarray(flat).tolist(), np.asarray(amounts).tolist()) if a > 0}
+        self.gold_index.reset((f % self.width, f // self.width, a) for f, a in self.gold.items())
+
+    def deposit_at(self, x, y):
+        owner = self.deposit.get(y * self.width + x)
+        return self.groups[owner - 1] if owner else None
+
+    def set_deposit(self, x, y, group):
+        self.deposit[y * self.width + x] = self.groups.index(group) + 1
+
+    def is_blocked(self, x, y):
+        return y * self.width + x in self.blocked
+
+    def set_blocked(self, x, y, blocked=True):
+        flat = y * self.width + x
+        if (flat in self.blocked) != blocked:
+            if blocked:
+                self.blocked.add(flat)
+            else:
+                self.blocked.discard(flat)
+            self.wall_count = len(self.blocked)
+            self.version += 1
+
+    # -------------------
+    # Bulk queries
+    # -------------------
+    def blocked_in_flat(self, flat):
+        flat = np.asarray(flat)
+        if not self.blocked:
+            return np.zeros(flat.shape, dtype=bool)
+        return np.isin(flat, np.fromiter(self.blocked, dtype=np.int64, count=len(self.blocked)))
+
+    def blocked_flat(self):
+        blocked = np.zeros(self.width * self.height, dtype=bool)
+        blocked[list(self.blocked)] = True
+        return blocked
+
+    def wall_cells(self):
+        w = self.width
+        return [(f % w, f // w) for f in sorted(self.blocked)]
+
+    def gold_in(self, cells):
+        w = self.width
+        return np.array([self.gold.get(y * w + x, 0) for x, y in cells], dtype=np.int32)
+
+    def gold_in_flat(self, flat):
+        return np.array([self.gold.get(f, 0) for f in np.asarray(flat).tolist()], dtype=np.int32)
+
+    def gold_flat(self):
+        flat = np.array(sorted(self.gold), dtype=np.int64)
+        return flat, np.array([self.gold[f] for f in flat.tolist()], dtype=np.int32)
+
+    def total_gold(self):
+        return self.gold_index.total
+
+    def gold_cells(self):
+        return self.gold_index.cells()
+
+    def deposit_cells(self):
+        w = self.width
+        return [(f % w, f // w, self.groups[o - 1]) for f, o in sorted(self.deposit.items())]
@@ -0,0 +1,143 @@
+# index.py
+"""
+Occupancy / team index owned by the simulation.
+
+Keeps three maps up to date incrementally as robots move and change state:
+- cell -> robots standing on it
+- team -> member robots (in creation order)
+- (team, state) -> member robots in that state
+Robots notify the index from their x/y/state setters, so lookups never have
+to scan the full robots list. Bulk moves (population.Population) only mark
+the cell map stale; it is rebuilt on the next cell lookup.
+"""
+from collections import defaultdict
+
+# Below this many idle candidates a plain scan beats the ring search
+RING_SEARCH_MIN = 64
+
+
+class OccupancyIndex:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._cells = defaultdict(set)    # (x, y) -> {robot, ...}, see `cells`
+        self._cells_stale = False
+        self.teams = defaultdict(list)    # group -> [robot, ...]
+        self.states = defaultdict(set)    # (group, state) -> {robot, ...}
+        self.by_id = {}                   # robot id -> robot
+
+    # -------------------
+    # Incremental updates
+    # -------------------
+    def add(self, robot):
+        self.by_id[robot.id] = robot
+        self.teams[robot.group].append(robot)
+        if not self._cells_stale:
+            self._cells[(robot.x, robot.y)].add(robot)
+        self.states[(robot.group, robot.state)].add(robot)
+
+    def rebuild(self):
+        """Recompute every map from the robots' current fields (after they were overwritten in bulk)."""
+        robots = list(self.by_id.values())
+        self._cells = defaultdict(set)
+        self._cells_stale = False
+        self.teams = defaultdict(list)
+        self.states = defaultdict(set)
+        self.by_id = {}
+        for r in robots:
+            self.add(r)
+
+    def moved(self, robot, old, new):
+        """Robot moved from cell `old` to cell `new`."""
+        if self._cells_stale:
+            return
+        occupants = self._cells[old]
+        occupants.discard(robot)
+        if not occupants:
+            del self._cells[old]
+        self._cells[new].add(robot)
+
+    def invalidate_cells(self):
+        """Positions changed in bulk; rebuild the cell map on next use."""
+        self._cells_stale = True
+
+    @property
+    def cells(self):
+        """(x, y) -> set of robots standing there."""
+        if self._cells_stale:
+            cells = defaultdict(set)
+            for r in self.by_id.values():
+                cells[(r.x, r.y)].add(r)
+            self._cells = cells
+            self._cells_stale = False
+        return self._cells
+
+    def state_changed(self, robot, old, new):
+        """Robot switched from state `old` to state `new`."""
+        self.states[(robot.group, old)].discard(robot)
+        self.states[(robot.group, new)].add(robot)
+
+    # -------------------
+    # Queries
+    # -------------------
+    def robot(self, robot_id):
+        return self.by_id.get(robot_id)
+
+    def at(self, x, y):
+        """Robots standing on (x, y)."""
+        return self.cells.get((x, y), ())
+
+    def team(self, group):
+        """All members of `group`, in creation order."""
+        return self.teams.get(group, ())
+
+    def in_state(self, group, state):
+        """Members of `group` currently in `state`."""
+        return self.states.get((group, state), ())
+
+    def nearest_idle_teammate(self, robot):
+        """
+        Idle teammate closest to `robot` by Robot.distance (ties go to the lowest id),
+        or None. Small candidate sets are scanned directly; large ones are searched
+        ring by ring outward from the robot's cell.
+        """
+        candidates = self.in_state(robot.group, "idle")
+        if len(candidates) <= RING_SEARCH_MIN:
+            best = None
+            for r in candidates:
+                if r is not robot:
+                    key = (robot.distance(r.x, r.y), r.id)
+                    if best is None or key < best[0]:
+                        best = (key, r)
+            return best[1] if best else None
+        return self._ring_search(robot)
+
+    def _ring_search(self, robot):
+        # Robot.distance >= Manhattan distance, so once the ring radius exceeds the
+        # best distance found no further ring can improve on it.
+        best = None
+        cells = self.cells
+        max_radius = self.width + self.height
+        d = 0
+        while d <= max_radius and (best is None or d <= best[0][0]):
+            for cell in _ring(robot.x, robot.y, d):
+                for r in cells.get(cell, ()):
+                    if r is robot or r.group != robot.group or r.state != "idle":
+                        continue
+                    key = (robot.distance(r.x, r.y), r.id)
+                    if best is None or key < best[0]:
+                        best = (key, r)
+            d += 1
+        return best[1] if best else None
+
+
+def _ring(cx, cy, d):
+    """Cells at exactly Manhattan distance d from (cx, cy)."""
+    if d == 0:
+        yield (cx, cy)
+        return
+    for i in range(d):
+        yield (cx + d - i, cy + i)
+        yield (cx - i, cy + d - i)
+        yield (cx - d + i, cy - i)
+        yield (cx + i, cy - d + i)
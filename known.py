@@ -0,0 +1,77 @@
+# known.py
+"""
+Compact exploration memory.
+
+KnownCells is a NumPy bool bitmap ([y, x]) of cells a team has seen, with a
+running count. It replaces the per-robot set of (x, y) tuples: one bitmap is
+shared by all members of a team, and messages carry newly seen cells as flat
+index arrays (y * width + x).
+"""
+import numpy as np
+
+
+class KnownCells:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.bits = np.zeros((height, width), dtype=bool)
+        self.count = 0
+
+    # -------------------
+    # Conversions
+    # -------------------
+    def flat(self, cells):
+        """Flat indices for a sequence of (x, y) cells."""
+        if len(cells) == 0:
+            return np.zeros(0, dtype=np.intp)
+        xy = np.asarray(cells, dtype=np.intp)
+        return xy[:, 1] * self.width + xy[:, 0]
+
+    def cells(self, flat):
+        """(x, y) tuples for an array of flat indices."""
+        ys, xs = np.divmod(np.asarray(flat), self.width)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    # -------------------
+    # Updates
+    # -------------------
+    def mark(self, cells):
+        """Mark (x, y) cells as known. Returns the flat indices that were new."""
+        return self.mark_flat(self.flat(cells))
+
+    def mark_flat(self, flat):
+        """Mark flat indices as known. Returns the ones that were new."""
+        flat = np.unique(flat)
+        bits = self.bits.reshape(-1)
+        new = flat[~bits[flat]]
+        bits[new] = True
+        self.count += len(new)
+        return new
+
+    def merge(self, other):
+        """Union another KnownCells into this one. Returns the flat indices that were new."""
+        new = np.flatnonzero(other.bits & ~self.bits)
+        self.bits |= other.bits
+        self.count += len(new)
+        return new
+
+    # -------------------
+    # Queries
+    # -------------------
+    def __contains__(self, cell):
+        x, y = cell
+        return bool(self.bits[y, x])
+
+    def __len__(self):
+        return self.count
+
+    def count_unknown(self):
+        return self.width * self.height - self.count
+
+    def nearest_unknown(self, x, y):
+        """Closest unknown cell to (x, y) by Manhattan distance, or None if everything is known."""
+        if self.count == self.width * self.height:
+            return None
+        ys, xs = np.nonzero(~self.bits)
+        i = int(np.argmin(np.abs(xs - x) + np.abs(ys - y)))
+        return (int(xs[i]), int(ys[i]))
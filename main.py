@@ -1,65 +1,122 @@
 # main.py
+import argparse
+import os
 import time
-from map import Map
-from bot import Robot
+from config import PAIRING_POLICIES, make_config
+from export import FORMATS, FrameExporter
+from metrics import Metrics
+from parallel import TeamProcessSimulation
+from render import RENDERERS, make_renderer
+from simulation import Simulation
+from stop import AllGoldDeposited, ScoreReached, TimeBudget
+from trace import LEVELS, Tracer
  
-def main():
-    world = Map()
-    robots = []
-
-    # Create robots
-    for i in range(10):
-        
-        robots.append(Robot(i, "group1", 0, 0,"N"))
-        robots.append(Robot(i+10, "group2", 19, 19,"S"))
-
-    group_status = update_group_status(robots)
-    # print(group_status)
-    
-    for r in robots:
-        r.group_status = group_status[r.group]
-    print("group status updated")
-
-
-    for step in range(1000):
-        print(f"\n=== Step {step} ===")
-
-        # --- Phase 1: Start ---
-        for r in robots:
-            r.start_phase(world, robots)
-        print("start phase complete")
-        # --- Phase 2: Decision ---
-        for r in robots:
-            r.decision_phase(world, robots)
-        print("decision phase complete")
-        # --- Phase 3: Action ---
-        for r in robots:
-            r.action_phase(world, robots)
-        print("action phase complete")
-        
-        # --- Display ---
-        world.display(robots, step)
-        # time.sleep(0.02)
-
-def update_group_status(robots):
+def main(renderer="matplotlib", render_every=1, config=None, seed=None, tracer=None, record=None,
+         export=None, export_options=None, metrics=None, team_processes=False, stop=None,
+         fast_forward=False):
     """
-    Updates the status of all robots in each group and returns a dictionary
-    with group names as keys and their robots' statuses as values.
+    Run one episode.
+    - renderer: backend name from render.RENDERERS ("none" for headless runs)
+    - render_every: draw a frame every N steps (0 never draws)
+    - config: SimConfig; its max_steps is the number of simulation steps
+    - seed: RNG seed for a reproducible run (None: unseeded)
+    - tracer: trace.Tracer for step events (None: tracing off)
+    - record: replay directory to record the run to (see replay.py)
+    - export: frame directory (png) or video file (mp4) rendered in background workers
+    - export_options: keyword arguments for export.FrameExporter (fmt, every, workers, ...)
+    - metrics: metrics.Metrics timing phases and display (None: off)
+    - team_processes: run every team in its own process (parallel.py; no tracer or metrics)
+    - stop: stop conditions (see stop.py) ending the episode before max_steps
+    - fast_forward: run deterministic stretches through Simulation.skip (not with team_processes)
     """
-    group_status = {}
-    for r in robots:
-        if r.group not in group_status:
-            group_status[r.group] = {}
-        group_status[r.group][r.id] ={
-            "x": r.x,
-            "y": r.y,
-            "facing": r.facing,
-            "state": r.state,
-            "partner_id": r.partner_id,
-            "gold_target": r.gold_target,
-            "carrying": r.carrying
-        }
-    return group_status
+    backend = make_renderer(renderer) if render_every and renderer != "none" else None
+    if team_processes:
+        sim = TeamProcessSimulation(config, backend, seed=seed)
+    else:
+        sim = Simulation(config, backend, seed=seed, tracer=tracer, metrics=metrics)
+    if record:
+        sim.record_to(record)
+    exporter = None
+    try:
+        exporter = FrameExporter(sim, export, **(export_options or {})) if export else None
+
+        def after_step(sim):
+            step = sim.step_count - 1
+            if render_every and step % render_every == 0:
+                sim.display(step)
+            if exporter is not None:
+                exporter.submit()
+
+        sim.run(stop=stop or (), fast_forward=fast_forward, on_step=after_step)
+    finally:
+        try:
+            if exporter is not None:
+                exporter.close()
+        finally:
+            sim.close()
+    return sim
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run one gold-collecting episode.")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="matplotlib",
+                        help="rendering backend ('none' for headless)")
+    parser.add_argument("--render-every", type=int, default=1,
+                        help="draw a frame every N steps (0 disables rendering)")
+    parser.add_argument("--steps", type=int, default=1000, help="number of simulation steps")
+    parser.add_argument("--size", type=int, default=20, help="grid width and height")
+    parser.add_argument("--gold", type=int, default=30, help="gold bars on the map")
+    parser.add_argument("--wall-density", type=float, default=0.0, help="share of cells turned into random walls")
+    parser.add_argument("--robots", type=int, default=10, help="robots per team")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed")
+    parser.add_argument("--pairing", choices=PAIRING_POLICIES, default="team",
+                        help="team: central per-team assignment, robot: each idle robot searches itself")
+    parser.add_argument("--team-processes", action="store_true",
+                        help="run each team in its own process over shared memory")
+    parser.add_argument("--until-done", action="store_true", help="stop once all gold has been deposited")
+    parser.add_argument("--score", type=int, default=None, help="stop once a team reaches this score")
+    parser.add_argument("--time-budget", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--fast-forward", action="store_true",
+                        help="skip through stretches where robots only walk (same results, fewer full steps)")
+    parser.add_argument("--trace", choices=sorted(LEVELS), default="off", help="event trace level")
+    parser.add_argument("--trace-file", default=None, help="also write trace events to this JSONL file")
+    parser.add_argument("--record", default=None, help="record a replay to this directory")
+    parser.add_argument("--export", default=None, help="export frames to this directory (png) or file (mp4)")
+    parser.add_argument("--export-format", choices=FORMATS, default="png")
+    parser.add_argument("--export-every", type=int, default=1, help="export every Nth step")
+    parser.add_argument("--export-workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="rendering processes for png export")
+    parser.add_argument("--metrics-json", default=None, help="write phase timings and counters to this JSON file")
+    parser.add_argument("--metrics-prom", default=None, help="write metrics in Prometheus text format to this file")
+    parser.add_argument("--profile-steps", default=None, metavar="START:STOP",
+                        help="run each phase under cProfile for this step range")
+    parser.add_argument("--profile-out", default="profile", help="prefix of the per-phase .prof files")
+    args = parser.parse_args()
+    if args.team_processes and (args.trace != "off" or args.metrics_json or args.metrics_prom or args.profile_steps):
+        parser.error("--team-processes does not support tracing or metrics")
+    if args.team_processes and args.fast_forward:
+        parser.error("--team-processes does not support --fast-forward")
+    config = make_config(args.size, gold=args.gold, robots_per_team=args.robots, max_steps=args.steps,
+                         pairing=args.pairing, wall_density=args.wall_density)
+    stop = []
+    if args.until_done:
+        stop.append(AllGoldDeposited())
+    if args.score is not None:
+        stop.append(ScoreReached(args.score))
+    if args.time_budget is not None:
+        stop.append(TimeBudget(args.time_budget))
+    tracer = Tracer(args.trace, path=args.trace_file)
+    metrics = None
+    if args.metrics_json or args.metrics_prom or args.profile_steps:
+        profile_steps = tuple(int(v) for v in args.profile_steps.split(":")) if args.profile_steps else None
+        metrics = Metrics(profile_steps=profile_steps, profile_path=args.profile_out)
+    try:
+        main(args.renderer, args.render_every, config, args.seed, tracer, args.record, args.export,
+             {"fmt": args.export_format, "every": args.export_every, "workers": args.export_workers},
+             metrics, args.team_processes, stop, args.fast_forward)
+    finally:
+        tracer.close()
+        if metrics is not None:
+            if args.metrics_json:
+                metrics.write_json(args.metrics_json)
+            if args.metrics_prom:
+                metrics.write_prometheus(args.metrics_prom)
@@ -1,117 +1,157 @@
 # map.py
-import random
-import matplotlib.pyplot as plt
-import matplotlib.patheffects as patheffects
-
-GRID_SIZE = 20
-GOLD = 30
+import numpy as np
+from config import SimConfig
+from fields import UNREACHABLE, DistanceField
+from grid import Grid, SparseGrid
+from render import NullRenderer
 
 class Map:
-    def __init__(self):
-        # Initialize empty grid
-        self.grid = [[{"gold": 0, "deposit": None} for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    def __init__(self, config=None, renderer=None, rng=None):
+        """
+        - config: SimConfig (size, teams, gold, walls)
+        - renderer: backend used by display (headless when None)
+        - rng: numpy Generator for wall and gold placement (fresh, unseeded when None)
+        """
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.config = config if config is not None else SimConfig()
+        self.width = self.config.width
+        self.height = self.config.height
+        groups = self.config.groups
+
+        # Initialize empty grid (typed arrays, or dicts for huge sparse maps; see grid.py)
+        grid_cls = SparseGrid if self.config.use_sparse() else Grid
+        self.grid = grid_cls(self.width, self.height, groups)
         
         # Place deposit points
-        self.deposit_points = [(0, 0), (GRID_SIZE - 1, GRID_SIZE - 1)]
-        self.grid[0][0]["deposit"] = "group1"
-        self.grid[GRID_SIZE - 1][GRID_SIZE - 1]["deposit"] = "group2"
+        self.deposit_points = [team.deposit for team in self.config.teams]
+        for team in self.config.teams:
+            self.grid.set_deposit(*team.deposit, team.name)
+
+        # Walls: the configured cells plus random ones (never on deposits or start cells)
+        for x, y in self.config.walls:
+            self.grid.set_blocked(x, y)
+        if self.config.wall_density > 0:
+            self.place_random_walls()
+        # Cells some deposit can reach (None: all of them); gold is never placed elsewhere
+        self.reachable = self.reachable_cells()
         
         # Place random gold bars
-        for _ in range(GOLD):  
-            x, y = random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1)
-            if self.grid[y][x]["deposit"] is None:
-                self.grid[y][x]["gold"] += 1
+        if self.config.gold_distribution == "clustered":
+            self.place_clustered_gold()
+        else:
+            xs = self.rng.integers(0, self.width, self.config.gold).tolist()
+            ys = self.rng.integers(0, self.height, self.config.gold).tolist()
+            for x, y in zip(xs, ys):
+                if self.can_hold_gold(x, y):
+                    self.grid.add_gold(x, y)
                 
 
 
+        # Gold cells bucketed by tile, with the running total (kept up to date by the grid)
+        self.gold_index = self.grid.gold_index
+
         # Score tracker
-        self.scores = {"group1": 0, "group2": 0}
+        self.scores = {group: 0 for group in groups}
         
-        # Set up matplotlib
-        self.fig, self.ax = plt.subplots(figsize=(6, 6))
-        plt.ion()  # interactive mode ON
-        plt.show()
+        # Rendering backend (headless unless one is given, see render.py)
+        self.renderer = renderer if renderer is not None else NullRenderer()
+        # Occupancy index of the owning Simulation (cell -> robots), if any
+        self.occupancy = None
+        # robot id -> flat cell of the robot's pickup this step, while pickups are
+        # claimed and resolved after the action phase (see parallel.py); None: take at once
+        self.pickup_claims = None
+
+    def take_gold(self, robot, x, y):
+        """Pick up one gold bar on (x, y) for `robot`. Returns False if there is none."""
+        if self.pickup_claims is None:
+            return self.grid.take_gold(x, y)
+        self.pickup_claims[robot.id] = y * self.width + x
+        return True
+
+    def gold_remaining(self):
+        """Gold bars still on the map (O(1), see spatial.GoldIndex)."""
+        return self.gold_index.total
+
+    def nearest_gold(self, x, y):
+        """Gold cell closest to (x, y) by Manhattan distance, or None."""
+        return self.gold_index.nearest(x, y)
+
+    def gold_within(self, x, y, radius):
+        """(x, y, amount) for every gold cell within Manhattan distance `radius` of (x, y)."""
+        return self.gold_index.within(x, y, radius)
+
+    def gold_in_rect(self, x0, y0, x1, y1):
+        """(x, y, amount) for every gold cell in the rectangle (bounds included)."""
+        return self.gold_index.in_rect(x0, y0, x1, y1)
+
+    def place_clustered_gold(self):
+        """Scatter gold around a few random centers (gaussian, clipped to the grid)."""
+        cfg = self.config
+        n = max(1, cfg.gold_clusters)
+        centers = np.column_stack([self.rng.integers(0, self.width, n), self.rng.integers(0, self.height, n)])
+        offsets = self.rng.normal(0.0, cfg.gold_spread, (cfg.gold, 2))
+        xy = np.rint(centers[np.arange(cfg.gold) % n] + offsets).astype(np.int64)
+        xs = np.clip(xy[:, 0], 0, self.width - 1).tolist()
+        ys = np.clip(xy[:, 1], 0, self.height - 1).tolist()
+        for x, y in zip(xs, ys):
+            if self.can_hold_gold(x, y):
+                self.grid.add_gold(x, y)
+
+    def reachable_cells(self):
+        """
+        Bool array over flat cells, True where a path to some deposit exists;
+        None when every cell qualifies (no walls) or the grid is sparse (the
+        check would cost an array the size of the map).
+        """
+        if not self.grid.wall_count or self.config.use_sparse():
+            return None
+        blocked = self.grid.blocked_flat()
+        reachable = np.zeros(self.width * self.height, dtype=bool)
+        for x, y in self.deposit_points:
+            reachable |= DistanceField(self.width, self.height, [y * self.width + x], blocked).dist != UNREACHABLE
+        return reachable
+
+    def can_hold_gold(self, x, y):
+        """Gold may be placed on (x, y): no deposit, no wall, and reachable from a deposit."""
+        if self.grid.deposit_at(x, y) is not None or self.grid.is_blocked(x, y):
+            return False
+        return self.reachable is None or bool(self.reachable[y * self.width + x])
+
+    def place_random_walls(self):
+        """Turn about wall_density of the free cells into walls, uniformly at random."""
+        reserved = {c for t in self.config.teams for c in (t.deposit, t.start)}
+        count = int(self.config.wall_density * (self.width * self.height - len(reserved)))
+        xs = self.rng.integers(0, self.width, count).tolist()
+        ys = self.rng.integers(0, self.height, count).tolist()
+        for x, y in zip(xs, ys):
+            if (x, y) not in reserved:
+                self.grid.set_blocked(x, y)
+        if not self.config.use_sparse():
+            self.connect_reserved(reserved)
+
+    def connect_reserved(self, reserved):
+        """
+        Clear random walls so every deposit and start cell reaches the first
+        deposit: a walled-in cell gets an L-shaped corridor (x first, then y)
+        towards it. Configured walls are left alone.
+        """
+        fixed = set(self.config.walls)
+        hx, hy = self.deposit_points[0]
+        field = None
+        for x, y in sorted(reserved):
+            if field is None:
+                field = DistanceField(self.width, self.height, [hy * self.width + hx], self.grid.blocked_flat())
+            if field.at(x, y) != UNREACHABLE:
+                continue
+            step_x = 1 if hx > x else -1
+            step_y = 1 if hy > y else -1
+            corridor = [(cx, y) for cx in range(x, hx + step_x, step_x)]
+            corridor += [(hx, cy) for cy in range(y, hy + step_y, step_y)]
+            for cx, cy in corridor:
+                if (cx, cy) not in fixed and self.grid.is_blocked(cx, cy):
+                    self.grid.set_blocked(cx, cy, False)
+            field = None   # walls changed
 
     def display(self, robots, step =0):
-        """Visualize map with matplotlib."""
-        self.ax.clear()
-        self.ax.set_xlim(-0.5, GRID_SIZE - 0.5)
-        self.ax.set_ylim(-0.5, GRID_SIZE - 0.5)
-        self.ax.set_xticks(range(GRID_SIZE))
-        self.ax.set_yticks(range(GRID_SIZE))
-        self.ax.grid(True)
-
-        # Draw deposits
-        for (x, y), group in zip(self.deposit_points, ["group1", "group2"]):
-            color = "blue" if group == "group1" else "red"
-            self.ax.scatter(x, y, c=color, marker="s", s=200, label=f"{group} deposit")
-
-        # Draw gold
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                gold_amt = self.grid[y][x]["gold"]
-                if gold_amt > 0:
-                    self.ax.scatter(x, y, c="gold", marker="o", s=100)
-                    # draw number of golds
-                    self.ax.text(x, y, str(gold_amt), color="black", fontsize=8, ha="center", va="center")
-        
-        # Prepare grouping of robots by position so IDs can be stacked when overlapping
-        from collections import defaultdict as _dd
-        positions = _dd(list)
-        
-        # Draw robots
-        for r in robots:
-            color = "blue" if r.group == "group1" else "red"
-            vision_color = "lightgreen" if r.group == "group1" else "darkseagreen"
-
-            # Vision overlay (semi-transparent)
-            for (vx, vy) in r.sense():
-                self.ax.add_patch(plt.Rectangle((vx - 0.5, vy - 0.5), 1, 1,
-                                                facecolor=vision_color, alpha=0.2))
-
-            # Robot body
-            self.ax.scatter(r.x, r.y, c=color, s=80, edgecolors="black")
-            
-            # Draw facing direction as arrow
-            dx, dy = 0, 0
-            if r.facing == "N": dy = 0.3
-            elif r.facing == "S": dy = -0.3
-            elif r.facing == "E": dx = 0.3
-            elif r.facing == "W": dx = -0.3
-            self.ax.arrow(r.x, r.y, dx, dy, head_width=0.2, head_length=0.2, fc=color, ec=color)
-
-             # 🟡 Mark carrying gold
-            if r.carrying:
-                self.ax.scatter(r.x, r.y, c="gold", marker="o", s=200, alpha=0.6, edgecolors="black")
-            
-            positions[(r.x, r.y)].append(r)
-
-            # Draw stacked IDs for positions that contain one or more robots
-        for (px, py), robots_at in positions.items():
-            # start slightly above the robot marker; stack upward
-            base_offset = 0.25
-            gap = 0.5
-            # If many robots, reduce font size to fit
-            fontsize = 8 if len(robots_at) <= 4 else max(6, 8 - (len(robots_at) - 4))
-            for idx, r in enumerate(sorted(robots_at, key=lambda rr: rr.id)):
-                offset_y = base_offset + idx * gap
-                try:
-                    self.ax.text(
-                        px,
-                        py + offset_y,
-                        str(r.id),
-                        color="white",
-                        fontsize=fontsize,
-                        ha="center",
-                        va="bottom",
-                        weight="bold",
-                        path_effects=[patheffects.Stroke(linewidth=1.5, foreground='black'), patheffects.Normal()]
-                    )
-                except Exception:
-                    # Fallback: plain text
-                    self.ax.text(px, py + offset_y, str(r.id), color="black", fontsize=fontsize, ha="center", va="bottom")
-
-        # Title → Step counter + scores
-        self.ax.set_title(f"Step {step} | Scores → Group1: {self.scores['group1']} | Group2: {self.scores['group2']}")
-
-        plt.pause(0.05)  # update frame
\ No newline at end of file
+        """Render the map through the configured renderer backend."""
+        self.renderer.draw(self, robots, step)
@@ -0,0 +1,184 @@
+# metrics.py
+"""
+Step-loop instrumentation.
+
+Metrics collects, per step and in total:
+- timers: seconds spent in each phase ("start", "decision", "action"), in
+  Map.display ("display") and in Robot.broadcast_to_team ("broadcast")
+- counters: messages broadcast / delivered, bytes delivered (from the bus),
+  sync_with_group_status calls, pickups, deposits
+- observations (count / sum / max): inbox size per process_inbox call
+
+snapshot() returns everything as a dict, write_json() / write_prometheus()
+export it (the latter in the Prometheus text exposition format, for a
+node_exporter textfile collector). An optional cProfile hook profiles each
+phase separately over a step range and writes one .prof file per phase.
+
+Disabled metrics (NULL_METRICS, the default) cost one attribute check at each
+instrumented call site.
+
+    metrics = Metrics(profile_steps=(100, 110), profile_path="prof/run")
+    sim = Simulation(config, metrics=metrics)
+    sim.run(500)
+    metrics.write_prometheus("sim.prom")
+"""
+import cProfile
+import json
+import os
+import time
+from collections import defaultdict, deque
+
+PROMETHEUS_PREFIX = "robots_sim"
+
+
+class Metrics:
+    def __init__(self, enabled=True, history=1000, profile_steps=None, profile_path=None):
+        """
+        - history: number of per-step records kept (oldest dropped first)
+        - profile_steps: (start, stop) step range to run each phase under cProfile
+        - profile_path: prefix of the .prof files written when that range ends
+          ("<prefix>.<phase>.prof"); stats stay in `profiles` when None
+        """
+        self.enabled = enabled
+        self.steps = 0
+        self.timers = defaultdict(float)      # name -> seconds, whole run
+        self.counters = defaultdict(int)      # name -> count, whole run
+        self.observations = {}                # name -> [count, sum, max], whole run
+        self.history = deque(maxlen=history)  # one {"step", "timers", "counters"} per step
+        self._step_timers = defaultdict(float)
+        self._step_counters = defaultdict(int)
+
+        self.profile_steps = profile_steps
+        self.profile_path = profile_path
+        self.profiles = {}                    # phase -> cProfile.Profile
+        self._profiling = False
+
+    # -------------------
+    # Recording
+    # -------------------
+    def add_time(self, name, seconds):
+        self.timers[name] += seconds
+        self._step_timers[name] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+        self._step_counters[name] += n
+
+    def observe(self, name, value):
+        obs = self.observations.get(name)
+        if obs is None:
+            self.observations[name] = [1, value, value]
+        else:
+            obs[0] += 1
+            obs[1] += value
+            if value > obs[2]:
+                obs[2] = value
+
+    def timed(self, name, fn, *args):
+        """Call fn(*args) under the `name` timer (and its profiler while profiling)."""
+        profiler = None
+        if self._profiling:
+            profiler = self.profiles.get(name)
+            if profiler is None:
+                profiler = self.profiles[name] = cProfile.Profile()
+        t0 = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.add_time(name, time.perf_counter() - t0)
+
+    def begin_step(self, step):
+        """Switch the profiler on or off for `step`."""
+        if self.profile_steps is None:
+            return
+        start, stop = self.profile_steps
+        profiling = start <= step < stop
+        if self._profiling and not profiling:
+            self._dump_profiles()
+        self._profiling = profiling
+
+    def end_step(self, step, bus_stats=None):
+        """Close `step`: fold in the bus counters and store the per-step record."""
+        if bus_stats:
+            self.count("messages_broadcast", bus_stats["messages_sent"])
+            self.count("messages_delivered", bus_stats["messages_delivered"])
+            self.count("bytes_delivered", bus_stats["bytes_delivered"])
+        self.steps += 1
+        self.history.append({"step": step, "timers": dict(self._step_timers),
+                             "counters": dict(self._step_counters)})
+        self._step_timers = defaultdict(float)
+        self._step_counters = defaultdict(int)
+
+    def close(self):
+        """Write pending profiles if the profiled range was still open."""
+        if self._profiling:
+            self._dump_profiles()
+            self._profiling = False
+
+    def _dump_profiles(self):
+        if self.profile_path is None:
+            return
+        directory = os.path.dirname(self.profile_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for phase, profiler in self.profiles.items():
+            profiler.dump_stats(f"{self.profile_path}.{phase}.prof")
+
+    # -------------------
+    # Export
+    # -------------------
+    def snapshot(self):
+        """Totals, per-step means and the last step's record, as plain data."""
+        steps = max(self.steps, 1)
+        return {
+            "steps": self.steps,
+            "timers": dict(self.timers),
+            "timers_per_step": {k: v / steps for k, v in self.timers.items()},
+            "counters": dict(self.counters),
+            "observations": {k: {"count": c, "sum": s, "max": m, "mean": s / c}
+                             for k, (c, s, m) in self.observations.items()},
+            "last_step": self.history[-1] if self.history else None,
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def prometheus_text(self):
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_steps_total Simulation steps run.",
+            f"# TYPE {p}_steps_total counter",
+            f"{p}_steps_total {self.steps}",
+            f"# HELP {p}_seconds_total Time spent per instrumented section.",
+            f"# TYPE {p}_seconds_total counter",
+        ]
+        lines += [f'{p}_seconds_total{{section="{k}"}} {v:.9f}' for k, v in sorted(self.timers.items())]
+        lines += [
+            f"# HELP {p}_events_total Events counted by the step loop.",
+            f"# TYPE {p}_events_total counter",
+        ]
+        lines += [f'{p}_events_total{{event="{k}"}} {v}' for k, v in sorted(self.counters.items())]
+        for name, (c, s, m) in sorted(self.observations.items()):
+            lines += [
+                f"# TYPE {p}_{name} summary",
+                f"{p}_{name}_count {c}",
+                f"{p}_{name}_sum {s}",
+                f"# TYPE {p}_{name}_max gauge",
+                f"{p}_{name}_max {m}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Write then rename so a scraping collector never reads a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+NULL_METRICS = Metrics(enabled=False)
@@ -0,0 +1,347 @@
+# parallel.py
+"""
+Process-per-team simulation.
+
+Within a step, teams only share the gold grid and the scores. Everything
+else (robots, message bus, known cells, fields, assigners) is per team. So
+TeamProcessSimulation runs every team in its own worker process, each with
+a Simulation restricted to that team (Simulation(groups=[team])), and keeps
+the shared state in one multiprocessing.shared_memory block:
+- gold: the Grid's gold array (the parent's Map reads and updates it in place)
+- x, y, facing, state, carrying: every robot's Population fields, by robot id
+- scores: one counter per team, written only by its own worker
+- claims / won: pickups posted by the workers and the parent's verdicts
+
+Pickups are claims. During the action phase Map.take_gold only records the
+cell, so no team sees another team's pickups before the phase ends. The
+parent then grants claims in robot-id order while gold lasts, and a robot
+whose claim lost goes back to idle (Robot.lose_pickup). The outcome depends
+only on the seed, not on process scheduling.
+
+A step is four waits on a barrier shared by the parent and the workers:
+  begin | start, decision, action phases (workers, phase barrier in between)
+  claims posted | parent resolves | verdicts out | losers rolled back and
+  gold indexes updated, step done (the parent then clears the claims)
+Between steps the parent can render, record or export from the shared
+arrays as with a Simulation.
+
+Needs the dense Grid (the gold array must live in shared memory). Tracing
+and metrics are per-process and not available in this mode.
+
+    sim = TeamProcessSimulation(make_config(200, robots_per_team=500), seed=1)
+    sim.run()
+    print(sim.results())
+    sim.close()
+"""
+import multiprocessing as mp
+import multiprocessing.connection
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bot import Robot
+from config import SimConfig
+from map import Map
+from population import Population
+from simulation import Simulation
+from stop import check
+from streams import RandomStreams
+
+# Robot fields kept in shared memory (population.Population attribute names)
+ROBOT_FIELDS = (("x", np.int32), ("y", np.int32), ("facing", np.int8),
+                ("state", np.int8), ("carrying", np.bool_))
+
+
+class SharedArrays:
+    """Named NumPy arrays laid out in one shared-memory block."""
+
+    def __init__(self, layout, name=None):
+        """
+        - layout: [(name, shape, dtype), ...]
+        - name: block to attach to (a new block is created when None)
+        """
+        self.layout = [(key, tuple(shape), np.dtype(dtype).str) for key, shape, dtype in layout]
+        offsets, size = [], 0
+        for _, shape, dtype in self.layout:
+            dtype = np.dtype(dtype)
+            size = -(-size // dtype.alignment) * dtype.alignment
+            offsets.append(size)
+            size += int(np.prod(shape)) * dtype.itemsize
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=max(size, 1))
+        self.arrays = {key: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+                       for (key, shape, dtype), offset in zip(self.layout, offsets)}
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def spec(self):
+        """Picklable (layout, name) to attach to the block from another process."""
+        return self.layout, self.shm.name
+
+    def close(self):
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedScores:
+    """Map.scores stand-in backed by a shared counter per team."""
+
+    def __init__(self, groups, counts):
+        self.groups = list(groups)
+        self.counts = counts
+
+    def __getitem__(self, group):
+        return int(self.counts[self.groups.index(group)])
+
+    def __setitem__(self, group, value):
+        self.counts[self.groups.index(group)] = value
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def keys(self):
+        return list(self.groups)
+
+    def items(self):
+        return [(g, self[g]) for g in self.groups]
+
+    def values(self):
+        return [self[g] for g in self.groups]
+
+
+def _team_ranges(config):
+    """group -> (first robot id, team size); ids are numbered team by team as in Simulation."""
+    ranges, first = {}, 0
+    for team in config.teams:
+        ranges[team.name] = (first, team.size)
+        first += team.size
+    return ranges
+
+
+class TeamProcessSimulation:
+    """
+    Simulation-compatible driver (step, run, results, display, record_to,
+    close) that runs each team in its own process. See the module docstring.
+    """
+
+    def __init__(self, config=None, renderer=None, seed=None):
+        """
+        - config: SimConfig; must use the dense grid
+        - renderer: backend drawing the parent's view of the world (headless when None)
+        - seed: seed of the run's random streams; every worker derives the same map
+          and robot streams from it
+        """
+        self.config = config if config is not None else SimConfig()
+        if self.config.use_sparse():
+            raise ValueError("team processes need the dense grid: the gold array lives in shared memory")
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        self.world = Map(self.config, renderer, self.streams.map())
+        self.step_count = 0
+        self.last_pickup_step = None
+        self.recorder = None
+
+        groups = self.config.groups
+        ranges = _team_ranges(self.config)
+        n = sum(size for _, size in ranges.values())
+        grid = self.world.grid
+        self.shared = SharedArrays(
+            [("gold", grid.gold.shape, grid.gold.dtype)]
+            + [(name, (n,), dtype) for name, dtype in ROBOT_FIELDS]
+            + [("scores", (len(groups),), np.int64), ("claims", (n,), np.int64),
+               ("won", (n,), np.bool_), ("stop", (1,), np.int8)])
+        self.shared["gold"][:] = grid.gold
+        grid.gold = self.shared["gold"]
+        self.shared["scores"][:] = 0
+        self.world.scores = SharedScores(groups, self.shared["scores"])
+        self.shared["claims"][:] = -1
+        self.shared["won"][:] = False
+        self.shared["stop"][0] = 0
+
+        # Parent-side robot views in id order, reading the shared fields
+        self.population = Population(self.world.width, self.world.height, capacity=max(n, 1),
+                                     streams=self.streams)
+        self.robots = []
+        for team in self.config.teams:
+            first, size = ranges[team.name]
+            for i in range(size):
+                robot = Robot(first + i, team.name, *team.start, team.facing, self.config)
+                self.population.adopt(robot)
+                self.robots.append(robot)
+        self.population.bind(**{name: self.shared[name] for name, _ in ROBOT_FIELDS})
+
+        ctx = mp.get_context("spawn")
+        self.barrier = ctx.Barrier(len(groups) + 1)
+        self.phase_barrier = ctx.Barrier(len(groups))
+        self.workers = [
+            ctx.Process(target=_team_worker, daemon=True,
+                        args=(self.config.to_dict(), self.seed, group, self.shared.spec(),
+                              self.barrier, self.phase_barrier))
+            for group in groups
+        ]
+        for w in self.workers:
+            w.start()
+        self._stopping = False
+        # A worker that dies outside its own error handling would leave everyone
+        # waiting; break the barriers as soon as any worker exits early
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def _watch(self):
+        mp.connection.wait([w.sentinel for w in self.workers])
+        if not self._stopping:
+            self.barrier.abort()
+            self.phase_barrier.abort()
+
+    def _wait(self):
+        try:
+            self.barrier.wait()
+        except threading.BrokenBarrierError:
+            raise RuntimeError("a team worker failed (see its traceback above)") from None
+
+    def step(self):
+        """Run one start/decision/action cycle in every team process."""
+        self._wait()            # begin
+        self._wait()            # claims posted
+        if self._resolve_pickups():
+            self.last_pickup_step = self.step_count
+        self._wait()            # verdicts out
+        self._wait()            # losers rolled back, gold indexes updated
+        self.shared["claims"][:] = -1
+        self.shared["won"][:] = False
+        self.step_count += 1
+        if self.recorder is not None:
+            self.recorder.record()
+
+    def _resolve_pickups(self):
+        """Grant this step's claims in robot-id order while gold lasts. Returns True if any was granted."""
+        claims, won = self.shared["claims"], self.shared["won"]
+        grid = self.world.grid
+        width = self.world.width
+        granted = False
+        for rid in np.flatnonzero(claims >= 0).tolist():
+            y, x = divmod(int(claims[rid]), width)
+            won[rid] = grid.take_gold(x, y)
+            granted |= bool(won[rid])
+        return granted
+
+    def run(self, steps=None, stop=(), fast_forward=False, on_step=None):
+        """
+        Run up to `steps` steps (default: the config's max_steps) and return why
+        the run ended, as Simulation.run. Fast-forward needs every robot in one
+        process and raises ValueError here.
+        """
+        if fast_forward:
+            raise ValueError("fast_forward is not supported with team processes")
+        conditions = list(stop)
+        for _ in range(self.config.max_steps if steps is None else steps):
+            reason = check(conditions, self)
+            if reason is not None:
+                return reason
+            self.step()
+            if on_step is not None:
+                on_step(self)
+        return check(conditions, self) or "steps"
+
+    def results(self):
+        """Summary of the episode so far."""
+        return {
+            "steps": self.step_count,
+            "scores": dict(self.world.scores.items()),
+            "last_pickup_step": self.last_pickup_step,
+            "gold_remaining": self.world.grid.total_gold(),
+        }
+
+    def display(self, step=None):
+        self.world.display(self.robots, self.step_count if step is None else step)
+
+    def record_to(self, path):
+        """Record every following step to a replay directory (see replay.py)."""
+        from replay import Recorder
+        self.recorder = Recorder(path, self)
+        return self.recorder
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        if self.workers:
+            self._stopping = True
+            self.shared["stop"][0] = 1
+            try:
+                self.barrier.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+            for w in self.workers:
+                w.join(timeout=10)
+                if w.is_alive():
+                    w.terminate()
+            self.workers = []
+            self.world.grid.gold = self.world.grid.gold.copy()
+            self.world.scores = dict(self.world.scores.items())
+            self.population.bind(**{name: getattr(self.population, name).copy() for name, _ in ROBOT_FIELDS})
+            self.shared.close()
+        self.world.renderer.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _team_worker(config, seed, group, spec, barrier, phase_barrier):
+    """Process entry point: run `group` until the parent sets the stop flag."""
+    shared = SharedArrays(*spec)
+    try:
+        _run_team(SimConfig.from_dict(config), seed, group, shared, barrier, phase_barrier)
+    except threading.BrokenBarrierError:
+        pass  # another process failed or the parent gave up; it reports the error
+    except BaseException:
+        barrier.abort()
+        phase_barrier.abort()
+        raise
+    finally:
+        shared.close()
+
+
+def _run_team(config, seed, group, shared, barrier, phase_barrier):
+    first, size = _team_ranges(config)[group]
+    sim = Simulation(config, seed=seed, groups=[group])
+    world = sim.world
+    world.grid.gold = shared["gold"]
+    world.scores = SharedScores(config.groups, shared["scores"])
+    world.pickup_claims = shared["claims"]
+    sim.population.bind(**{name: shared[name][first:first + size] for name, _ in ROBOT_FIELDS})
+    claims = shared["claims"][first:first + size]
+    won = shared["won"][first:first + size]
+    gold_index = world.grid.gold_index
+
+    while True:
+        barrier.wait()                 # begin
+        if shared["stop"][0]:
+            return
+        sim.begin_step()
+        sim.start_phase()
+        phase_barrier.wait()
+        sim.decision_phase()
+        phase_barrier.wait()
+        sim.action_phase()
+        barrier.wait()                 # claims posted
+        barrier.wait()                 # verdicts out
+        for i in np.flatnonzero((claims >= 0) & ~won).tolist():
+            y, x = divmod(int(claims[i]), config.width)
+            sim.index.robot(first + i).lose_pickup((x, y))
+        # the parent took the granted gold from the shared array; follow it in our index
+        for flat in np.unique(shared["claims"][shared["won"]]).tolist():
+            y, x = divmod(flat, config.width)
+            gold_index.set(x, y, world.grid.gold_at(x, y))
+        sim.end_step()
+        barrier.wait()                 # losers rolled back, gold indexes updated
@@ -0,0 +1,218 @@
+# population.py
+"""
+Struct-of-arrays storage for robot kinematic state.
+
+Population keeps id, group, x, y, facing, state and carrying of every robot
+in NumPy arrays (one slot per robot). Robot objects read and write their
+slot through properties, so the per-robot API is unchanged, while the bulk
+operations below move a whole set of slots in one vectorized call:
+- random_move: the idle random walk (80% forward, 20% turn, safe turn at edges)
+- move_towards: turn towards / step towards per-robot targets
+- turn_safe: turn to a random direction that does not face off the grid
+
+Facings are stored as indices into vision.FACINGS and states as indices
+into STATES.
+
+Every slot has its own Generator (streams.RandomStreams.robot), so a
+robot's walk depends only on the run seed and its id. Draws are generated
+DRAW_BLOCK steps at a time per robot. A bulk move then reads the next pair of
+uniforms for each robot from the block buffer with one fancy-indexing
+lookup.
+"""
+import numpy as np
+
+STATES = ("idle", "paired_for_gold", "carrying")
+STATE_INDEX = {s: i for i, s in enumerate(STATES)}
+
+# (dx, dy) of one forward step per facing index (N, E, S, W); N is +y
+STEP_X = np.array([0, 1, 0, -1], dtype=np.int32)
+STEP_Y = np.array([1, 0, -1, 0], dtype=np.int32)
+
+# Chance that an idle robot tries to step forward rather than turn
+FORWARD_CHANCE = 0.8
+
+# Random-walk draws generated per robot at a time (pairs of uniforms)
+DRAW_BLOCK = 32
+
+
+class Population:
+    def __init__(self, width, height, capacity=16, streams=None):
+        """
+        - width, height: grid size (for edge checks)
+        - capacity: initial number of slots (grows by doubling)
+        - streams: streams.RandomStreams giving each robot its Generator
+          (fresh, unseeded generators when None)
+        """
+        self.width = width
+        self.height = height
+        self.streams = streams
+        self.rngs = []     # slot -> Generator
+        self.size = 0
+        self.groups = []   # group index -> group name
+        self.index = None  # OccupancyIndex told about bulk moves, set by Simulation
+        self.grid = None   # Grid whose walls block moves, set by Simulation
+        self.deferred = None  # slots queued by Robot.action_phase while a step batches idle moves
+        self.bound = False    # storage replaced by external arrays (see bind)
+
+        self.id = np.zeros(capacity, dtype=np.int64)
+        self.group = np.zeros(capacity, dtype=np.int16)
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.facing = np.zeros(capacity, dtype=np.int8)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.carrying = np.zeros(capacity, dtype=bool)
+        self.draw_block = np.zeros((capacity, DRAW_BLOCK, 2))
+        self.draw_pos = np.zeros(capacity, dtype=np.int64)   # next unused row of draw_block
+
+    _FIELDS = ("id", "group", "x", "y", "facing", "state", "carrying", "draw_block", "draw_pos")
+
+    def __len__(self):
+        return self.size
+
+    def add(self, robot_id, group, x, y, facing, state, carrying=False):
+        """Append a robot (facing and state as indices) and return its slot."""
+        if self.size == len(self.x):
+            if self.bound:
+                raise RuntimeError("population storage is bound to external arrays and cannot grow")
+            for name in self._FIELDS:
+                old = getattr(self, name)
+                new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+        if group not in self.groups:
+            self.groups.append(group)
+        slot = self.size
+        self.id[slot] = robot_id
+        self.group[slot] = self.groups.index(group)
+        self.x[slot] = x
+        self.y[slot] = y
+        self.facing[slot] = facing
+        self.state[slot] = state
+        self.carrying[slot] = carrying
+        self.rngs.append(self.streams.robot(robot_id) if self.streams is not None else np.random.default_rng())
+        self.draw_pos[slot] = DRAW_BLOCK   # generate on first use
+        self.size += 1
+        return slot
+
+    def adopt(self, robot):
+        """Move `robot`'s state into a new slot of this population and point the robot at it."""
+        slot = self.add(robot.id, robot.group, robot.x, robot.y, robot.population.facing[robot.slot],
+                        robot.population.state[robot.slot], robot.carrying)
+        robot.population = self
+        robot.slot = slot
+        return slot
+
+    def bind(self, **arrays):
+        """
+        Keep the given fields in `arrays` (one entry per slot, e.g. views of a
+        shared-memory block) instead of private arrays. Current values are
+        copied in; no robot can be added afterwards.
+        """
+        for name, array in arrays.items():
+            if len(array) != self.size:
+                raise ValueError(f"{name}: expected {self.size} entries, got {len(array)}")
+            array[:] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        self.bound = True
+
+    def in_state(self, state, group=None):
+        """Slots whose state is `state` (optionally only members of `group`)."""
+        mask = self.state[:self.size] == STATE_INDEX[state]
+        if group is not None:
+            mask &= self.group[:self.size] == self.groups.index(group)
+        return np.flatnonzero(mask)
+
+    def draws(self, slots):
+        """(n, 2) uniform [0, 1) values: the next pair from each slot's own stream."""
+        slots = np.asarray(slots, dtype=np.intp)
+        for s in np.unique(slots[self.draw_pos[slots] >= DRAW_BLOCK]).tolist():
+            self.draw_block[s] = self.rngs[s].random((DRAW_BLOCK, 2))
+            self.draw_pos[s] = 0
+        pos = self.draw_pos[slots]
+        self.draw_pos[slots] = pos + 1
+        return self.draw_block[slots, pos]
+
+    # -------------------
+    # Vectorized movement
+    # -------------------
+    def _walls(self):
+        return self.grid is not None and self.grid.wall_count > 0
+
+    def safe_mask(self, slots):
+        """(n, 4) bool array: which facings (N, E, S, W) keep a step on the grid and off walls."""
+        x, y = self.x[slots], self.y[slots]
+        safe = np.stack([y < self.height - 1, x < self.width - 1, y > 0, x > 0], axis=1)
+        if self._walls():
+            nx = np.clip(x[:, None] + STEP_X, 0, self.width - 1)
+            ny = np.clip(y[:, None] + STEP_Y, 0, self.height - 1)
+            safe &= ~self.grid.blocked_in_flat(ny * self.width + nx)
+        return safe
+
+    def move_forward(self, slots):
+        """Step every robot in `slots` one cell forward where that stays on the grid and off walls."""
+        slots = np.asarray(slots, dtype=np.intp)
+        f = self.facing[slots]
+        nx = np.clip(self.x[slots] + STEP_X[f], 0, self.width - 1)
+        ny = np.clip(self.y[slots] + STEP_Y[f], 0, self.height - 1)
+        if self._walls():
+            stay = self.grid.blocked_in_flat(ny * self.width + nx)
+            nx = np.where(stay, self.x[slots], nx)
+            ny = np.where(stay, self.y[slots], ny)
+        self._place(slots, nx, ny)
+
+    def turn_safe(self, slots, draws=None):
+        """
+        Turn every robot in `slots` to a uniformly chosen facing that does not
+        point off the grid (facing is kept on a 1x1 grid).
+        - draws: uniform [0, 1) values, one per slot (the slots' own streams when None)
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        if draws is None:
+            draws = self.draws(slots)[:, 1]
+        safe = self.safe_mask(slots)
+        count = safe.sum(axis=1)
+        pick = (draws * count).astype(np.int64)
+        # index of the (pick+1)-th safe facing in each row
+        choice = np.argmax(np.cumsum(safe, axis=1) > pick[:, None], axis=1)
+        self.facing[slots] = np.where(count > 0, choice, self.facing[slots])
+
+    def random_move(self, slots):
+        """
+        Idle random walk for every robot in `slots`: with FORWARD_CHANCE try to
+        step forward, turning to a safe facing instead when at the edge;
+        otherwise turn to a safe facing.
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        if not len(slots):
+            return
+        draws = self.draws(slots)
+        facing = self.facing[slots]
+        can_step = self.safe_mask(slots)[np.arange(len(slots)), facing]
+        step = (draws[:, 0] < FORWARD_CHANCE) & can_step
+        self.move_forward(slots[step])
+        self.turn_safe(slots[~step], draws[~step, 1])
+
+    def move_towards(self, slots, tx, ty):
+        """
+        One move towards per-robot targets (tx, ty), same rule as Robot.move_towards:
+        resolve y first, then x; turn if not facing the needed direction, else step.
+        Robots already on their target do nothing.
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        x, y = self.x[slots], self.y[slots]
+        tx = np.broadcast_to(tx, x.shape)
+        ty = np.broadcast_to(ty, y.shape)
+        want = np.select([y < ty, y > ty, x < tx, x > tx], [0, 2, 1, 3], default=-1)
+        active = want >= 0
+        facing = self.facing[slots]
+        turn = active & (facing != want)
+        self.facing[slots[turn]] = want[turn]
+        self.move_forward(slots[active & ~turn])
+
+    def _place(self, slots, nx, ny):
+        changed = (nx != self.x[slots]) | (ny != self.y[slots])
+        self.x[slots] = nx
+        self.y[slots] = ny
+        if self.index is not None and changed.any():
+            self.index.invalidate_cells()
+
@@ -0,0 +1,375 @@
+# render.py
+"""
+Renderer backends used by Map.display.
+
+Every backend exposes the same two methods:
+- draw(world, robots, step): render one frame
+- close(): release any window / stream resources
+
+NullRenderer is the headless default and costs nothing per frame, AsciiRenderer
+prints the grid to a terminal, MatplotlibRenderer is the original live window
+and BlitRenderer is a persistent-artist, blitted window for large populations.
+"""
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from vision import FACING_INDEX, visibility_table
+
+# Per-team colors, by team order in the config (group1 blue, group2 red, ...)
+TEAM_COLORS = ["blue", "red", "purple", "darkorange", "teal", "brown"]
+VISION_COLORS = ["lightgreen", "darkseagreen", "plum", "navajowhite", "paleturquoise", "rosybrown"]
+DEPOSIT_CHARS = "BRPOTW"
+
+
+def team_index(world, group):
+    return world.config.groups.index(group) % len(TEAM_COLORS)
+
+
+def score_line(world, step, arrow="→"):
+    """'Step N | Scores → Group1: a | Group2: b' for every team."""
+    scores = " | ".join(f"{group.capitalize()}: {score}" for group, score in world.scores.items())
+    return f"Step {step} | Scores {arrow} {scores}"
+
+
+class NullRenderer:
+    """Headless backend: never creates a figure and draws nothing."""
+
+    def draw(self, world, robots, step=0):
+        pass
+
+    def close(self):
+        pass
+
+
+class AsciiRenderer:
+    """
+    Terminal backend. One character per cell, north at the top:
+    - 'B' / 'R' / ... deposit of the first / second / ... team (DEPOSIT_CHARS)
+    - '1'..'9' gold count ('+' for 10 or more)
+    - 'n e s w' first-team robot facing, 'N E S W' any other team's robot facing
+    - '$' robot carrying gold, '#' several robots on one cell
+    - '%' wall, '.' empty cell
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def draw(self, world, robots, step=0):
+        rows = [["."] * world.width for _ in range(world.height)]
+
+        for x, y in world.grid.wall_cells():
+            rows[y][x] = "%"
+
+        for x, y, group in world.grid.deposit_cells():
+            rows[y][x] = DEPOSIT_CHARS[team_index(world, group)]
+
+        for x, y, amt in world.grid.gold_cells():
+            rows[y][x] = str(amt) if amt < 10 else "+"
+
+        occupied = defaultdict(int)
+        for r in robots:
+            occupied[(r.x, r.y)] += 1
+            if occupied[(r.x, r.y)] > 1:
+                rows[r.y][r.x] = "#"
+            elif r.carrying:
+                rows[r.y][r.x] = "$"
+            else:
+                rows[r.y][r.x] = r.facing.lower() if team_index(world, r.group) == 0 else r.facing
+
+        lines = [score_line(world, step, "->")]
+        lines += ["".join(row) for row in reversed(rows)]
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class MatplotlibRenderer:
+    """Live matplotlib window (the original Map.display drawing code)."""
+
+    def __init__(self, pause=0.05, interactive=True):
+        """
+        - pause: seconds plt.pause waits after each frame (0 skips it)
+        - interactive: open a live window; False draws off-screen (e.g. for savefig)
+        """
+        # Imported lazily so headless runs never need matplotlib
+        import matplotlib.pyplot as plt
+        import matplotlib.patheffects as patheffects
+
+        self.plt = plt
+        self.patheffects = patheffects
+        self.pause = pause if interactive else 0
+
+        self.fig, self.ax = plt.subplots(figsize=(6, 6))
+        if interactive:
+            plt.ion()  # interactive mode ON
+            plt.show()
+
+    def draw(self, world, robots, step=0):
+        """Visualize map with matplotlib."""
+        plt = self.plt
+        patheffects = self.patheffects
+        width, height = world.width, world.height
+
+        self.ax.clear()
+        self.ax.set_xlim(-0.5, width - 0.5)
+        self.ax.set_ylim(-0.5, height - 0.5)
+        self.ax.set_xticks(range(width))
+        self.ax.set_yticks(range(height))
+        self.ax.grid(True)
+
+        # Draw walls
+        walls = world.grid.wall_cells()
+        if walls:
+            wx, wy = zip(*walls)
+            self.ax.scatter(wx, wy, c="dimgray", marker="s", s=200)
+
+        # Draw deposits
+        for x, y, group in world.grid.deposit_cells():
+            self.ax.scatter(x, y, c=TEAM_COLORS[team_index(world, group)], marker="s", s=200, label=f"{group} deposit")
+
+        # Draw gold
+        for x, y, gold_amt in world.grid.gold_cells():
+            self.ax.scatter(x, y, c="gold", marker="o", s=100)
+            # draw number of golds
+            self.ax.text(x, y, str(gold_amt), color="black", fontsize=8, ha="center", va="center")
+
+        # Prepare grouping of robots by position so IDs can be stacked when overlapping
+        if world.occupancy is not None:
+            positions = world.occupancy.cells
+        else:
+            positions = defaultdict(set)
+            for r in robots:
+                positions[(r.x, r.y)].add(r)
+
+        # Draw robots
+        for r in robots:
+            color = TEAM_COLORS[team_index(world, r.group)]
+            vision_color = VISION_COLORS[team_index(world, r.group)]
+
+            # Vision overlay (semi-transparent)
+            for (vx, vy) in r.sense():
+                self.ax.add_patch(plt.Rectangle((vx - 0.5, vy - 0.5), 1, 1,
+                                                facecolor=vision_color, alpha=0.2))
+
+            # Robot body
+            self.ax.scatter(r.x, r.y, c=color, s=80, edgecolors="black")
+
+            # Draw facing direction as arrow
+            dx, dy = 0, 0
+            if r.facing == "N": dy = 0.3
+            elif r.facing == "S": dy = -0.3
+            elif r.facing == "E": dx = 0.3
+            elif r.facing == "W": dx = -0.3
+            self.ax.arrow(r.x, r.y, dx, dy, head_width=0.2, head_length=0.2, fc=color, ec=color)
+
+            # 🟡 Mark carrying gold
+            if r.carrying:
+                self.ax.scatter(r.x, r.y, c="gold", marker="o", s=200, alpha=0.6, edgecolors="black")
+
+        # Draw stacked IDs for positions that contain one or more robots
+        for (px, py), robots_at in positions.items():
+            # start slightly above the robot marker; stack upward
+            base_offset = 0.25
+            gap = 0.5
+            # If many robots, reduce font size to fit
+            fontsize = 8 if len(robots_at) <= 4 else max(6, 8 - (len(robots_at) - 4))
+            for idx, r in enumerate(sorted(robots_at, key=lambda rr: rr.id)):
+                offset_y = base_offset + idx * gap
+                try:
+                    self.ax.text(
+                        px,
+                        py + offset_y,
+                        str(r.id),
+                        color="white",
+                        fontsize=fontsize,
+                        ha="center",
+                        va="bottom",
+                        weight="bold",
+                        path_effects=[patheffects.Stroke(linewidth=1.5, foreground='black'), patheffects.Normal()]
+                    )
+                except Exception:
+                    # Fallback: plain text
+                    self.ax.text(px, py + offset_y, str(r.id), color="black", fontsize=fontsize, ha="center", va="bottom")
+
+        # Title → Step counter + scores
+        self.ax.set_title(score_line(world, step))
+
+        if self.pause:
+            plt.pause(self.pause)  # update frame
+
+    def close(self):
+        self.plt.close(self.fig)
+
+
+class BlitRenderer:
+    """
+    Live matplotlib window that creates its artists once and only updates
+    their data each frame:
+    - gold and vision coverage are two RGBA image layers
+    - robots are one scatter (set_offsets), carried gold a second one
+    - facing is one quiver (set_UVC)
+    Frames are blitted onto a cached background (deposits, walls, grid lines), so
+    frame time no longer grows with robots x vision. Robot IDs and per-cell
+    gold counts are not drawn; gold amount shows as opacity instead.
+    """
+
+    # Arrow vector per facing index (N, E, S, W)
+    FACING_VECTORS = np.array([(0, 0.3), (0.3, 0), (0, -0.3), (-0.3, 0)])
+
+    def __init__(self, pause=0, interactive=True):
+        """
+        - pause: extra seconds to wait after each frame (0: just process GUI events)
+        - interactive: open a live window; False draws off-screen without blitting
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import to_rgba
+
+        self.plt = plt
+        self.to_rgba = to_rgba
+        self.pause = pause
+        self.interactive = interactive
+
+        self.fig, self.ax = plt.subplots(figsize=(6, 6))
+        if interactive:
+            plt.ion()
+            plt.show()
+        self.blit = interactive and self.fig.canvas.supports_blit
+        self.background = None
+        self._layout = None   # (width, height, groups, robot count, wall version) the artists were built for
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # Full redraws (first show, resize) invalidate the cached background
+        if self.blit and self._layout is not None:
+            self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+            self._draw_animated()
+
+    def _setup(self, world, n_robots):
+        ax = self.ax
+        ax.clear()
+        width, height = world.width, world.height
+        extent = (-0.5, width - 0.5, -0.5, height - 0.5)
+        animated = self.blit
+
+        # Static layer: grid lines, walls and deposits (captured in the background)
+        if width <= 50 and height <= 50:
+            ax.set_xticks(range(width))
+            ax.set_yticks(range(height))
+            ax.grid(True)
+        if world.grid.wall_count:
+            walls = np.zeros((height, width, 4))
+            walls[world.grid.blocked_flat().reshape(height, width)] = self.to_rgba("dimgray")
+            ax.imshow(walls, origin="lower", extent=extent, interpolation="nearest", zorder=2)
+        for x, y, group in world.grid.deposit_cells():
+            ax.scatter(x, y, c=TEAM_COLORS[team_index(world, group)], marker="s", s=200, zorder=2)
+
+        # Dynamic layers
+        self.vision_rgba = np.zeros((height, width, 4), dtype=np.uint8)
+        self.gold_rgba = np.zeros((height, width, 4), dtype=np.uint8)
+        self.vision_img = ax.imshow(self.vision_rgba, origin="lower", extent=extent,
+                                    interpolation="nearest", animated=animated, zorder=1)
+        self.gold_img = ax.imshow(self.gold_rgba, origin="lower", extent=extent,
+                                  interpolation="nearest", animated=animated, zorder=3)
+        zeros = np.zeros(n_robots)
+        self.robot_scatter = ax.scatter(zeros, zeros, s=80, edgecolors="black", animated=animated, zorder=5)
+        self.carry_scatter = ax.scatter([], [], c="gold", s=200, alpha=0.6, edgecolors="black",
+                                        animated=animated, zorder=4)
+        self.quiver = ax.quiver(zeros, zeros, zeros, zeros, angles="xy", scale_units="xy", scale=1,
+                                width=0.006, animated=animated, zorder=6)
+        self.title = ax.set_title("", animated=animated)
+        ax.set_xlim(-0.5, width - 0.5)
+        ax.set_ylim(-0.5, height - 0.5)
+
+        self.team_colors = np.array([self.to_rgba(c) for c in TEAM_COLORS])
+        self.vision_colors = (np.array([self.to_rgba(c, 0.2) for c in VISION_COLORS]) * 255).astype(np.uint8)
+        self.gold_color = (np.array(self.to_rgba("gold")) * 255).astype(np.uint8)
+        self.vision = visibility_table(width, height)
+        self._layout = (width, height, tuple(world.config.groups), n_robots, world.grid.version)
+
+        self.fig.canvas.draw()
+        if self.blit:
+            self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _artists(self):
+        return (self.vision_img, self.gold_img, self.carry_scatter, self.robot_scatter, self.quiver, self.title)
+
+    def _draw_animated(self):
+        for artist in self._artists():
+            self.fig.draw_artist(artist)
+
+    def draw(self, world, robots, step=0):
+        n = len(robots)
+        if self._layout != (world.width, world.height, tuple(world.config.groups), n, world.grid.version):
+            self._setup(world, n)
+
+        xs = np.fromiter((r.x for r in robots), dtype=np.int64, count=n)
+        ys = np.fromiter((r.y for r in robots), dtype=np.int64, count=n)
+        facings = np.fromiter((FACING_INDEX[r.facing] for r in robots), dtype=np.int64, count=n)
+        teams = np.fromiter((team_index(world, r.group) for r in robots), dtype=np.int64, count=n)
+        carrying = np.fromiter((r.carrying for r in robots), dtype=bool, count=n)
+        xy = np.column_stack([xs, ys])
+
+        # Robots, carried gold and facing arrows
+        self.robot_scatter.set_offsets(xy)
+        self.robot_scatter.set_facecolors(self.team_colors[teams])
+        self.carry_scatter.set_offsets(xy[carrying] if carrying.any() else np.empty((0, 2)))
+        uv = self.FACING_VECTORS[facings]
+        self.quiver.set_offsets(xy)
+        self.quiver.set_UVC(uv[:, 0], uv[:, 1])
+        self.quiver.set_color(self.team_colors[teams])
+
+        # Gold layer: opacity grows with the amount on the cell
+        gold = self.gold_rgba.reshape(-1, 4)
+        gold[:] = 0
+        flat, amounts = world.grid.gold_flat()
+        if len(flat):
+            gold[flat, :3] = self.gold_color[:3]
+            gold[flat, 3] = np.minimum(255, 110 + 40 * np.asarray(amounts))
+        self.gold_img.set_data(self.gold_rgba)
+
+        # Vision coverage layer, one vectorized lookup for all robots
+        vision = self.vision_rgba.reshape(-1, 4)
+        vision[:] = 0
+        if n:
+            visible = self.vision.visible_all(xs, ys, facings)
+            for t in np.unique(teams):
+                cells = visible[teams == t].ravel()
+                vision[cells[cells >= 0]] = self.vision_colors[t]
+        self.vision_img.set_data(self.vision_rgba)
+
+        self.title.set_text(score_line(world, step))
+
+        canvas = self.fig.canvas
+        if self.blit:
+            canvas.restore_region(self.background)
+            self._draw_animated()
+            canvas.blit(self.fig.bbox)
+            canvas.flush_events()
+        else:
+            canvas.draw_idle()
+        if self.pause:
+            self.plt.pause(self.pause)
+
+    def close(self):
+        self.plt.close(self.fig)
+
+
+RENDERERS = {
+    "none": NullRenderer,
+    "ascii": AsciiRenderer,
+    "matplotlib": MatplotlibRenderer,
+    "blit": BlitRenderer,
+}
+
+
+def make_renderer(name, **kwargs):
+    """Build a renderer backend by name ("none", "ascii", "matplotlib" or "blit")."""
+    try:
+        renderer_cls = RENDERERS[name]
+    except KeyError:
+        raise ValueError(f"unknown renderer {name!r}, expected one of {sorted(RENDERERS)}") from None
+    return renderer_cls(**kwargs)
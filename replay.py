@@ -0,0 +1,283 @@
+# replay.py
+"""
+Compact replay recording and offline rendering.
+
+A replay is a directory:
+- meta.json       map size, teams, deposits, walls, robot ids/groups, record layout
+- gold0.npy       initial gold as a (2, n) int64 array of (flat index, amount)
+- robots.bin      one fixed-width ROBOT_DTYPE record per robot per step
+- gold.bin        GOLD_DTYPE (flat index, delta) records for every gold change
+- gold_index.bin  int64 per step: number of gold records written up to that step
+- scores.bin      int32 per team per step
+
+Every .bin file is a flat array, so Replay memory-maps them and only touches
+the pages of the steps it reads; opening a 1M-step, 10k-robot replay costs
+nothing up front.
+
+    python main.py --renderer none --record run.replay
+    python replay.py info run.replay
+    python replay.py show run.replay --start 100 --every 5
+    python replay.py export run.replay frames/ --every 10
+"""
+import argparse
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from config import SPARSE_AREA
+from grid import Grid, SparseGrid
+from population import STATES, STATE_INDEX
+from vision import FACINGS, FACING_INDEX, visibility_table
+
+FORMAT_VERSION = 1
+
+ROBOT_DTYPE = np.dtype([
+    ("x", "<i4"),
+    ("y", "<i4"),
+    ("facing", "i1"),     # index into vision.FACINGS
+    ("state", "i1"),      # index into STATES
+    ("carrying", "?"),
+    ("partner", "<i4"),   # -1 when unpaired
+])
+GOLD_DTYPE = np.dtype([("flat", "<i8"), ("delta", "<i4")])
+
+
+def replay_meta(sim):
+    """Static description of a run: map size, teams, deposits and robot ids/groups."""
+    world = sim.world
+    return {
+        "version": FORMAT_VERSION,
+        "width": world.width,
+        "height": world.height,
+        "groups": world.config.groups,
+        "deposits": [list(d) for d in world.deposit_points],
+        "walls": [list(c) for c in world.grid.wall_cells()],
+        "robot_ids": [r.id for r in sim.robots],
+        "robot_groups": [r.group for r in sim.robots],
+        "robot_dtype": ROBOT_DTYPE.descr,
+        "gold_dtype": GOLD_DTYPE.descr,
+        "steps": 0,
+    }
+
+
+def robot_records(robots):
+    """ROBOT_DTYPE array with one record per robot."""
+    return np.array([
+        (r.x, r.y, FACING_INDEX[r.facing], STATE_INDEX[r.state], r.carrying,
+         -1 if r.partner_id is None else r.partner_id)
+        for r in robots
+    ], dtype=ROBOT_DTYPE)
+
+
+def frame_views(meta, records, gold_flat, gold_amounts, scores, vision=None):
+    """
+    (world, robots) views the renderers in render.py can draw, built from
+    static run metadata plus one step's robot records, gold and scores.
+    """
+    width, height, groups = meta["width"], meta["height"], meta["groups"]
+    vision = vision if vision is not None else visibility_table(width, height)
+    grid = (SparseGrid if width * height > SPARSE_AREA else Grid)(width, height, groups)
+    for (x, y), group in zip(meta["deposits"], groups):
+        grid.set_deposit(x, y, group)
+    for x, y in meta.get("walls", ()):
+        grid.set_blocked(x, y)
+    for f, a in zip(np.asarray(gold_flat).tolist(), np.asarray(gold_amounts).tolist()):
+        grid.add_gold(f % width, f // width, a)
+
+    world = SimpleNamespace(
+        width=width,
+        height=height,
+        grid=grid,
+        config=SimpleNamespace(groups=groups),
+        deposit_points=[tuple(d) for d in meta["deposits"]],
+        scores={g: int(s) for g, s in zip(groups, scores)},
+        occupancy=None,
+    )
+    robots = [ReplayRobot(rid, group, rec, vision)
+              for rid, group, rec in zip(meta["robot_ids"], meta["robot_groups"], records)]
+    return world, robots
+
+
+class Recorder:
+    """Appends the state of `sim` after every step (see Simulation.record_to)."""
+
+    def __init__(self, path, sim):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.sim = sim
+        self.steps = 0
+        self._gold_records = 0
+
+        world = sim.world
+        flat, amounts = world.grid.gold_flat()
+        np.save(os.path.join(path, "gold0.npy"), np.stack([flat, amounts]).astype(np.int64))
+        self.meta = replay_meta(sim)
+        self._write_meta()
+
+        # Start logging gold changes from here on
+        world.grid.changes = []
+        self._files = {name: open(os.path.join(path, name), "wb")
+                       for name in ("robots.bin", "gold.bin", "gold_index.bin", "scores.bin")}
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(self.meta, f)
+
+    def record(self):
+        """Append one step: robot records, gold changes since the last call, scores."""
+        world = self.sim.world
+        self._files["robots.bin"].write(robot_records(self.sim.robots).tobytes())
+
+        changes = world.grid.changes
+        if changes:
+            self._files["gold.bin"].write(np.array(changes, dtype=GOLD_DTYPE).tobytes())
+            self._gold_records += len(changes)
+            changes.clear()
+        self._files["gold_index.bin"].write(np.int64(self._gold_records).tobytes())
+        scores = np.array([world.scores[g] for g in self.meta["groups"]], dtype="<i4")
+        self._files["scores.bin"].write(scores.tobytes())
+        self.steps += 1
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self.sim.world.grid.changes = None
+        self.meta["steps"] = self.steps
+        self._write_meta()
+
+
+class ReplayRobot:
+    """Read-only robot view with the attributes the renderers use."""
+    __slots__ = ("id", "group", "x", "y", "facing", "state", "carrying", "partner_id", "_vision")
+
+    def __init__(self, robot_id, group, record, vision):
+        self.id = robot_id
+        self.group = group
+        self.x = int(record["x"])
+        self.y = int(record["y"])
+        self.facing = FACINGS[record["facing"]]
+        self.state = STATES[record["state"]]
+        self.carrying = bool(record["carrying"])
+        self.partner_id = None if record["partner"] < 0 else int(record["partner"])
+        self._vision = vision
+
+    def sense(self):
+        return self._vision.cells(self.x, self.y, self.facing)
+
+
+class Replay:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.width = self.meta["width"]
+        self.height = self.meta["height"]
+        self.groups = self.meta["groups"]
+        n = len(self.meta["robot_ids"])
+
+        # Trust the file sizes over meta["steps"] so unfinished recordings still open
+        steps = os.path.getsize(self._file("robots.bin")) // (ROBOT_DTYPE.itemsize * n) if n else 0
+        self.robots = self._map("robots.bin", ROBOT_DTYPE, (steps, n))
+        self.gold_index = self._map("gold_index.bin", np.dtype("<i8"), (steps,))
+        self.scores = self._map("scores.bin", np.dtype("<i4"), (steps, len(self.groups)))
+        self.gold_deltas = self._map("gold.bin", GOLD_DTYPE, None)
+        self.gold0 = np.load(self._file("gold0.npy"))
+        self.vision = visibility_table(self.width, self.height)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self, name, dtype, shape):
+        if os.path.getsize(self._file(name)) == 0 or (shape is not None and 0 in shape):
+            return np.zeros(shape if shape is not None else 0, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self):
+        return len(self.robots)
+
+    def gold_at(self, step):
+        """(flat indices, amounts) of the gold on the map after `step`."""
+        deltas = self.gold_deltas[:int(self.gold_index[step])]
+        flat = np.concatenate([self.gold0[0], deltas["flat"]])
+        amounts = np.concatenate([self.gold0[1], deltas["delta"]])
+        cells, inverse = np.unique(flat, return_inverse=True)
+        totals = np.bincount(inverse, weights=amounts, minlength=len(cells)).astype(np.int64)
+        keep = totals > 0
+        return cells[keep], totals[keep]
+
+    def frame(self, step):
+        """(world, robots) views of `step` that the renderers in render.py can draw."""
+        flat, amounts = self.gold_at(step)
+        return frame_views(self.meta, self.robots[step], flat, amounts, self.scores[step], self.vision)
+
+    def render(self, step, renderer):
+        world, robots = self.frame(step)
+        renderer.draw(world, robots, step)
+
+    def export_frames(self, out_dir, start=0, stop=None, every=1, dpi=100):
+        """Write one PNG per selected step with the matplotlib renderer. Returns the paths."""
+        from render import MatplotlibRenderer
+
+        os.makedirs(out_dir, exist_ok=True)
+        renderer = MatplotlibRenderer(interactive=False)
+        paths = []
+        try:
+            for step in range(start, len(self) if stop is None else min(stop, len(self)), every):
+                self.render(step, renderer)
+                path = os.path.join(out_dir, f"frame_{step:07d}.png")
+                renderer.fig.savefig(path, dpi=dpi)
+                paths.append(path)
+        finally:
+            renderer.close()
+        return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, play back or export a recorded run.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    info = sub.add_parser("info", help="print replay metadata")
+    info.add_argument("path")
+
+    show = sub.add_parser("show", help="play back in a matplotlib window")
+    show.add_argument("path")
+    show.add_argument("--start", type=int, default=0, help="first step to show")
+    show.add_argument("--stop", type=int, default=None, help="stop before this step")
+    show.add_argument("--every", type=int, default=1, help="show every Nth step")
+    show.add_argument("--pause", type=float, default=0.05, help="seconds per frame")
+    show.add_argument("--blit", action="store_true", help="use the persistent-artist BlitRenderer")
+
+    export = sub.add_parser("export", help="write PNG frames")
+    export.add_argument("path")
+    export.add_argument("out_dir")
+    export.add_argument("--start", type=int, default=0)
+    export.add_argument("--stop", type=int, default=None)
+    export.add_argument("--every", type=int, default=1)
+    export.add_argument("--dpi", type=int, default=100)
+
+    args = parser.parse_args(argv)
+    replay = Replay(args.path)
+
+    if args.command == "info":
+        final = replay.scores[-1].tolist() if len(replay) else [0] * len(replay.groups)
+        print(f"{args.path}: {len(replay)} steps, {len(replay.meta['robot_ids'])} robots, "
+              f"{replay.width}x{replay.height} grid, {len(replay.gold_deltas)} gold changes")
+        print("final scores:", dict(zip(replay.groups, final)))
+    elif args.command == "show":
+        from render import BlitRenderer, MatplotlibRenderer
+        renderer = (BlitRenderer if args.blit else MatplotlibRenderer)(pause=args.pause)
+        stop = len(replay) if args.stop is None else min(args.stop, len(replay))
+        for step in range(args.start, stop, args.every):
+            replay.render(step, renderer)
+        renderer.close()
+    else:
+        import matplotlib
+        matplotlib.use("Agg")
+        paths = replay.export_frames(args.out_dir, args.start, args.stop, args.every, args.dpi)
+        print(f"wrote {len(paths)} frames to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
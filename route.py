@@ -0,0 +1,126 @@
+# route.py
+"""
+Shortest-path routing around walls.
+
+Router runs A* over robot states (x, y, facing) with the same costs as
+Robot.distance: stepping forward and turning each take one cycle. The
+heuristic is the Manhattan distance plus one turn when the robot faces
+away from every direction it still has to travel, so routes are optimal.
+
+Every state on a found route is cached as (state, goal) -> next state in an
+LRU, so a robot following its route, its partner on the same cell, and any
+other robot that joins the route later all get O(1) answers. The cache is
+dropped whenever the grid's wall version changes.
+"""
+import heapq
+from collections import OrderedDict
+
+from population import STEP_X, STEP_Y
+
+DEFAULT_CACHE_SIZE = 1 << 16
+
+# Cached in place of a next state when the goal cannot be reached
+NO_ROUTE = ()
+
+# Facing indices (vision.FACINGS order) that reduce dx > 0, dx < 0, dy > 0, dy < 0
+_EAST, _WEST, _NORTH, _SOUTH = 1, 3, 0, 2
+
+
+class Router:
+    def __init__(self, grid, cache_size=DEFAULT_CACHE_SIZE):
+        self.grid = grid
+        self.cache_size = cache_size
+        self.cache = OrderedDict()   # (x, y, facing, gx, gy) -> next (x, y, facing), or NO_ROUTE
+        self.version = grid.version
+        self.hits = 0
+        self.misses = 0
+
+    def next_state(self, x, y, facing, goal):
+        """
+        State (x, y, facing) after the first move of a shortest route from
+        (x, y) facing `facing` (an index into vision.FACINGS) to `goal`.
+        None when already there or the goal cannot be reached.
+        """
+        if self.grid.version != self.version:
+            self.cache.clear()
+            self.version = self.grid.version
+        key = (x, y, facing) + tuple(goal)
+        nxt = self.cache.get(key)
+        if nxt is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return nxt or None
+        self.misses += 1
+        if (x, y) == tuple(goal):
+            return None
+        path = self.search((x, y, facing), goal)
+        if path is None:
+            # remember dead ends too: failed searches cover the whole reachable area
+            self._store(key, NO_ROUTE)
+            return None
+        for state, following in zip(path, path[1:]):
+            self._store(state + tuple(goal), following)
+        return path[1]
+
+    def _store(self, key, value):
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def search(self, start, goal):
+        """A* from state `start` to any state on cell `goal`. Returns the list of states, or None."""
+        grid = self.grid
+        width, height = grid.width, grid.height
+        gx, gy = goal
+        if not grid.in_bounds(gx, gy) or grid.is_blocked(gx, gy):
+            return None
+
+        def h(state):
+            x, y, f = state
+            dx, dy = gx - x, gy - y
+            turn = 0
+            if dx or dy:
+                wanted = []
+                if dx > 0:
+                    wanted.append(_EAST)
+                elif dx < 0:
+                    wanted.append(_WEST)
+                if dy > 0:
+                    wanted.append(_NORTH)
+                elif dy < 0:
+                    wanted.append(_SOUTH)
+                turn = 0 if f in wanted else 1
+            return abs(dx) + abs(dy) + turn
+
+        counter = 0
+        best = {start: 0}
+        parent = {start: None}
+        heap = [(h(start), 0, counter, start)]
+        while heap:
+            _, g, _, state = heapq.heappop(heap)
+            if g > best[state]:
+                continue
+            x, y, f = state
+            if (x, y) == (gx, gy):
+                path = []
+                while state is not None:
+                    path.append(state)
+                    state = parent[state]
+                return path[::-1]
+            # forward
+            nx, ny = x + STEP_X.item(f), y + STEP_Y.item(f)
+            moves = [(nx, ny, f)] if 0 <= nx < width and 0 <= ny < height and not grid.is_blocked(nx, ny) else []
+            # turns (a robot can face any direction in one cycle)
+            moves += [(x, y, t) for t in range(4) if t != f]
+            for nxt in moves:
+                ng = g + 1
+                if ng < best.get(nxt, ng + 1):
+                    best[nxt] = ng
+                    parent[nxt] = state
+                    counter += 1
+                    heapq.heappush(heap, (ng + h(nxt), ng, counter, nxt))
+        return None
+
+    def stats(self):
+        return {"cache_entries": len(self.cache), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,389 @@
+# simulation.py
+from dataclasses import replace
+
+import numpy as np
+
+from config import PAIRING_POLICIES, SimConfig
+from map import Map
+from bot import Robot
+from assign import TeamAssigner
+from index import OccupancyIndex
+from population import DRAW_BLOCK, Population
+from streams import RandomStreams
+from bus import MessageBus
+from known import KnownCells
+from fields import FieldService
+from route import Router
+from status import FACING, STATE, X, Y, team_tables
+from stop import check
+from trace import DEBUG, NULL_TRACER
+from metrics import NULL_METRICS
+
+
+class Simulation:
+    """
+    Owns the world, the robots, their shared Population arrays, the occupancy
+    index and the team message bus, and runs the start/decision/action phase
+    loop one step at a time.
+    """
+
+    def __init__(self, config=None, renderer=None, seed=None, tracer=None, metrics=None, groups=None):
+        """
+        - config: SimConfig (world size, gold, teams, step budget); defaults to SimConfig()
+        - renderer: backend passed to Map (headless when None)
+        - seed: seed of the run's random streams (see streams.py); None draws fresh
+          entropy, kept in `self.seed` so the run can be reproduced
+        - tracer: trace.Tracer receiving step events (disabled when None)
+        - metrics: metrics.Metrics timing phases and counting events (disabled when None)
+        - groups: only create the robots of these teams (all when None); the world is
+          still built in full, so a team process sees the same map (see parallel.py)
+        """
+        self.config = config if config is not None else SimConfig()
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        self.world = Map(self.config, renderer, self.streams.map())
+        self.index = OccupancyIndex(self.world.width, self.world.height)
+        self.world.occupancy = self.index
+        # every robot walks on its own stream, keyed by its id
+        self.population = Population(self.world.width, self.world.height, streams=self.streams)
+        self.population.index = self.index
+        self.population.grid = self.world.grid
+        self.bus = MessageBus()
+        self.known_cells = {}  # group -> KnownCells shared by the team
+        # Deposit/frontier distance fields (dense maps only: a field costs 8 bytes per cell)
+        self.fields = None if self.config.use_sparse() else FieldService(
+            self.world.grid, self.known_cells, self.world.deposit_points)
+        # A* routes around walls, shared by every robot (see route.py)
+        self.router = Router(self.world.grid)
+        self.robots = []
+        self.step_count = 0
+        self.last_pickup_step = None
+        self.recorder = None
+
+        # Create robots: ids are numbered team by team, creation interleaves the teams
+        first_id = {}
+        next_id = 0
+        for team in self.config.teams:
+            first_id[team.name] = next_id
+            next_id += team.size
+        teams = [t for t in self.config.teams if groups is None or t.name in groups]
+        for i in range(max((t.size for t in teams), default=0)):
+            for team in teams:
+                if i < team.size:
+                    self.add_robot(Robot(first_id[team.name] + i, team.name,
+                                         *team.start, team.facing, self.config))
+
+        group_status = team_tables(self.robots)
+        for r in self.robots:
+            # every robot keeps its own replica, kept in sync through the bus
+            r.group_status = group_status[r.group].copy()
+
+        # group -> TeamAssigner when the teams pair robots centrally
+        self.assigners = self._make_assigners(group_status) if self.config.pairing == "team" else {}
+
+    def _make_assigners(self, group_status):
+        return {group: TeamAssigner(group, self.world, self.index, self.bus, status, self.tracer, self.fields)
+                for group, status in group_status.items()}
+
+    def add_robot(self, robot):
+        self.population.adopt(robot)
+        robot.index = self.index
+        robot.bus = self.bus
+        robot.tracer = self.tracer
+        robot.metrics = self.metrics
+        robot.fields = self.fields
+        robot.router = self.router
+        if robot.group not in self.known_cells:
+            self.known_cells[robot.group] = KnownCells(self.world.width, self.world.height)
+        robot.known_cells = self.known_cells[robot.group]
+        self.robots.append(robot)
+        self.index.add(robot)
+        self.bus.subscribe(robot)
+
+    def reseed(self, seed):
+        """
+        Draw every robot's random walk from the streams of `seed` from now on
+        (what-if branches of one run, see checkpoint.fork). None draws fresh entropy.
+        """
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        pop = self.population
+        pop.streams = self.streams
+        pop.rngs = [self.streams.robot(rid) for rid in pop.id[:pop.size].tolist()]
+        pop.draw_pos[:pop.size] = DRAW_BLOCK   # drop draws buffered from the old streams
+
+    def set_pairing(self, policy):
+        """Switch the pairing policy (config.PAIRING_POLICIES) mid-run."""
+        if policy not in PAIRING_POLICIES:
+            raise ValueError(f"unknown pairing {policy!r}, expected one of {PAIRING_POLICIES}")
+        if policy == self.config.pairing:
+            return
+        self.config = replace(self.config, pairing=policy)
+        for r in self.robots:
+            r.pairing = policy
+        for assigner in self.assigners.values():
+            self.bus.unsubscribe(assigner)
+        self.assigners = {}
+        if policy == "team":
+            # new assigners start from what the teams know right now
+            clocks = {r.group: r.group_status.clock for r in self.robots}
+            self.assigners = self._make_assigners(team_tables(self.robots, clocks))
+            for r in self.robots:
+                assigner = self.assigners[r.group]
+                for cell, amt in r.known_gold.items():
+                    assigner.known_gold[cell] = amt
+                    assigner.gold.add(cell)
+
+    def step(self):
+        """Run one start/decision/action cycle."""
+        self.begin_step()
+        m = self.metrics
+        if m.enabled:
+            m.timed("start", self.start_phase)
+            m.timed("decision", self.decision_phase)
+            m.timed("action", self.action_phase)
+        else:
+            self.start_phase()
+            self.decision_phase()
+            self.action_phase()
+        self.end_step()
+
+    def begin_step(self):
+        self.tracer.step = self.step_count
+        if self.fields is not None:
+            self.fields.step = self.step_count
+        if self.tracer.debug:
+            self.tracer.emit(DEBUG, "step")
+        if self.metrics.enabled:
+            self.metrics.begin_step(self.step_count)
+
+    # --- Phase 1: Start ---
+    def start_phase(self):
+        for r in self.robots:
+            r.start_phase(self.world, self.robots)
+
+    # --- Phase 2: Decision ---
+    def decision_phase(self):
+        for assigner in self.assigners.values():
+            assigner.assign()
+        for r in self.robots:
+            r.decision_phase(self.world, self.robots)
+
+    # --- Phase 3: Action ---
+    def action_phase(self):
+        gold_before = self.world.grid.total_gold()
+        # Idle robots queue themselves instead of moving; nothing later in the
+        # phase reads their position, so they all move in one vectorized call
+        pop = self.population
+        pop.deferred = []
+        for r in self.robots:
+            r.action_phase(self.world, self.robots)
+        pop.random_move(pop.deferred)
+        pop.deferred = None
+        if self.world.grid.total_gold() < gold_before:
+            self.last_pickup_step = self.step_count
+
+    def end_step(self):
+        if self.metrics.enabled:
+            self.metrics.end_step(self.step_count, self.bus.stats())
+        self.bus.end_step()
+        self.step_count += 1
+        if self.recorder is not None:
+            self.recorder.record()
+
+    def record_to(self, path):
+        """Record every following step to a replay directory (see replay.py)."""
+        from replay import Recorder
+        self.recorder = Recorder(path, self)
+        return self.recorder
+
+    def checkpoint(self, path):
+        """Save the full state to `path` between steps; checkpoint.restore continues from it."""
+        from checkpoint import save
+        save(self, path)
+
+    # -------------------
+    # Running
+    # -------------------
+    def run(self, steps=None, stop=(), fast_forward=False, on_step=None):
+        """
+        Run up to `steps` steps (default: the config's max_steps) and return why
+        the run ended: the reason of the first stop condition that held (see
+        stop.py; checked before every step and after the last) or "steps".
+        - fast_forward: run deterministic stretches through skip() instead of full steps
+        - on_step: called with the simulation after every step (display, export)
+        """
+        conditions = list(stop)
+        end = self.step_count + (self.config.max_steps if steps is None else steps)
+        while self.step_count < end:
+            reason = check(conditions, self)
+            if reason is not None:
+                return reason
+            if fast_forward and self.skip(end - self.step_count, conditions, on_step):
+                continue
+            self.step()
+            if on_step is not None:
+                on_step(self)
+        return check(conditions, self) or "steps"
+
+    # -------------------
+    # Fast-forward
+    # -------------------
+    def skip(self, limit, stop=(), on_step=None):
+        """
+        Event-driven fast-forward through a deterministic stretch: no idle robot
+        can be paired and every other robot only walks (carrying pairs in step
+        on their way to the deposit, paired robots heading for their gold). Such
+        a step changes nothing but positions, so it runs as the walkers' usual
+        moves plus one vectorized random-walk draw for the idle robots, without
+        the phases, sensing and messaging. The stretch ends at the next event: a
+        pair arriving at its deposit or gold, a robot about to see gold it does
+        not know, a stop condition or `limit` steps. Returns the number of steps
+        run, 0 when the current state is no such stretch.
+
+        Robots end up exactly where full steps would have left them and the
+        results are the same; only what they would have sensed and told each
+        other on the way (known cells, bus counters) is left out.
+        """
+        walkers = self._walkers()
+        if walkers is None:
+            return 0
+        slots = np.array([r.slot for r in self.robots], dtype=np.intp)
+        idle = np.array([r.slot for r in self.robots if r.state == "idle"], dtype=np.intp)
+        done = 0
+        while done < limit and not self._sees_new_gold(slots):
+            self.begin_step()
+            for move, _ in walkers:
+                move()
+            self.population.random_move(idle)
+            self.end_step()
+            done += 1
+            if on_step is not None:
+                on_step(self)
+            if any(arrived() for _, arrived in walkers) or check(stop, self) is not None:
+                break
+        if done:
+            # what the last full step would have told the teams about every robot
+            for r in self.robots:
+                r.update_to_group_status()
+                r.broadcast_to_team()
+        return done
+
+    def _walkers(self):
+        """
+        [(move, arrived)] per non-idle robot when the world is in a deterministic
+        stretch (see skip), None when it is not. Applies the pending team
+        messages first, as the next step would.
+        """
+        if self.recorder is not None:
+            return None   # replays record full steps
+        for assigner in self.assigners.values():
+            assigner.process_inbox()
+            if assigner.would_assign():
+                return None
+        walkers = []
+        for r in self.robots:
+            r.process_inbox()
+            gs = r.group_status
+            if gs.data.item(gs.rows[r.id], STATE) != r.population.state.item(r.slot):
+                return None   # a teammate changed our state: we sync next step
+            if r.state == "idle":
+                if self.config.pairing == "robot" and self._would_pair(r):
+                    return None
+                continue
+            partner = self.index.robot(r.partner_id) if r.partner_id is not None else None
+            if partner is None or partner.partner_id != r.id or gs.partner_of(r.partner_id) != r.id:
+                return None
+            if r.state == "carrying":
+                # in step with the partner (as our row of it says), so both make the same moves
+                facing = r.population.facing.item(r.slot)
+                if not (r.carrying and partner.carrying and partner.state == "carrying"
+                        and (partner.x, partner.y, partner.population.facing.item(partner.slot)) == (r.x, r.y, facing)
+                        and (gs.get(partner.id, X), gs.get(partner.id, Y), gs.get(partner.id, FACING))
+                        == (r.x, r.y, facing)):
+                    return None
+                if (r.x, r.y) == r.deposit:
+                    return None   # deposit this step
+                walkers.append(self._deposit_walk(r))
+            elif r.state == "paired_for_gold":
+                if not r.gold_target or partner.gold_target != r.gold_target or r.carrying:
+                    return None
+                tx, ty = r.gold_target
+                if self.world.grid.gold_at(tx, ty) <= 0:
+                    return None   # the pair breaks this step
+                if self._pickup_near(r, partner):
+                    return None   # pickup this step
+                if ((r.x, r.y) != (tx, ty) and self.router.grid.wall_count
+                        and self.router.next_state(r.x, r.y, r.population.facing.item(r.slot), (tx, ty)) is None):
+                    return None   # no route: the pair breaks this step
+                walkers.append(self._gold_walk(r, partner))
+            else:
+                return None
+        return walkers
+
+    def _deposit_walk(self, r):
+        if self.fields is not None:
+            field = self.fields.deposit(r.deposit)
+            move = lambda: r.step_downhill(field)
+        else:
+            move = lambda: r.move_towards(*r.deposit)
+        return move, lambda: (r.x, r.y) == r.deposit
+
+    def _gold_walk(self, r, partner):
+        target = r.gold_target
+        return (lambda: r.move_towards(*target)), (lambda: self._pickup_near(r, partner))
+
+    @staticmethod
+    def _pickup_near(r, partner):
+        """
+        `r` waits on its gold and the partner is at most one move away: the pair
+        may pick up during the next step (robots see moves made earlier in the
+        action phase, so the partner may arrive and be seen in the same step).
+        """
+        tx, ty = r.gold_target
+        return (r.x, r.y) == (tx, ty) and abs(partner.x - tx) + abs(partner.y - ty) <= 1
+
+    def _would_pair(self, r):
+        """An idle robot (robot pairing) picks a gold target next step, or drops a walled-off one."""
+        targeted = r.group_status.targets()
+        return any(cell not in targeted or not r.gold_reachable(cell) for cell in r.known_gold)
+
+    def _sees_new_gold(self, slots):
+        """True when some robot would record a gold estimate when sensing at the start of the next step."""
+        pop = self.population
+        seen = self.robots[0].vision.visible_all(pop.x[slots], pop.y[slots], pop.facing[slots])
+        valid = seen >= 0
+        amounts = np.zeros(seen.shape, dtype=np.int64)
+        amounts[valid] = self.world.grid.gold_in_flat(seen[valid])
+        for i, j in zip(*np.nonzero(amounts > 0)):
+            r = self.robots[i]
+            y, x = divmod(int(seen[i, j]), self.world.width)
+            if r.known_gold.get((x, y)) != int(amounts[i, j]) and r.gold_reachable((x, y)):
+                return True
+        return False
+
+    def results(self):
+        """Summary of the episode so far."""
+        return {
+            "steps": self.step_count,
+            "scores": dict(self.world.scores),
+            "last_pickup_step": self.last_pickup_step,
+            "gold_remaining": self.world.grid.total_gold(),
+        }
+
+    def display(self, step=None):
+        step = self.step_count if step is None else step
+        if self.metrics.enabled:
+            self.metrics.timed("display", self.world.display, self.robots, step)
+        else:
+            self.world.display(self.robots, step)
+
+    def close(self):
+        self.metrics.close()
+        self.world.renderer.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
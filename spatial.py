@@ -0,0 +1,152 @@
+# spatial.py
+"""
+Tile-bucketed cell sets for nearest-cell queries.
+
+CellBuckets keeps a set of grid cells grouped into square tiles. A nearest
+query walks tile rings outward from the query point and stops once the next
+ring cannot hold anything closer (by Manhattan distance) than the best cell
+found, so it only touches the tiles around the answer.
+
+GoldIndex is a CellBuckets of the cells holding gold, with each cell's
+amount and the running total, plus radius and rectangle queries that only
+visit the tiles they overlap. Grid keeps one up to date on every gold change.
+"""
+from collections import defaultdict
+
+DEFAULT_TILE = 8
+
+
+class CellBuckets:
+    def __init__(self, width, height, tile=DEFAULT_TILE):
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.tiles_x = (width + tile - 1) // tile
+        self.tiles_y = (height + tile - 1) // tile
+        self.buckets = defaultdict(set)   # (tx, ty) -> {(x, y), ...}
+        self.size = 0
+
+    def _tile(self, x, y):
+        return (x // self.tile, y // self.tile)
+
+    def add(self, cell):
+        bucket = self.buckets[self._tile(*cell)]
+        if cell not in bucket:
+            bucket.add(cell)
+            self.size += 1
+
+    def discard(self, cell):
+        key = self._tile(*cell)
+        bucket = self.buckets.get(key)
+        if bucket and cell in bucket:
+            bucket.remove(cell)
+            self.size -= 1
+            if not bucket:
+                del self.buckets[key]
+
+    def __contains__(self, cell):
+        return cell in self.buckets.get(self._tile(*cell), ())
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for bucket in self.buckets.values():
+            yield from bucket
+
+    def nearest(self, x, y, cost=None, accept=None):
+        """
+        Cell with the lowest cost from (x, y), or None.
+        - cost: cell -> number, must be >= the Manhattan distance from (x, y)
+          (defaults to the Manhattan distance); ties go to the smaller (cost, cell)
+        - accept: cell -> bool filter
+        """
+        if not self.size:
+            return None
+        best = None
+        cx, cy = self._tile(x, y)
+        max_ring = max(self.tiles_x, self.tiles_y)
+        for ring in range(max_ring + 1):
+            # every cell in this ring is at least this far away
+            if best is not None and (ring - 1) * self.tile + 1 > best[0]:
+                break
+            for key in _tile_ring(cx, cy, ring):
+                for cell in self.buckets.get(key, ()):
+                    if accept is not None and not accept(cell):
+                        continue
+                    c = cost(cell) if cost is not None else abs(cell[0] - x) + abs(cell[1] - y)
+                    if best is None or (c, cell) < best:
+                        best = (c, cell)
+        return best[1] if best else None
+
+
+class GoldIndex(CellBuckets):
+    def __init__(self, width, height, tile=DEFAULT_TILE):
+        super().__init__(width, height, tile)
+        self.amounts = {}      # (x, y) -> gold bars (> 0)
+        self.total = 0
+
+    def amount(self, x, y):
+        return self.amounts.get((x, y), 0)
+
+    def set(self, x, y, amount):
+        """Record that (x, y) holds `amount` bars (0 removes the cell)."""
+        cell = (x, y)
+        self.total += amount - self.amounts.get(cell, 0)
+        if amount > 0:
+            if cell not in self.amounts:
+                self.add(cell)
+            self.amounts[cell] = amount
+        elif cell in self.amounts:
+            del self.amounts[cell]
+            self.discard(cell)
+
+    def change(self, x, y, delta):
+        self.set(x, y, self.amounts.get((x, y), 0) + delta)
+
+    def reset(self, cells=()):
+        """Replace the whole index with (x, y, amount) entries."""
+        self.buckets.clear()
+        self.size = 0
+        self.amounts = {}
+        self.total = 0
+        for x, y, amount in cells:
+            self.change(x, y, amount)
+
+    def in_rect(self, x0, y0, x1, y1):
+        """(x, y, amount), in row-major order, for every gold cell with x0 <= x <= x1 and y0 <= y <= y1."""
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width - 1), min(y1, self.height - 1)
+        found = []
+        for ty in range(y0 // self.tile, y1 // self.tile + 1):
+            for tx in range(x0 // self.tile, x1 // self.tile + 1):
+                for cell in self.buckets.get((tx, ty), ()):
+                    if x0 <= cell[0] <= x1 and y0 <= cell[1] <= y1:
+                        found.append(cell)
+        return [(x, y, self.amounts[(x, y)]) for x, y in sorted(found, key=_row_major)]
+
+    def within(self, x, y, radius):
+        """(x, y, amount), in row-major order, for every gold cell within Manhattan distance `radius` of (x, y)."""
+        return [(cx, cy, a) for cx, cy, a in self.in_rect(x - radius, y - radius, x + radius, y + radius)
+                if abs(cx - x) + abs(cy - y) <= radius]
+
+    def cells(self):
+        """(x, y, amount) for every gold cell, in row-major order (as Grid.gold_cells)."""
+        return [(x, y, self.amounts[(x, y)]) for x, y in sorted(self.amounts, key=_row_major)]
+
+
+def _row_major(cell):
+    return (cell[1], cell[0])
+
+
+def _tile_ring(cx, cy, r):
+    """Tiles at Chebyshev distance exactly r from tile (cx, cy)."""
+    if r == 0:
+        yield (cx, cy)
+        return
+    for i in range(-r, r + 1):
+        yield (cx + i, cy - r)
+        yield (cx + i, cy + r)
+    for j in range(-r + 1, r):
+        yield (cx - r, cy + j)
+        yield (cx + r, cy + j)
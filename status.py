@@ -0,0 +1,189 @@
+# status.py
+"""
+Columnar team status tables.
+
+A StatusTable is one replica of a team's status: one row per member in a
+single int64 array with the columns X, Y, FACING, STATE, PARTNER, TARGET_X,
+TARGET_Y, CARRYING, VERSION and ROW (the row's own index, so copied rows
+know where they go). It replaces the {robot_id: {7-key dict}} maps. Every
+robot and every TeamAssigner keeps its own table and updates it in place:
+- set / update write one row and mark it dirty (to be broadcast)
+- take_dirty() copies the dirty rows (ROW column included) for a bus
+  message and clears their flags
+- apply(statuses) writes the rows of a whole inbox in one vectorized
+  assignment, the latest message winning where rows repeat
+
+Every local write stamps the row's VERSION with the next tick of a clock
+shared by the team's replicas, and messages carry the stamp along with the
+row. A stamp is never reused, so a robot can tell in O(1) whether anyone
+touched its own row since it last looked (Robot.status_changed), and applying
+an inbox stays a single assignment.
+
+Facing and state are stored as indices (vision.FACINGS, population.STATES),
+"no partner" as -1 and "no target" as (-1, -1). Replicas of one team share
+the same id -> row map.
+"""
+import numpy as np
+
+from population import STATES, STATE_INDEX
+from vision import FACINGS, FACING_INDEX
+
+# Column indices
+X, Y, FACING, STATE, PARTNER, TARGET_X, TARGET_Y, CARRYING, VERSION, ROW = range(10)
+COLUMN_NAMES = ("x", "y", "facing", "state", "partner", "target_x", "target_y", "carrying", "version", "row")
+
+NONE = -1   # no partner / no target
+
+
+class StatusTable:
+    def __init__(self, ids, rows=None, clock=None):
+        """
+        - ids: member robot ids; row i describes ids[i]
+        - rows: id -> row map to share with the team's other replicas (built when None)
+        - clock: one-element version counter shared with the other replicas (new when None)
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.rows = rows if rows is not None else {rid: i for i, rid in enumerate(self.ids.tolist())}
+        self.clock = clock if clock is not None else [0]
+        n = len(self.ids)
+        self.data = np.zeros((n, len(COLUMN_NAMES)), dtype=np.int64)
+        self.data[:, [PARTNER, TARGET_X, TARGET_Y]] = NONE
+        self.data[:, ROW] = np.arange(n)
+        self.dirty = set()      # rows written since the last take_dirty()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, rid):
+        return rid in self.rows
+
+    def copy(self):
+        """Independent replica (same rows map and clock, clean dirty flags)."""
+        table = StatusTable(self.ids, self.rows, self.clock)
+        table.data[:] = self.data
+        return table
+
+    def column(self, name):
+        """View of one column by name (see COLUMN_NAMES)."""
+        return self.data[:, COLUMN_NAMES.index(name)]
+
+    # -------------------
+    # Writes
+    # -------------------
+    def _touch(self, row):
+        self.clock[0] += 1
+        self.data[row, VERSION] = self.clock[0]
+        self.dirty.add(row)
+
+    def set(self, rid, x, y, facing, state, partner, target, carrying):
+        """
+        Overwrite `rid`'s row and mark it dirty. facing / state are indices,
+        partner None or an id, target None or (x, y).
+        """
+        row = self.rows[rid]
+        tx, ty = (NONE, NONE) if target is None else target
+        self.data[row, :VERSION] = (x, y, facing, state, NONE if partner is None else partner, tx, ty, carrying)
+        self._touch(row)
+
+    def update(self, rid, state=None, partner_id=False, gold_target=False, carrying=None):
+        """
+        Change some fields of `rid`'s row and mark it dirty (no-op for a non-member).
+        state is a name; partner_id / gold_target accept None to clear them.
+        """
+        row = self.rows.get(rid)
+        if row is None:
+            return
+        data = self.data
+        if state is not None:
+            data[row, STATE] = STATE_INDEX[state]
+        if partner_id is not False:
+            data[row, PARTNER] = NONE if partner_id is None else partner_id
+        if gold_target is not False:
+            data[row, TARGET_X], data[row, TARGET_Y] = (NONE, NONE) if gold_target is None else gold_target
+        if carrying is not None:
+            data[row, CARRYING] = carrying
+        self._touch(row)
+
+    # -------------------
+    # Messages
+    # -------------------
+    def take_dirty(self):
+        """Copy of every dirty row, in row order, for a bus message (None when there is none); clears the flags."""
+        if not self.dirty:
+            return None
+        if len(self.dirty) == 1:
+            row = self.dirty.pop()
+            return self.data[row:row + 1].copy()
+        rows = sorted(self.dirty)
+        self.dirty.clear()
+        return self.data[rows]
+
+    def apply(self, statuses):
+        """Write received row copies (oldest first) into this replica; not marked dirty."""
+        if len(statuses) == 1:
+            data = statuses[0]   # one take_dirty copy: every row at most once
+        else:
+            data = np.concatenate(statuses)
+            # a row sent by several messages: keep only its newest copy (numpy does not
+            # define which value wins when fancy assignment repeats an index)
+            _, newest = np.unique(data[::-1, ROW], return_index=True)
+            data = data[len(data) - 1 - newest]
+        self.data[data[:, ROW]] = data
+
+    # -------------------
+    # Reads
+    # -------------------
+    def get(self, rid, column):
+        return self.data.item(self.rows[rid], column)
+
+    def version_of(self, rid):
+        return self.data.item(self.rows[rid], VERSION)
+
+    def state_of(self, rid):
+        return STATES[self.data.item(self.rows[rid], STATE)]
+
+    def partner_of(self, rid):
+        p = self.data.item(self.rows[rid], PARTNER)
+        return None if p == NONE else p
+
+    def target_of(self, rid):
+        row = self.rows[rid]
+        tx = self.data.item(row, TARGET_X)
+        return None if tx == NONE else (tx, self.data.item(row, TARGET_Y))
+
+    def targets(self):
+        """Set of every gold target in the table."""
+        targets = self.data[self.data[:, TARGET_X] != NONE][:, [TARGET_X, TARGET_Y]]
+        return set(map(tuple, targets.tolist()))
+
+    def as_dict(self, rid):
+        """`rid`'s row as the old status dict (for debugging and tools)."""
+        row = self.rows[rid]
+        return {
+            "x": self.data.item(row, X),
+            "y": self.data.item(row, Y),
+            "facing": FACINGS[self.data.item(row, FACING)],
+            "state": STATES[self.data.item(row, STATE)],
+            "partner_id": self.partner_of(rid),
+            "gold_target": self.target_of(rid),
+            "carrying": bool(self.data.item(row, CARRYING)),
+        }
+
+
+def team_tables(robots, clocks=None):
+    """
+    group -> StatusTable holding every member's current status (members in the given order).
+    clocks: group -> version clock of the team's existing replicas, so new stamps never repeat theirs
+    """
+    members = {}
+    for r in robots:
+        members.setdefault(r.group, []).append(r)
+    tables = {}
+    for group, team in members.items():
+        table = StatusTable([r.id for r in team], clock=(clocks or {}).get(group))
+        for r in team:
+            table.set(r.id, r.x, r.y, FACING_INDEX[r.facing], STATE_INDEX[r.state], r.partner_id,
+                      r.gold_target, r.carrying)
+        table.dirty.clear()
+        tables[group] = table
+    return tables
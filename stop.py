@@ -0,0 +1,75 @@
+# stop.py
+"""
+Stop conditions for Simulation.run / TeamProcessSimulation.run.
+
+A condition is called with the simulation between steps and returns a short
+reason string when the run should end, None to keep going:
+- AllGoldDeposited: no gold left on the map and nobody still carrying any
+- ScoreReached(target, group=None): a team (or the given one) scored `target`
+- MaxSteps(steps): `steps` steps have run in total
+- TimeBudget(seconds): the run has used up this much wall-clock time
+
+    reason = sim.run(stop=[AllGoldDeposited(), TimeBudget(30)])
+"""
+import time
+
+
+class AllGoldDeposited:
+    reason = "all_gold_deposited"
+
+    def __call__(self, sim):
+        if sim.world.grid.total_gold() == 0 and not sim.population.carrying[:sim.population.size].any():
+            return self.reason
+        return None
+
+
+class ScoreReached:
+    def __init__(self, target, group=None):
+        """
+        - target: score to reach
+        - group: team to watch (any team when None)
+        """
+        self.target = target
+        self.group = group
+
+    def __call__(self, sim):
+        scores = sim.world.scores
+        groups = [self.group] if self.group is not None else list(scores)
+        for group in groups:
+            if scores[group] >= self.target:
+                return f"score_reached:{group}"
+        return None
+
+
+class MaxSteps:
+    reason = "max_steps"
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __call__(self, sim):
+        return self.reason if sim.step_count >= self.steps else None
+
+
+class TimeBudget:
+    reason = "time_budget"
+
+    def __init__(self, seconds):
+        """The clock starts at the first check, i.e. when the run starts."""
+        self.seconds = seconds
+        self.deadline = None
+
+    def __call__(self, sim):
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.seconds
+        return self.reason if now >= self.deadline else None
+
+
+def check(conditions, sim):
+    """Reason of the first condition that holds, None when the run goes on."""
+    for condition in conditions:
+        reason = condition(sim)
+        if reason is not None:
+            return reason
+    return None
@@ -0,0 +1,35 @@
+# streams.py
+"""
+Seedable random streams owned by a simulation.
+
+RandomStreams turns one seed into independent NumPy Generators:
+- map(): gold and wall placement
+- robot(robot_id): one robot's random walk
+
+Each stream's seed is derived from (root entropy, stream kind, robot id)
+with SeedSequence spawn keys, not from creation order, so a robot's draws
+depend only on the run seed and its own id. Adding robots, changing the
+iteration order or running episodes in parallel workers does not change
+them. With seed=None fresh entropy is drawn and kept in `seed`, so any run
+can be replayed.
+"""
+import numpy as np
+
+MAP_STREAM = 0
+ROBOT_STREAM = 1
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        root = np.random.SeedSequence(seed)
+        self.seed = root.entropy   # int that reproduces every stream
+
+    def generator(self, *key):
+        """Generator for the stream identified by `key` (a tuple of non-negative ints)."""
+        return np.random.Generator(np.random.PCG64(np.random.SeedSequence(self.seed, spawn_key=key)))
+
+    def map(self):
+        return self.generator(MAP_STREAM)
+
+    def robot(self, robot_id):
+        return self.generator(ROBOT_STREAM, robot_id)
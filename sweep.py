@@ -0,0 +1,168 @@
+# sweep.py
+"""
+Resumable parameter sweeps.
+
+A sweep expands a grid of parameters (grid size, robots per team, gold
+density, pairing policy, wall density) times a number of seeds into
+episodes and runs them across a process pool (batch.run_episode). Each
+finished episode is appended as one row to a CSV file, keyed by a hash of
+its SimConfig, seed and stop rule. Before running, the sweep reads the keys already in
+the file and only runs the missing episodes, so an interrupted sweep
+resumes where it stopped and an extended grid only runs the new cells.
+Progress and throughput (episodes/s) go to stderr as episodes finish.
+
+CLI:
+    python sweep.py --size 20,40 --robots 5,10,20 --gold-density 0.05,0.1 \\
+        --pairing team,robot --seeds 10 --until-done --out sweep.csv
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from batch import run_episode
+from config import PAIRING_POLICIES, SimConfig, make_config
+from stop import AllGoldDeposited
+
+# Swept parameters, in column order
+PARAMETERS = ("size", "robots", "gold_density", "pairing", "wall_density")
+DEFAULTS = {"size": (20,), "robots": (10,), "gold_density": (0.075,), "pairing": ("team",), "wall_density": (0.0,)}
+
+
+def expand(grid, seeds):
+    """
+    Every episode of the sweep as (params, seed), in grid order.
+    - grid: parameter name -> values (missing names take DEFAULTS)
+    - seeds: iterable of seeds run for every parameter cell
+    """
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters {sorted(unknown)}, expected some of {PARAMETERS}")
+    values = [tuple(grid.get(name, DEFAULTS[name])) for name in PARAMETERS]
+    seeds = list(seeds)
+    return [(dict(zip(PARAMETERS, cell)), seed) for cell in itertools.product(*values) for seed in seeds]
+
+
+def episode_config(params, max_steps):
+    """SimConfig of one sweep cell; gold is the density times the grid area (at least 1 bar)."""
+    size = params["size"]
+    return make_config(size, gold=max(1, round(params["gold_density"] * size * size)),
+                       robots_per_team=params["robots"], max_steps=max_steps,
+                       pairing=params["pairing"], wall_density=params["wall_density"])
+
+
+def episode_key(config, seed, until_done=False):
+    """
+    Stable hash of a config, seed and stop rule, the row key in the results file
+    (fast-forwarding does not change results and is not part of it).
+    """
+    text = json.dumps({"config": config.to_dict(), "seed": seed, "until_done": until_done}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def read_results(path):
+    """(columns, keys) of the results file: its header and the episodes already in it (empty when missing)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None, set()
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, {row["key"] for row in reader}
+
+
+def _row(key, params, result):
+    row = {"key": key, "seed": result["seed"]}
+    row.update(params)
+    for name in ("steps", "stop_reason", "last_pickup_step", "gold_remaining", "wall_time"):
+        row[name] = result[name]
+    for group, score in sorted(result["scores"].items()):
+        row["score_" + group] = score
+    return row
+
+
+def _run_episode_args(args):
+    key, params, seed, config, until_done, fast_forward = args
+    stop = [AllGoldDeposited()] if until_done else []
+    return key, params, run_episode(seed, SimConfig.from_dict(config), stop, fast_forward)
+
+
+def run_sweep(path, grid, seeds, max_steps=1000, workers=None, until_done=False, fast_forward=False):
+    """
+    Run every episode of the sweep that is not in the CSV file at `path` yet,
+    appending one row per episode as it finishes. Returns the new rows.
+    - until_done: stop an episode once all gold is deposited
+    - fast_forward: see Simulation.run
+    """
+    columns, done = read_results(path)
+    already = len(done)
+    pending = []
+    for params, seed in expand(grid, seeds):
+        config = episode_config(params, max_steps)
+        key = episode_key(config, seed, until_done)
+        if key not in done:
+            done.add(key)   # the same cell listed twice runs once
+            pending.append((key, params, seed, config.to_dict(), until_done, fast_forward))
+    total = len(pending)
+    print(f"{already} episodes already done, {total} to run", file=sys.stderr)
+    if not pending:
+        return []
+
+    rows = []
+    start = time.perf_counter()
+    with open(path, "a", newline="") as f:
+        # appended rows follow the existing header
+        writer = csv.DictWriter(f, fieldnames=columns) if columns else None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_episode_args, args) for args in pending]
+            for future in as_completed(futures):
+                key, params, result = future.result()
+                row = _row(key, params, result)
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+                f.flush()   # a finished episode survives an interrupted sweep
+                rows.append(row)
+                elapsed = time.perf_counter() - start
+                print(f"\r{len(rows)}/{total} episodes, {len(rows) / elapsed:.2f} episodes/s",
+                      end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return rows
+
+
+def _list(kind):
+    return lambda text: tuple(kind(v) for v in text.split(","))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a resumable parameter sweep.")
+    parser.add_argument("--size", type=_list(int), default=DEFAULTS["size"], help="grid sizes, comma separated")
+    parser.add_argument("--robots", type=_list(int), default=DEFAULTS["robots"],
+                        help="robots per team, comma separated")
+    parser.add_argument("--gold-density", type=_list(float), default=DEFAULTS["gold_density"],
+                        help="gold bars per cell, comma separated")
+    parser.add_argument("--pairing", type=_list(str), default=DEFAULTS["pairing"],
+                        help=f"pairing policies, comma separated ({', '.join(PAIRING_POLICIES)})")
+    parser.add_argument("--wall-density", type=_list(float), default=DEFAULTS["wall_density"],
+                        help="wall densities, comma separated")
+    parser.add_argument("--seeds", type=int, default=5, help="episodes per cell (seeds first-seed, ...)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=1000, help="max steps per episode")
+    parser.add_argument("--until-done", action="store_true", help="stop episodes once all gold is deposited")
+    parser.add_argument("--fast-forward", action="store_true", help="skip deterministic stretches (see Simulation.skip)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default="sweep.csv", help="results CSV, appended to and resumed from")
+    args = parser.parse_args(argv)
+
+    grid = {"size": args.size, "robots": args.robots, "gold_density": args.gold_density,
+            "pairing": args.pairing, "wall_density": args.wall_density}
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    return run_sweep(args.out, grid, seeds, args.steps, args.workers, args.until_done, args.fast_forward)
+
+
+if __name__ == "__main__":
+    main()
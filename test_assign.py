@@ -0,0 +1,52 @@
+# test_assign.py
+"""hungarian() and the optimal pair assignment against brute force."""
+import itertools
+
+import numpy as np
+import pytest
+
+from assign import _assign_optimal, hungarian
+
+
+def brute_force(cost):
+    n, m = len(cost), len(cost[0])
+    return min(sum(cost[i][j] for i, j in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_hungarian_is_minimal(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 6))
+    m = int(rng.integers(n, 7))
+    cost = rng.integers(0, 20, (n, m)).tolist()
+    cols = hungarian(cost)
+    assert len(set(cols)) == n and all(0 <= j < m for j in cols)
+    assert sum(cost[i][j] for i, j in enumerate(cols)) == brute_force(cost)
+
+
+class FakeRobot:
+    def __init__(self, rid, x, y):
+        self.id, self.x, self.y = rid, x, y
+
+    def distance(self, tx, ty):
+        return abs(tx - self.x) + abs(ty - self.y)
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_optimal_pairs_are_valid_and_leaders_minimal(seed):
+    rng = np.random.default_rng(seed)
+    idle = [FakeRobot(i, *rng.integers(0, 12, 2).tolist()) for i in range(int(rng.integers(2, 7)))]
+    cells = sorted({tuple(c) for c in rng.integers(0, 12, (int(rng.integers(1, 5)), 2)).tolist()})
+    pairs = min(len(idle) // 2, len(cells))
+    assignments = _assign_optimal(idle, cells, pairs)
+
+    assert len(assignments) == pairs
+    used = [r.id for leader, partner, _ in assignments for r in (leader, partner)]
+    assert len(used) == len(set(used))
+    assert len({cell for _, _, cell in assignments}) == pairs
+
+    # leaders: the cheapest way to send `pairs` distinct robots to `pairs` distinct cells
+    best = min(sum(r.distance(*c) for r, c in zip(robots, chosen))
+               for robots in itertools.permutations(idle, pairs)
+               for chosen in itertools.combinations(cells, pairs))
+    assert sum(leader.distance(*cell) for leader, _, cell in assignments) == best
@@ -0,0 +1,17 @@
+# test_batch.py
+"""run_batch passes stop conditions and fast-forward to every episode."""
+from batch import run_batch
+from config import make_config
+from stop import AllGoldDeposited
+
+
+def strip_time(results):
+    return [{k: v for k, v in r.items() if k != "wall_time"} for r in results]
+
+
+def test_batch_stops_when_done_in_and_out_of_process():
+    config = make_config(15, gold=10, robots_per_team=4, max_steps=2000)
+    serial = run_batch(range(3), config, workers=1, stop=[AllGoldDeposited()])
+    pooled = run_batch(range(3), config, workers=2, stop=[AllGoldDeposited()], fast_forward=True)
+    assert all(r["stop_reason"] == "all_gold_deposited" and r["steps"] < 2000 for r in serial)
+    assert strip_time(pooled) == strip_time(serial)
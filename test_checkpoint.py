@@ -0,0 +1,77 @@
+# test_checkpoint.py
+"""A restored checkpoint continues exactly like the run it was taken from."""
+from collections import deque
+
+import pytest
+
+from checkpoint import fork, restore, save, to_bytes
+from config import make_config
+from simulation import Simulation
+
+
+def snapshot(sim):
+    pop, n = sim.population, sim.population.size
+    return {
+        "results": sim.results(),
+        "x": pop.x[:n].tolist(),
+        "y": pop.y[:n].tolist(),
+        "facing": pop.facing[:n].tolist(),
+        "state": pop.state[:n].tolist(),
+        "carrying": pop.carrying[:n].tolist(),
+        "targets": [r.gold_target for r in sim.robots],
+        "partners": [r.partner_id for r in sim.robots],
+        "known_gold": [sorted(r.known_gold.items()) for r in sim.robots],
+    }
+
+
+CASES = [
+    dict(),
+    dict(pairing="robot"),
+    dict(wall_density=0.2),
+    dict(gold=60, robots_per_team=15),
+]
+
+
+@pytest.mark.parametrize("options", CASES)
+def test_restore_continues_identically(tmp_path, options):
+    config = make_config(25, max_steps=400, **options)
+    original = Simulation(config, seed=7)
+    original.run(120)
+    path = tmp_path / "run.ckpt.npz"
+    save(original, str(path))
+    restored = restore(str(path))
+    assert snapshot(restored) == snapshot(original)
+    for _ in range(4):
+        original.run(40)
+        restored.run(40)
+        assert snapshot(restored) == snapshot(original)
+
+
+def test_restore_from_bytes():
+    sim = Simulation(make_config(20, max_steps=200), seed=3)
+    sim.run(50)
+    copy = restore(to_bytes(sim))
+    sim.run(100)
+    copy.run(100)
+    assert snapshot(copy) == snapshot(sim)
+
+
+def test_fork_branch_matches_plain_run():
+    config = make_config(20, max_steps=200)
+    sim = Simulation(config, seed=5)
+    sim.run(60)
+    reference = restore(to_bytes(sim))
+    reference.reseed(11)
+    reference.run(80)
+    [branch] = fork(sim, [{"seed": 11}], steps=80, workers=1)
+    assert {k: branch[k] for k in reference.results()} == reference.results()
+    assert sim.step_count == 60
+
+
+def test_bus_history_is_bounded_and_restored():
+    sim = Simulation(make_config(15, max_steps=300), seed=1)
+    sim.bus.history = deque(maxlen=50)
+    sim.run(120)
+    assert len(sim.bus.history) == 50
+    copy = restore(to_bytes(sim))
+    assert list(copy.bus.history) == list(sim.bus.history)
@@ -0,0 +1,27 @@
+# test_export.py
+"""Live frame export and replay export label the same state with the same step."""
+import os
+
+import pytest
+
+from config import make_config
+from export import FrameExporter
+from replay import Replay
+from simulation import Simulation
+
+
+def test_live_and_replay_frames_match(tmp_path):
+    pytest.importorskip("matplotlib")
+    sim = Simulation(make_config(12, robots_per_team=4, gold=10, max_steps=9), seed=3)
+    sim.record_to(str(tmp_path / "run"))
+    live = tmp_path / "live"
+    with FrameExporter(sim, str(live), every=4) as exporter:
+        sim.run(on_step=lambda s: exporter.submit())
+    assert exporter.dropped == 0
+    sim.close()
+
+    paths = Replay(str(tmp_path / "run")).export_frames(str(tmp_path / "replay"), every=4)
+    names = sorted(os.listdir(live))
+    assert names == [os.path.basename(p) for p in paths] == [f"frame_{s:07d}.png" for s in (0, 4, 8)]
+    for name in names:
+        assert (live / name).read_bytes() == (tmp_path / "replay" / name).read_bytes()
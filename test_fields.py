@@ -0,0 +1,74 @@
+# test_fields.py
+"""DistanceField against a plain BFS, before and after remove_sources."""
+from collections import deque
+
+import numpy as np
+import pytest
+
+from fields import UNREACHABLE, DistanceField
+
+
+def bfs(width, height, sources, blocked):
+    dist = np.full(width * height, UNREACHABLE, dtype=np.int64)
+    queue = deque()
+    for s in sources:
+        if not blocked[s]:
+            dist[s] = 0
+            queue.append(s)
+    while queue:
+        cell = queue.popleft()
+        y, x = divmod(cell, width)
+        for nx, ny in ((x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)):
+            n = ny * width + nx
+            if 0 <= nx < width and 0 <= ny < height and not blocked[n] and dist[n] == UNREACHABLE:
+                dist[n] = dist[cell] + 1
+                queue.append(n)
+    return dist
+
+
+def random_case(seed, width=23, height=17, walls=0.25, sources=12):
+    rng = np.random.default_rng(seed)
+    blocked = rng.random(width * height) < walls
+    return rng, blocked, rng.choice(width * height, sources, replace=False)
+
+
+def check_field(field, sources, blocked):
+    expected = bfs(field.width, field.height, sources, blocked)
+    assert np.array_equal(field.dist, expected)
+    # every reached cell is labelled with a live source at exactly its distance
+    reached = np.flatnonzero(field.dist != UNREACHABLE)
+    live = set(s for s in np.asarray(sources).tolist() if not blocked[s])
+    assert set(field.label[reached].tolist()) <= live
+    assert (field.label[np.flatnonzero(field.dist == UNREACHABLE)] == -1).all()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_build_matches_bfs(seed):
+    _, blocked, sources = random_case(seed)
+    check_field(DistanceField(23, 17, sources, blocked), sources, blocked)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_remove_sources_matches_fresh_field(seed):
+    rng, blocked, sources = random_case(seed)
+    field = DistanceField(23, 17, sources, blocked)
+    remaining = list(sources)
+    while len(remaining) > 1:
+        gone = rng.choice(remaining, rng.integers(1, max(2, len(remaining) // 2)), replace=False)
+        remaining = [s for s in remaining if s not in set(gone.tolist())]
+        field.remove_sources(gone)
+        check_field(field, remaining, blocked)
+
+
+def test_remove_last_source_clears_field():
+    field = DistanceField(5, 4, [7])
+    field.remove_sources([7])
+    assert (field.dist == UNREACHABLE).all()
+    assert (field.label == -1).all()
+
+
+def test_remove_non_source_is_noop():
+    field = DistanceField(5, 4, [0, 19])
+    before = field.dist.copy()
+    field.remove_sources([3, 10])
+    assert np.array_equal(field.dist, before)
@@ -0,0 +1,30 @@
+# test_map.py
+"""Random walls never cut off deposits, start cells or gold."""
+import pytest
+
+from config import make_config
+from fields import UNREACHABLE, DistanceField
+from simulation import Simulation
+from stop import AllGoldDeposited
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_walls_leave_deposits_starts_and_gold_reachable(seed):
+    config = make_config(30, gold=60, robots_per_team=10, wall_density=0.3)
+    world = Simulation(config, seed=seed).world
+    hx, hy = world.deposit_points[0]
+    field = DistanceField(world.width, world.height, [hy * world.width + hx], world.grid.blocked_flat())
+    for team in config.teams:
+        assert field.at(*team.deposit) != UNREACHABLE
+        assert field.at(*team.start) != UNREACHABLE
+    for x, y, _ in world.grid.gold_cells():
+        assert field.at(x, y) != UNREACHABLE
+
+
+@pytest.mark.parametrize("pairing", ["team", "robot"])
+@pytest.mark.parametrize("seed", [1, 3])
+def test_walled_runs_collect_all_gold(seed, pairing):
+    config = make_config(30, gold=60, robots_per_team=10, wall_density=0.3, max_steps=3000, pairing=pairing)
+    sim = Simulation(config, seed=seed)
+    assert sim.run(stop=[AllGoldDeposited()]) == "all_gold_deposited"
+    assert all(score > 0 for score in sim.world.scores.values())
@@ -0,0 +1,66 @@
+# test_render.py
+"""Robot.sense() and the renderer reuse the visibility computed for a pose."""
+import pytest
+
+from config import make_config
+from simulation import Simulation
+from vision import VisibilityTable
+
+
+def count_calls(monkeypatch):
+    calls = {"flat": 0, "cells": 0}
+    for name in calls:
+        original = getattr(VisibilityTable, name)
+
+        def counted(self, *args, _name=name, _original=original):
+            calls[_name] += 1
+            return _original(self, *args)
+
+        monkeypatch.setattr(VisibilityTable, name, counted)
+    return calls
+
+
+def test_sense_matches_visibility_table():
+    sim = Simulation(make_config(20, max_steps=100), seed=4)
+    for _ in range(30):
+        sim.step()
+        for r in sim.robots:
+            assert r.sense() == r.vision.cells(r.x, r.y, r.facing)
+
+
+def test_renderer_does_not_recompute_an_unchanged_pose(monkeypatch):
+    pytest.importorskip("matplotlib")
+    import matplotlib
+    matplotlib.use("Agg")
+    from render import MatplotlibRenderer
+
+    renderer = MatplotlibRenderer(interactive=False)
+    sim = Simulation(make_config(15, max_steps=100), renderer=renderer, seed=2)
+    try:
+        sim.run(10)
+        calls = count_calls(monkeypatch)
+        # only robots that moved or turned since they sensed this step need a lookup
+        moved = sum(r._sense_key != (r.x, r.y, r.facing) for r in sim.robots)
+        sim.display()
+        assert calls == {"flat": moved, "cells": 0}
+        sim.display()
+        assert calls == {"flat": moved, "cells": 0}
+        # the next step senses from the poses the renderer already looked up
+        sim.start_phase()
+        assert calls == {"flat": moved, "cells": 0}
+    finally:
+        sim.close()
+
+
+def test_make_renderer_reports_constructor_errors(monkeypatch):
+    from render import RENDERERS, make_renderer
+
+    class Broken:
+        def __init__(self):
+            raise KeyError("missing setting")
+
+    monkeypatch.setitem(RENDERERS, "broken", Broken)
+    with pytest.raises(KeyError, match="missing setting"):
+        make_renderer("broken")
+    with pytest.raises(ValueError, match="unknown renderer"):
+        make_renderer("nope")
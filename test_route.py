@@ -0,0 +1,105 @@
+# test_route.py
+"""Router routes against a breadth-first search over (x, y, facing) states."""
+from collections import deque
+
+import numpy as np
+import pytest
+
+from grid import Grid
+from population import STEP_X, STEP_Y
+from route import Router
+
+
+def walled_grid(seed, width=15, height=12, walls=0.3):
+    grid = Grid(width, height, ["group1"])
+    rng = np.random.default_rng(seed)
+    for flat in np.flatnonzero(rng.random(width * height) < walls).tolist():
+        y, x = divmod(flat, width)
+        grid.set_blocked(x, y)
+    return grid, rng
+
+
+def moves(grid, state):
+    x, y, f = state
+    nx, ny = x + STEP_X.item(f), y + STEP_Y.item(f)
+    if grid.in_bounds(nx, ny) and not grid.is_blocked(nx, ny):
+        yield (nx, ny, f)
+    for t in range(4):
+        if t != f:
+            yield (x, y, t)
+
+
+def bfs_cost(grid, start, goal):
+    """Fewest cycles (moves and turns) from `start` to any state on `goal`, None if unreachable."""
+    seen = {start: 0}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if state[:2] == goal:
+            return seen[state]
+        for nxt in moves(grid, state):
+            if nxt not in seen:
+                seen[nxt] = seen[state] + 1
+                queue.append(nxt)
+    return None
+
+
+def free_cells(grid):
+    return [(x, y) for y in range(grid.height) for x in range(grid.width) if not grid.is_blocked(x, y)]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_search_is_shortest_and_valid(seed):
+    grid, rng = walled_grid(seed)
+    router = Router(grid)
+    cells = free_cells(grid)
+    for _ in range(40):
+        start = cells[rng.integers(len(cells))] + (int(rng.integers(4)),)
+        goal = cells[rng.integers(len(cells))]
+        path = router.search(start, goal)
+        expected = bfs_cost(grid, start, goal)
+        if expected is None:
+            assert path is None
+            continue
+        assert path[0] == start and path[-1][:2] == goal
+        assert len(path) - 1 == expected
+        for state, nxt in zip(path, path[1:]):
+            assert nxt in set(moves(grid, state))
+
+
+def test_blocked_goal_has_no_route():
+    grid, _ = walled_grid(0)
+    wall = next((x, y) for y in range(grid.height) for x in range(grid.width) if grid.is_blocked(x, y))
+    start = free_cells(grid)[0] + (0,)
+    assert Router(grid).search(start, wall) is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_next_state_follows_a_shortest_route(seed):
+    grid, rng = walled_grid(seed)
+    router = Router(grid)
+    cells = free_cells(grid)
+    for _ in range(20):
+        state = cells[rng.integers(len(cells))] + (int(rng.integers(4)),)
+        goal = cells[rng.integers(len(cells))]
+        expected = bfs_cost(grid, state, goal)
+        steps = 0
+        while True:
+            nxt = router.next_state(*state, goal)
+            if nxt is None:
+                break
+            assert nxt in set(moves(grid, state))
+            state = nxt
+            steps += 1
+        if expected is None:
+            assert steps == 0
+        else:
+            assert state[:2] == goal and steps == expected
+
+
+def test_wall_change_drops_cached_routes():
+    grid = Grid(5, 1, ["group1"])
+    router = Router(grid)
+    assert router.next_state(0, 0, 1, (4, 0)) == (1, 0, 1)
+    grid.set_blocked(2, 0)
+    assert router.next_state(0, 0, 1, (4, 0)) is None
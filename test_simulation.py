@@ -0,0 +1,49 @@
+# test_simulation.py
+"""Fast-forwarded runs end exactly where full steps do."""
+import pytest
+
+from config import make_config
+from simulation import Simulation
+from stop import AllGoldDeposited, MaxSteps
+
+
+def snapshot(sim):
+    pop, n = sim.population, sim.population.size
+    return (sim.results(), pop.x[:n].tolist(), pop.y[:n].tolist(), pop.facing[:n].tolist(),
+            pop.state[:n].tolist(), pop.carrying[:n].tolist())
+
+
+@pytest.mark.parametrize("options", [
+    dict(),
+    dict(pairing="robot"),
+    dict(wall_density=0.3, gold=60),
+    dict(wall_density=0.3, pairing="robot"),
+])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_fast_forward_matches_full_steps(options, seed):
+    config = make_config(30, max_steps=1500, **options)
+    full = Simulation(config, seed=seed)
+    fast = Simulation(config, seed=seed)
+    skipped = []
+    skip = fast.skip
+
+    def counting_skip(*args):
+        skipped.append(skip(*args))
+        return skipped[-1]
+
+    fast.skip = counting_skip
+    for _ in range(30):
+        reason = full.run(50, stop=[AllGoldDeposited()])
+        assert fast.run(50, stop=[AllGoldDeposited()], fast_forward=True) == reason
+        assert snapshot(fast) == snapshot(full)
+        if reason != "steps":
+            break
+    assert sum(skipped) > 0
+
+
+def test_fast_forward_calls_on_step_and_honours_stops():
+    sim = Simulation(make_config(30, max_steps=1000), seed=2)
+    seen = []
+    assert sim.run(stop=[MaxSteps(333)], fast_forward=True, on_step=lambda s: seen.append(s.step_count)) == "max_steps"
+    assert sim.step_count == 333
+    assert seen == list(range(1, 334))
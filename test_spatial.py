@@ -0,0 +1,60 @@
+# test_spatial.py
+"""CellBuckets / GoldIndex queries against scans over every cell."""
+import numpy as np
+import pytest
+
+from spatial import CellBuckets, GoldIndex
+
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_nearest_matches_scan(seed):
+    rng = np.random.default_rng(seed)
+    width, height = 37, 29
+    buckets = CellBuckets(width, height, tile=int(rng.integers(1, 10)))
+    cells = set()
+    for _ in range(60):
+        cell = tuple(rng.integers(0, (width, height)).tolist())
+        if rng.random() < 0.3 and cells:
+            cell = sorted(cells)[int(rng.integers(len(cells)))]
+            buckets.discard(cell)
+            cells.discard(cell)
+        else:
+            buckets.add(cell)
+            cells.add(cell)
+        assert len(buckets) == len(cells) and set(buckets) == cells
+        x, y = rng.integers(0, (width, height)).tolist()
+        expected = min(cells, key=lambda c: (manhattan(c, (x, y)), c)) if cells else None
+        assert buckets.nearest(x, y) == expected
+        # a cost that is not the plain distance, with a filter
+        odd = [c for c in cells if c[0] % 2]
+        cost = lambda c: manhattan(c, (x, y)) + c[1] % 3
+        expected = min(odd, key=lambda c: (cost(c), c)) if odd else None
+        assert buckets.nearest(x, y, cost=cost, accept=lambda c: c[0] % 2) == expected
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_gold_index_queries_match_scan(seed):
+    rng = np.random.default_rng(seed)
+    width, height = 40, 31
+    gold = np.zeros((height, width), dtype=int)
+    index = GoldIndex(width, height)
+    for _ in range(200):
+        x, y = rng.integers(0, (width, height)).tolist()
+        delta = int(rng.integers(-2, 4))
+        delta = max(delta, -gold[y, x])
+        gold[y, x] += delta
+        index.change(x, y, delta)
+    ys, xs = np.nonzero(gold)
+    everything = [(x, y, gold[y, x]) for y, x in zip(ys.tolist(), xs.tolist())]
+    assert index.total == gold.sum()
+    assert index.cells() == everything
+    for _ in range(20):
+        x, y = rng.integers(0, (width, height)).tolist()
+        radius = int(rng.integers(0, 12))
+        assert index.within(x, y, radius) == [c for c in everything if manhattan(c, (x, y)) <= radius]
+        x1, y1 = x + int(rng.integers(0, 15)), y + int(rng.integers(0, 15))
+        assert index.in_rect(x, y, x1, y1) == [c for c in everything if x <= c[0] <= x1 and y <= c[1] <= y1]
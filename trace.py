@@ -0,0 +1,80 @@
+# trace.py
+"""
+Structured event tracing for the step loop.
+
+Robots and the simulation report events (pickup, deposit, pair formed/broken,
+state sync, ...) to a Tracer instead of printing. Events are kept in an
+in-memory ring buffer and optionally appended to a JSONL file, and both can
+be queried after the run.
+
+Call sites guard every emit with the level flag, so a disabled tracer costs
+one attribute check and no formatting:
+
+    if self.tracer.info:
+        self.tracer.emit(INFO, "pickup", robot=self.id, cell=(tx, ty))
+"""
+import json
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+OFF = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "off": OFF}
+
+
+class Tracer:
+    def __init__(self, level=OFF, capacity=100_000, path=None):
+        """
+        - level: DEBUG, INFO or OFF (or their names)
+        - capacity: ring buffer size (oldest events are dropped first)
+        - path: optional JSONL file receiving every event
+        """
+        self.events = deque(maxlen=capacity)
+        self.step = 0
+        self._file = open(path, "w") if path else None
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        # Flags checked at call sites
+        self.debug = self.level <= DEBUG
+        self.info = self.level <= INFO
+
+    def emit(self, level, kind, **fields):
+        if level < self.level:
+            return
+        event = {"step": self.step, "kind": kind}
+        event.update(fields)
+        self.events.append(event)
+        if self._file is not None:
+            self._file.write(json.dumps(event) + "\n")
+
+    def query(self, kind=None, robot=None, since=None, until=None):
+        """Buffered events filtered by kind, robot id and step range (inclusive)."""
+        return filter_events(self.events, kind, robot, since, until)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def filter_events(events, kind=None, robot=None, since=None, until=None):
+    return [
+        e for e in events
+        if (kind is None or e["kind"] == kind)
+        and (robot is None or e.get("robot") == robot)
+        and (since is None or e["step"] >= since)
+        and (until is None or e["step"] <= until)
+    ]
+
+
+def load_events(path):
+    """Read the events of a JSONL trace file (tuples come back as lists)."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Shared disabled tracer for robots created outside a Simulation
+NULL_TRACER = Tracer(OFF, capacity=0)
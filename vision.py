@@ -0,0 +1,75 @@
+# vision.py
+"""
+Precomputed visibility lookup tables for Robot.sense.
+
+What a robot sees depends only on (x, y, facing) and the grid size, so each
+map size gets one VisibilityTable (see visibility_table). Per (cell, facing)
+it stores the flat indices (y * width + x) of the visible cells, padded with
+-1, so sensing is a single row lookup. visible_all answers the same question
+for a whole population in one vectorized call.
+"""
+import numpy as np
+
+FACINGS = ("N", "E", "S", "W")
+FACING_INDEX = {f: i for i, f in enumerate(FACINGS)}
+
+# (dx, dy) of the visible cells per facing: 3 cells one step ahead, 5 two steps ahead
+OFFSETS = np.array([
+    [(dx, 1) for dx in (-1, 0, 1)] + [(dx, 2) for dx in (-2, -1, 0, 1, 2)],      # N
+    [(1, dy) for dy in (-1, 0, 1)] + [(2, dy) for dy in (-2, -1, 0, 1, 2)],      # E
+    [(dx, -1) for dx in (-1, 0, 1)] + [(dx, -2) for dx in (-2, -1, 0, 1, 2)],    # S
+    [(-1, dy) for dy in (-1, 0, 1)] + [(-2, dy) for dy in (-2, -1, 0, 1, 2)],    # W
+], dtype=np.int32)
+VIEW_SIZE = OFFSETS.shape[1]
+
+# Maps with more cells than this compute rows on demand instead of holding
+# the full (cells * 4, 8) int32 table (128 bytes per cell).
+DENSE_LIMIT = 512 * 512
+
+_tables = {}
+
+
+def visibility_table(width, height):
+    """Shared VisibilityTable for a map size (built on first use)."""
+    key = (width, height)
+    if key not in _tables:
+        _tables[key] = VisibilityTable(width, height)
+    return _tables[key]
+
+
+class VisibilityTable:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.table = None
+        if width * height <= DENSE_LIMIT:
+            ys, xs = np.divmod(np.arange(width * height), width)
+            rows = [self.visible_all(xs, ys, np.full(len(xs), f)) for f in range(len(FACINGS))]
+            # row index = flat_cell * 4 + facing
+            self.table = np.stack(rows, axis=1).reshape(-1, VIEW_SIZE).astype(np.int32)
+
+    def visible_all(self, xs, ys, facings):
+        """
+        Visible cells for many robots at once.
+        xs, ys, facings (facing indices into FACINGS) are equal-length arrays;
+        returns an (n, 8) int array of flat indices, -1 where off-grid.
+        """
+        off = OFFSETS[np.asarray(facings)]
+        vx = np.asarray(xs)[:, None] + off[:, :, 0]
+        vy = np.asarray(ys)[:, None] + off[:, :, 1]
+        ok = (vx >= 0) & (vx < self.width) & (vy >= 0) & (vy < self.height)
+        return np.where(ok, vy * self.width + vx, -1)
+
+    def flat(self, x, y, facing):
+        """Flat indices of the cells visible from (x, y) facing `facing` ("N"/"E"/"S"/"W")."""
+        f = FACING_INDEX[facing]
+        if self.table is not None:
+            row = self.table[(y * self.width + x) * 4 + f]
+        else:
+            row = self.visible_all([x], [y], [f])[0]
+        return row[row >= 0]
+
+    def cells(self, x, y, facing):
+        """Visible cells as a tuple of (x, y), in the order Robot.sense always used."""
+        ys, xs = np.divmod(self.flat(x, y, facing), self.width)
+        return tuple(zip(xs.tolist(), ys.tolist()))